@@ -0,0 +1,69 @@
+"""This module provides locks for booking specialists time.
+
+Orders of a specialist are checked for overlapping and created while the
+specialist is locked, so concurrent customers can't book the same time.
+Only bookings of the same specialist wait for each other.
+
+On PostgreSQL transaction level advisory locks are used. Other databases
+lock the specialist row with SELECT ... FOR UPDATE, which is additionally
+guarded by a process local lock for databases which ignore it (SQLite).
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.db import connection, transaction
+
+from api.models import CustomUser
+
+
+ORDER_LOCK_NAMESPACE = 1
+OVERLAP_CONSTRAINT = "api_order_specialist_no_overlap"
+
+_local_locks = defaultdict(threading.Lock)
+_local_locks_guard = threading.Lock()
+
+
+def _get_local_lock(specialist_id):
+    """Return process local lock of the specialist."""
+    with _local_locks_guard:
+        return _local_locks[specialist_id]
+
+
+@contextmanager
+def lock_specialists(specialist_ids):
+    """Lock specialists for booking until the end of the transaction.
+
+    Opens a transaction, so changes made inside of the block are committed
+    before locks are released. It must be the outermost transaction,
+    otherwise process local locks are released before the commit.
+    Specialists are locked in order of their ids to avoid deadlocks.
+
+    Args:
+        specialist_ids (Iterable[int]): ids of the specialists
+    """
+    specialist_ids = sorted(set(specialist_ids))
+
+    with ExitStack() as stack:
+        if connection.vendor != "postgresql":
+            for specialist_id in specialist_ids:
+                stack.enter_context(_get_local_lock(specialist_id))
+
+        stack.enter_context(transaction.atomic())
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for specialist_id in specialist_ids:
+                    cursor.execute(
+                        "SELECT pg_advisory_xact_lock(%s, %s)",
+                        [ORDER_LOCK_NAMESPACE, specialist_id],
+                    )
+        else:
+            list(
+                CustomUser.objects.select_for_update().filter(
+                    id__in=specialist_ids,
+                ).order_by("id").values_list("id", flat=True),
+            )
+
+        yield
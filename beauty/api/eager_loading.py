@@ -0,0 +1,48 @@
+"""This module provides eager loading of relations needed by serializers.
+
+Serializers declare relations which are used in their representation, and
+views apply them to the queryset, so list endpoints run a constant amount
+of queries regardless of the page size.
+"""
+
+
+class EagerLoadingMixin:
+    """Serializer mixin which declares relations used in representation.
+
+    Attributes:
+        select_related_fields (tuple): forward relations loaded with a join
+        prefetch_related_fields (tuple): many relations loaded with one query each
+        only_fields (tuple): fields loaded from the database, all fields if empty
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    only_fields = ()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Return queryset which loads all relations needed by the serializer."""
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        if cls.only_fields:
+            queryset = queryset.only(*cls.only_fields)
+        return queryset
+
+
+class EagerLoadingViewMixin:
+    """Generic view mixin which loads relations declared by the serializer class.
+
+    Relations are applied in filter_queryset, so views which override
+    get_queryset get them too.
+    """
+
+    def filter_queryset(self, queryset):
+        """Filter queryset and load relations needed by the serializer."""
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+
+        if issubclass(serializer_class, EagerLoadingMixin):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
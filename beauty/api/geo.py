@@ -0,0 +1,273 @@
+"""This module provides proximity search of locations.
+
+Locations are indexed by geohash: a string which prefixes are nested cells
+of the coordinate grid. Cells around a point are selected with indexed range
+lookups and only their locations are checked with the haversine distance,
+so search doesn't scan all locations and works without PostGIS.
+"""
+
+import heapq
+import math
+from threading import Lock
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.db.models import FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+from beauty.utils import VersionedCache
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+# Character following every geohash character, closes ranges of cell prefixes.
+GEOHASH_END = "{"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Return geohash of the cell with given precision which contains the point."""
+    ranges = {"latitude": [-90.0, 90.0], "longitude": [-180.0, 180.0]}
+    values = {"latitude": float(latitude), "longitude": float(longitude)}
+    axis = "longitude"
+    geohash = []
+
+    while len(geohash) < precision:
+        char = 0
+        for _ in range(5):
+            low, high = ranges[axis]
+            middle = (low + high) / 2
+            char <<= 1
+            if values[axis] >= middle:
+                char |= 1
+                ranges[axis][0] = middle
+            else:
+                ranges[axis][1] = middle
+            axis = "latitude" if axis == "longitude" else "longitude"
+        geohash.append(GEOHASH_ALPHABET[char])
+
+    return "".join(geohash)
+
+
+def get_cell_size(precision: int) -> Tuple[float, float]:
+    """Return height and width of geohash cells with given precision in degrees."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** (bits - bits // 2)
+
+
+def get_search_precision(latitude: float, radius_km: float) -> int:
+    """Return the longest geohash precision with cells not smaller than the radius.
+
+    Circle of the radius around a point is covered by the cell of the point
+    and eight neighbour cells of such precision. Zero means that the circle
+    can't be covered by cells, e.g. near the poles.
+    """
+    max_latitude = min(abs(latitude) + radius_km / KM_PER_DEGREE, 90)
+    width_scale = math.cos(math.radians(max_latitude))
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = get_cell_size(precision)
+        if min(height, width * width_scale) * KM_PER_DEGREE >= radius_km:
+            return precision
+    return 0
+
+
+def get_search_cells(latitude: float, longitude: float, radius_km: float) -> Optional[Set[str]]:
+    """Return geohashes of cells which cover the circle around the point.
+
+    Returns:
+        cells (set): geohashes of the point cell and its neighbours or
+        None if the circle can't be covered by cells
+    """
+    precision = get_search_precision(latitude, radius_km)
+    if not precision:
+        return None
+
+    height, width = get_cell_size(precision)
+    cells = set()
+    for latitude_step in (-1, 0, 1):
+        cell_latitude = latitude + latitude_step * height
+        if not -90 <= cell_latitude <= 90:
+            continue
+
+        for longitude_step in (-1, 0, 1):
+            cell_longitude = (longitude + longitude_step * width + 180) % 360 - 180
+            cells.add(encode_geohash(cell_latitude, cell_longitude, precision))
+
+    return cells
+
+
+def get_cells_filter(cells: Iterable[str], field: str = "geohash") -> Q:
+    """Return filter of locations inside cells, which uses the geohash index."""
+    cells_filter = Q()
+    for cell in sorted(cells):
+        cells_filter |= Q(**{f"{field}__gte": cell, f"{field}__lt": cell + GEOHASH_END})
+    return cells_filter
+
+
+def haversine(latitude: float, longitude: float,
+              other_latitude: float, other_longitude: float) -> float:
+    """Return great-circle distance between two points in kilometres."""
+    latitude, longitude, other_latitude, other_longitude = map(
+        math.radians, map(float, (latitude, longitude, other_latitude, other_longitude)),
+    )
+    latitude_term = math.sin((other_latitude - latitude) / 2) ** 2
+    longitude_term = math.sin((other_longitude - longitude) / 2) ** 2
+    chord = latitude_term + math.cos(latitude) * math.cos(other_latitude) * longitude_term
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1, math.sqrt(chord)))
+
+
+def get_distance_expression(latitude: float, longitude: float, prefix: str = ""):
+    """Return database expression of haversine distance to the point in kilometres.
+
+    Args:
+        latitude: latitude of the point
+        longitude: longitude of the point
+        prefix: lookup of the location, e.g. "location__"
+    """
+    row_latitude = Radians(Cast(f"{prefix}latitude", FloatField()))
+    row_longitude = Radians(Cast(f"{prefix}longitude", FloatField()))
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+
+    latitude_term = Power(Sin((row_latitude - latitude) / 2), 2)
+    longitude_term = Power(Sin((row_longitude - longitude) / 2), 2)
+    chord = latitude_term + Cos(row_latitude) * math.cos(latitude) * longitude_term
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(chord))
+
+
+def filter_nearest(queryset, latitude: float, longitude: float, radius_km: float,
+                   prefix: str = ""):
+    """Return objects within the radius ordered by distance.
+
+    Objects are annotated with the distance in kilometres. Locations
+    without coordinates, e.g. waiting for geocoding, are skipped.
+
+    Args:
+        queryset: queryset of locations or objects related to them
+        latitude: latitude of the point
+        longitude: longitude of the point
+        radius_km: search radius in kilometres
+        prefix: lookup of the location, e.g. "location__"
+    """
+    queryset = queryset.filter(**{
+        f"{prefix}latitude__isnull": False,
+        f"{prefix}longitude__isnull": False,
+    })
+    cells = get_search_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        queryset = queryset.filter(get_cells_filter(cells, f"{prefix}geohash"))
+
+    return queryset.annotate(
+        distance=get_distance_expression(latitude, longitude, prefix),
+    ).filter(distance__lte=radius_km).order_by("distance", "pk")
+
+
+def to_vector(latitude: float, longitude: float) -> Tuple[float, float, float]:
+    """Return point of the unit sphere for coordinates."""
+    latitude, longitude = math.radians(float(latitude)), math.radians(float(longitude))
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+class LocationTree:
+    """KD-tree of locations for in-process nearest neighbours search.
+
+    Locations are stored as points of the unit sphere, where the chord
+    between points grows with the great-circle distance, so the nearest
+    points by chord are the nearest locations.
+    """
+
+    def __init__(self, locations: Iterable[tuple]):
+        """Build the tree.
+
+        Args:
+            locations: (id, latitude, longitude) of every location
+        """
+        points = [(to_vector(latitude, longitude), pk) for pk, latitude, longitude in locations]
+        self.size = len(points)
+        self.root = self.build(points, 0)
+
+    @classmethod
+    def build(cls, points: list, axis: int) -> Optional[tuple]:
+        """Return node (point, id, axis, left node, right node) of the subtree."""
+        if not points:
+            return None
+
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        next_axis = (axis + 1) % 3
+        return (
+            *points[middle],
+            axis,
+            cls.build(points[:middle], next_axis),
+            cls.build(points[middle + 1:], next_axis),
+        )
+
+    def nearest(self, latitude: float, longitude: float, radius_km: float,
+                limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return locations within the radius ordered by distance.
+
+        Returns:
+            locations (list): (id, distance in kilometres) of found locations
+        """
+        target = to_vector(latitude, longitude)
+        max_chord = 2 * math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2)
+        found = []  # heap of (-chord, id), the farthest found location is first
+        nodes = [self.root]
+
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+
+            point, pk, axis, left, right = node
+            bound = max_chord if limit is None or len(found) < limit else -found[0][0]
+            chord = math.dist(point, target)
+            if chord <= bound:
+                heapq.heappush(found, (-chord, pk))
+                if limit is not None and len(found) > limit:
+                    heapq.heappop(found)
+                bound = max_chord if limit is None or len(found) < limit else -found[0][0]
+
+            difference = target[axis] - point[axis]
+            near, far = (left, right) if difference < 0 else (right, left)
+            if abs(difference) <= bound:
+                nodes.append(far)
+            nodes.append(near)
+
+        return [
+            (pk, 2 * EARTH_RADIUS_KM * math.asin(min(1, chord / 2)))
+            for chord, pk in sorted((-chord, pk) for chord, pk in found)
+        ]
+
+
+class LocationTreeCache(VersionedCache):
+    """Class for caching the tree of business locations in the process.
+
+    The tree is rebuilt when the version counter in the shared cache is
+    bumped, so every process drops its tree after locations are changed.
+    """
+
+    version_prefix = "location-tree:version"
+    _tree = None
+    _version = None
+    _lock = Lock()
+
+    @classmethod
+    def get_tree(cls, load_locations) -> LocationTree:
+        """Return the tree, building it from load_locations() when it is stale."""
+        version = cls.get_version()
+        with cls._lock:
+            if cls._tree is None or cls._version != version:
+                cls._tree = LocationTree(load_locations())
+                cls._version = version
+            return cls._tree
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Make trees of all processes stale."""
+        cls.bump_version()
@@ -0,0 +1,35 @@
+"""This module provides a custom command 'availability_cache_stats'."""
+
+from django.core.management.base import BaseCommand
+
+from beauty.utils import AvailabilityCache
+
+
+class Command(BaseCommand):
+    """This class represents a 'availability_cache_stats' custom command.
+
+    Command shows amounts of hits and misses of the availability cache,
+    which are used for sizing the cache.
+    """
+
+    help = "Shows hit and miss rates of the availability cache."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Resets counters after showing them",
+        )
+
+    def handle(self, *args, **options):
+        """This method prints cache stats."""
+        stats = AvailabilityCache.get_stats()
+        self.stdout.write(
+            f"Hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit rate: {stats['hit_rate']:.2%}",
+        )
+
+        if options["reset"]:
+            AvailabilityCache.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters were reset"))
@@ -0,0 +1,38 @@
+"""This module provides a custom command 'backfill_order_business'."""
+
+from django.core.management.base import BaseCommand
+
+from api.models import Order, Service
+
+
+class Command(BaseCommand):
+    """This class represents a 'backfill_order_business' custom command.
+
+    Command copies business of the services to their orders. It is used to
+    fill Order.business of existing orders and to repair it after services
+    or positions were changed bypassing save().
+    """
+
+    help = "Fills denormalised business of orders."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Amount of services which orders are updated with one query",
+        )
+
+    def handle(self, *args, **options):
+        """This method updates orders of services in batches."""
+        service_ids = list(Service.objects.order_by("pk").values_list("pk", flat=True))
+        batch_size = options["batch_size"]
+
+        updated = 0
+        for start in range(0, len(service_ids), batch_size):
+            updated += Order.objects.sync_business(
+                Service.objects.filter(pk__in=service_ids[start:start + batch_size]),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Updated business of {updated} orders"))
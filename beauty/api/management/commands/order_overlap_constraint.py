@@ -0,0 +1,50 @@
+"""This module provides a custom command 'order_overlap_constraint'."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.booking import OVERLAP_CONSTRAINT
+from api.models import Order
+
+
+class Command(BaseCommand):
+    """This class represents a 'order_overlap_constraint' custom command.
+
+    Command adds a PostgreSQL exclusion constraint which forbids
+    overlapping active or approved orders of the same specialist, so
+    overlapping orders can't be saved even bypassing the booking lock.
+    """
+
+    help = "Adds PostgreSQL constraint against overlapping orders."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drops the constraint instead of adding it",
+        )
+
+    def handle(self, *args, **options):
+        """This method adds or drops the constraint."""
+        if connection.vendor != "postgresql":
+            raise CommandError("Exclusion constraints are supported by PostgreSQL only")
+
+        table = connection.ops.quote_name(Order._meta.db_table)
+        constraint = connection.ops.quote_name(OVERLAP_CONSTRAINT)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {constraint}")
+
+            if not options["drop"]:
+                busy_statuses = ", ".join(str(int(status)) for status in Order.BUSY_STATUSES)
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {constraint} "
+                    f"EXCLUDE USING gist ("
+                    f"specialist_id WITH =, tstzrange(start_time, end_time) WITH &&"
+                    f") WHERE (status IN ({busy_statuses}))",
+                )
+
+        action = "dropped" if options["drop"] else "added"
+        self.stdout.write(self.style.SUCCESS(f"Constraint {OVERLAP_CONSTRAINT} was {action}"))
@@ -0,0 +1,131 @@
+"""This module provides a custom command 'order_query_plans'."""
+
+import random
+from datetime import timedelta
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import localtime
+
+from api.models import Order
+from api.views.schedule import get_orders_for_date_range, get_orders_for_specific_date
+
+
+class Command(BaseCommand):
+    """This class represents a 'order_query_plans' custom command.
+
+    Command shows EXPLAIN plans and timings of the hot queries on orders
+    before and after the indexes declared on Order. Indexes are dropped for
+    the first run inside of a transaction which is rolled back, so the
+    database is left as it was. Synthetic orders copied from existing ones
+    may be added for the run to benchmark a populated database.
+    """
+
+    help = "Shows query plans and timings of order queries with and without indexes."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--orders",
+            type=int,
+            default=0,
+            help="Amount of synthetic orders added for the run",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Amount of runs of every query",
+        )
+
+    def handle(self, *args, **options):
+        """This method prints plans and timings of every query."""
+        sample = Order.objects.select_related(
+            "business", "specialist", "customer",
+        ).order_by("-start_time").first()
+        if sample is None:
+            raise CommandError("No orders to benchmark, populate the database first")
+
+        with transaction.atomic():
+            if options["orders"]:
+                self.add_orders(options["orders"])
+
+            with transaction.atomic():
+                self.drop_indexes()
+                before = self.run_queries(sample, options["repeat"])
+                transaction.set_rollback(True)
+
+            after = self.run_queries(sample, options["repeat"])
+            transaction.set_rollback(True)
+
+        for name, (plan, elapsed) in before.items():
+            new_plan, new_elapsed = after[name]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(f"Before: {elapsed:.3f} ms\n{plan}")
+            self.stdout.write(f"After: {new_elapsed:.3f} ms\n{new_plan}\n")
+
+    def add_orders(self, amount):
+        """Insert synthetic copies of existing orders shifted by random days."""
+        orders = list(Order.objects.only(
+            "service", "business", "specialist", "customer", "status", "start_time", "end_time",
+        ))
+        copies = []
+        for _ in range(amount):
+            order = random.choice(orders)
+            shift = timedelta(days=random.randint(-365, 365))
+            copies.append(Order(
+                service_id=order.service_id,
+                business_id=order.business_id,
+                specialist_id=order.specialist_id,
+                customer_id=order.customer_id,
+                status=random.choice(Order.StatusChoices.values),
+                start_time=order.start_time + shift,
+                end_time=order.end_time + shift,
+            ))
+        Order.objects.bulk_create(copies, batch_size=1000)
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def drop_indexes(self):
+        """Drop indexes declared on Order in the current transaction."""
+        schema_editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for index in Order._meta.indexes:
+                cursor.execute(str(index.remove_sql(Order, schema_editor)))
+
+    def get_queries(self, order):
+        """Return hot querysets on orders with parameters of the given order."""
+        business = order.business
+        day = localtime(order.start_time).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        return {
+            "Orders of a specialist for a day": get_orders_for_specific_date(
+                order.specialist, day,
+            ),
+            "Orders of specialists for a week": get_orders_for_date_range(
+                [order.specialist_id], day.date(), day.date() + timedelta(days=6),
+            ),
+            "Overlapping orders": Order.objects.overlapping(
+                order.specialist, order.start_time, order.end_time,
+            ),
+            "Busy orders of a business": business.orders.filter(
+                status__in=Order.BUSY_STATUSES,
+            ),
+            "Orders of a customer": order.customer.customer_orders.order_by("-start_time"),
+            "Orders of a specialist": order.specialist.specialist_orders.order_by("-start_time"),
+            "Orders of a business from a date": business.get_orders_by_date(day.date()),
+        }
+
+    def run_queries(self, order, repeat):
+        """Return plan and average time in milliseconds of every query."""
+        results = {}
+        for name, queryset in self.get_queries(order).items():
+            started = perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed = (perf_counter() - started) / repeat * 1000
+
+            results[name] = queryset.explain(), elapsed
+        return results
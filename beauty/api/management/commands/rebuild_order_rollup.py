@@ -0,0 +1,66 @@
+"""This module provides a custom command 'rebuild_order_rollup'."""
+
+import pytz
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+
+from api.models import Order, OrderRollup, Service
+from beauty.settings import TIME_ZONE
+
+
+CET = pytz.timezone(TIME_ZONE)
+
+
+class Command(BaseCommand):
+    """This class represents a 'rebuild_order_rollup' custom command.
+
+    Command recalculates daily order rollups from the Order table. It is
+    used to fill rollups for existing orders and to repair them after
+    orders were changed bypassing Order.save(). Orders booked before prices
+    were stored get current prices of their services.
+    """
+
+    help = "Rebuilds daily order rollups used by business statistic."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--business",
+            type=int,
+            help="Rebuilds rollups of the business with given id only",
+        )
+
+    def handle(self, *args, **options):
+        """This method rebuilds rollups with one grouped query."""
+        orders = Order.objects.all()
+        rollups = OrderRollup.objects.all()
+        if options["business"]:
+            orders = orders.filter(business_id=options["business"])
+            rollups = rollups.filter(business_id=options["business"])
+
+        orders.filter(price=None).update(price=Subquery(
+            Service.objects.filter(pk=OuterRef("service_id")).values("price")[:1],
+        ))
+
+        rows = orders.order_by().values(
+            "business_id", "specialist_id", "service_id", "status",
+            day=TruncDate("start_time", tzinfo=CET),
+        ).annotate(
+            count=Count("id"),
+            revenue=Sum("price"),
+        )
+
+        with transaction.atomic():
+            business_ids = set(rollups.values_list("business_id", flat=True))
+            rollups.delete()
+            created = OrderRollup.objects.bulk_create(
+                OrderRollup(**row) for row in rows
+            )
+
+            business_ids.update(rollup.business_id for rollup in created)
+            for business_id in business_ids:
+                OrderRollup.objects.invalidate_statistic(business_id)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(created)} order rollups"))
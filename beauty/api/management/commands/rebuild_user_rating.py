@@ -0,0 +1,55 @@
+"""This module provides a custom command 'rebuild_user_rating'."""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from api.models import CustomUser, Review
+
+
+class Command(BaseCommand):
+    """This class represents a 'rebuild_user_rating' custom command.
+
+    Command recalculates review amounts and ratings of users from the Review
+    table. It is used to fill the aggregates for existing reviews and to
+    repair them after reviews were changed bypassing Review.save(). Only
+    users whose aggregates differ from their reviews are updated.
+    """
+
+    help = "Rebuilds review amounts and average ratings of users."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Amount of users updated with one query",
+        )
+
+    def handle(self, *args, **options):
+        """This method updates aggregates of stale users in batches."""
+        reviews = Review.objects.filter(to_user=OuterRef("pk")).order_by().values("to_user")
+        review_count = Coalesce(Subquery(reviews.annotate(count=Count("id")).values("count")), 0)
+        rating_sum = Coalesce(Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0)
+        rating_avg = Coalesce(Subquery(reviews.annotate(avg=Avg("rating")).values("avg")), 0.0)
+
+        user_ids = list(
+            CustomUser.objects.annotate(
+                actual_count=review_count,
+                actual_sum=rating_sum,
+            ).exclude(
+                review_count=F("actual_count"),
+                rating_sum=F("actual_sum"),
+            ).order_by("pk").values_list("pk", flat=True),
+        )
+        batch_size = options["batch_size"]
+
+        for start in range(0, len(user_ids), batch_size):
+            CustomUser.objects.filter(pk__in=user_ids[start:start + batch_size]).update(
+                review_count=review_count,
+                rating_sum=rating_sum,
+                rating_avg=rating_avg,
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating of {len(user_ids)} users"))
@@ -0,0 +1,44 @@
+"""This module provides a custom command 'update_location_geohash'."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.geo import LocationTreeCache
+from api.models import Location
+
+
+class Command(BaseCommand):
+    """This class represents a 'update_location_geohash' custom command.
+
+    Command recalculates geohashes used by the nearest businesses search.
+    It is used to fill geohashes of existing locations and to repair them
+    after coordinates were changed bypassing Location.save().
+    """
+
+    help = "Recalculates geohashes of locations."   # noqa
+
+    def add_arguments(self, parser):
+        """This method adds optional arguments to the command."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Amount of locations updated with one query",
+        )
+
+    def handle(self, *args, **options):
+        """This method updates geohashes of locations in batches."""
+        locations = Location.objects.only("latitude", "longitude", "geohash").order_by("pk")
+        changed = []
+
+        for location in locations.iterator(chunk_size=options["batch_size"]):
+            geohash = location.geohash
+            location.update_geohash()
+            if location.geohash != geohash:
+                changed.append(location)
+
+        with transaction.atomic():
+            Location.objects.bulk_update(changed, ["geohash"], batch_size=options["batch_size"])
+
+        LocationTreeCache.invalidate()
+        self.stdout.write(self.style.SUCCESS(f"Updated geohashes of {len(changed)} locations"))
@@ -0,0 +1,284 @@
+# Generated by Django 4.0.4 on 2026-10-17 06:40
+
+import api.models
+import beauty.utils
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import phonenumber_field.modelfields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('password', models.CharField(max_length=128, verbose_name='password')),
+                ('last_login', models.DateTimeField(blank=True, null=True, verbose_name='last login')),
+                ('is_superuser', models.BooleanField(default=False, help_text='Designates that this user has all permissions without explicitly assigning them.', verbose_name='superuser status')),
+                ('first_name', models.CharField(max_length=20)),
+                ('last_name', models.CharField(blank=True, max_length=20)),
+                ('patronymic', models.CharField(blank=True, max_length=20)),
+                ('email', models.EmailField(max_length=100, unique=True, validators=[django.core.validators.EmailValidator()])),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bio', models.TextField(blank=True, max_length=255, null=True)),
+                ('phone_number', phonenumber_field.modelfields.PhoneNumberField(max_length=128, region=None, unique=True)),
+                ('rating', models.IntegerField(blank=True, default=0)),
+                ('review_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('rating_sum', models.IntegerField(default=0, editable=False)),
+                ('rating_avg', models.FloatField(default=0, editable=False)),
+                ('avatar', models.ImageField(blank=True, default='default_avatar.jpeg', upload_to=beauty.utils.ModelsUtils.upload_location)),
+                ('is_active', models.BooleanField(default=False)),
+                ('is_admin', models.BooleanField(default=False)),
+                ('groups', models.ManyToManyField(blank=True, help_text='The groups this user belongs to. A user will get all permissions granted to each of their groups.', related_name='user_set', related_query_name='user', to='auth.group', verbose_name='groups')),
+                ('user_permissions', models.ManyToManyField(blank=True, help_text='Specific permissions for this user.', related_name='user_set', related_query_name='user', to='auth.permission', verbose_name='user permissions')),
+            ],
+            options={
+                'verbose_name': 'User',
+                'verbose_name_plural': 'Users',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Business',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20, verbose_name='Name')),
+                ('business_type', models.CharField(max_length=100, verbose_name='Type')),
+                ('logo', models.ImageField(blank=True, upload_to=beauty.utils.ModelsUtils.upload_location)),
+                ('description', models.CharField(max_length=255, verbose_name='Description')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('working_time', models.JSONField(blank=True, default=dict, null=True, validators=[beauty.utils.validate_working_time_json])),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Business',
+                'verbose_name_plural': 'Businesses',
+                'ordering': ['business_type'],
+            },
+            bases=(api.models.WorkingTimeMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='Key')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Result')),
+                ('expires_at', models.DateTimeField(verbose_name='Expires at')),
+            ],
+            options={
+                'verbose_name': 'Geocode cache',
+                'verbose_name_plural': 'Geocode cache',
+            },
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(blank=True, max_length=100, verbose_name='Address')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+                ('geohash', models.CharField(blank=True, db_index=True, editable=False, max_length=12, verbose_name='Geohash')),
+                ('geocode_status', models.IntegerField(choices=[(0, 'Ready'), (1, 'Pending'), (2, 'Not found')], db_index=True, default=0, verbose_name='Geocode status')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.JSONField(verbose_name='Message')),
+                ('recipients', models.CharField(max_length=255, verbose_name='Recipients')),
+                ('status', models.IntegerField(choices=[(0, 'Queued'), (1, 'Sending'), (2, 'Sent'), (3, 'Failed')], db_index=True, default=0, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Sent at')),
+            ],
+            options={
+                'verbose_name': 'Outgoing email',
+                'verbose_name_plural': 'Outgoing emails',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=40, verbose_name='Name')),
+                ('working_time', models.JSONField(blank=True, default=dict, null=True, validators=[beauty.utils.validate_working_time_json])),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.business', verbose_name='Business')),
+                ('specialist', models.ManyToManyField(blank=True, to=settings.AUTH_USER_MODEL, verbose_name='Specialist')),
+            ],
+            options={
+                'verbose_name': 'Position',
+                'verbose_name_plural': 'Positions',
+                'ordering': ['name'],
+            },
+            bases=(api.models.WorkingTimeMixin, models.Model),
+        ),
+        migrations.CreateModel(
+            name='WorkingTimeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('working_time', models.JSONField(verbose_name='Working time')),
+                ('status', models.IntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], default=0, verbose_name='Status')),
+                ('orders_cancelled', models.PositiveIntegerField(default=0, verbose_name='Cancelled orders')),
+                ('emails_sent', models.PositiveIntegerField(default=0, verbose_name='Sent emails')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_time_jobs', to='api.business', verbose_name='Business')),
+                ('position', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='working_time_jobs', to='api.position', verbose_name='Position')),
+            ],
+            options={
+                'verbose_name': 'Working time job',
+                'verbose_name_plural': 'Working time jobs',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Service',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Service name')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=5, verbose_name='Service price')),
+                ('description', models.CharField(blank=True, max_length=250, verbose_name='Service description')),
+                ('duration', models.DurationField(validators=[beauty.utils.validate_rounded_minutes_seconds], verbose_name='Service duration')),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.position', verbose_name='Position')),
+            ],
+            options={
+                'verbose_name': 'Service',
+                'verbose_name_plural': 'Services',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_body', models.CharField(max_length=500, verbose_name='Review text')),
+                ('rating', models.IntegerField(validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(5)], verbose_name='Review rating')),
+                ('date_of_publication', models.DateTimeField(auto_now_add=True, verbose_name='Time of review publication')),
+                ('from_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='customer_reviews', to=settings.AUTH_USER_MODEL)),
+                ('to_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='specialist_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Review',
+                'verbose_name_plural': 'Reviews',
+                'ordering': ['date_of_publication'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('status', models.IntegerField(choices=[(0, 'Active'), (1, 'Completed'), (2, 'Cancelled'), (3, 'Approved'), (4, 'Declined')], verbose_name='Status')),
+                ('count', models.IntegerField(default=0, verbose_name='Amount of orders')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Revenue')),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_rollups', to='api.business', verbose_name='Business')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.service', verbose_name='Service')),
+                ('specialist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='specialist_order_rollups', to=settings.AUTH_USER_MODEL, verbose_name='Specialist')),
+            ],
+            options={
+                'verbose_name': 'Order rollup',
+                'verbose_name_plural': 'Order rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.IntegerField(choices=[(0, 'Active'), (1, 'Completed'), (2, 'Cancelled'), (3, 'Approved'), (4, 'Declined')], default=0, verbose_name='Current status')),
+                ('start_time', models.DateTimeField(validators=[beauty.utils.validate_rounded_minutes_seconds], verbose_name='Appointment time')),
+                ('end_time', models.DateTimeField(editable=False, validators=[beauty.utils.validate_rounded_minutes_seconds], verbose_name='End time')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Created at')),
+                ('update_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('price', models.DecimalField(decimal_places=2, editable=False, max_digits=5, null=True, verbose_name='Price')),
+                ('reason', models.TextField(blank=True, max_length=300, null=True, verbose_name='Reason for cancellation')),
+                ('token', models.CharField(editable=False, max_length=64, null=True)),
+                ('note', models.TextField(blank=True, max_length=300, null=True, verbose_name='Additional note')),
+                ('business', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='api.business', verbose_name='Business')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_orders', to=settings.AUTH_USER_MODEL, verbose_name='Customer')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.service', verbose_name='Service')),
+                ('specialist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='specialist_orders', to=settings.AUTH_USER_MODEL, verbose_name='Specialist')),
+            ],
+            options={
+                'ordering': ['id'],
+                'permissions': [('can_add_order', 'Can add an order'), ('can_change_order', 'Can change an order'), ('can_set_status', 'Can set a status of the order'), ('can_view_order', 'Can view an order')],
+                'get_latest_by': 'created_at',
+            },
+        ),
+        migrations.CreateModel(
+            name='Invitation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Created at')),
+                ('email', models.EmailField(max_length=100)),
+                ('token', models.CharField(editable=False, max_length=64, null=True)),
+                ('position', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.position', verbose_name='Position')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='location',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='businesses', to='api.location', verbose_name='Location'),
+        ),
+        migrations.AddField(
+            model_name='business',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='businesses', to=settings.AUTH_USER_MODEL, verbose_name='Owner'),
+        ),
+        migrations.AddIndex(
+            model_name='orderrollup',
+            index=models.Index(fields=['business', 'day'], name='api_orderro_busines_781769_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='orderrollup',
+            unique_together={('business', 'specialist', 'service', 'day', 'status')},
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['service', 'start_time'], name='api_order_service_cbc51c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', [0, 3])), fields=['specialist', 'start_time', 'end_time', 'service'], name='order_busy_specialist_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['business', 'status'], name='order_business_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['business', 'start_time'], name='order_business_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'start_time'], name='order_customer_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['specialist', 'start_time'], name='order_specialist_start_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='invitation',
+            unique_together={('email', 'position')},
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['rating_avg', 'id'], name='user_rating_idx'),
+        ),
+    ]
@@ -5,11 +5,20 @@ from django.contrib.auth.base_user import (AbstractBaseUser, BaseUserManager)
 from django.contrib.auth.models import PermissionsMixin
 from django.core.validators import (validate_email, MinValueValidator, MaxValueValidator)
 from phonenumber_field.modelfields import PhoneNumberField
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from django.utils.translation import gettext as _
-from beauty.utils import (ModelsUtils, validate_rounded_minutes_seconds,
-                          validate_working_time_json)
+from api.geo import GEOHASH_PRECISION, encode_geohash
+from beauty.availability import compile_working_time
+from beauty.tokens import OrderApprovingTokenGenerator, SpecialistInviteTokenGenerator
+from beauty.utils import (AvailabilityCache, ModelsUtils, StatisticCache,
+                          validate_rounded_minutes_seconds, validate_working_time_json)
+from collections import defaultdict
+from copy import deepcopy
 from datetime import datetime
+from functools import partial
 import pytz
 from beauty.settings import TIME_ZONE
 
@@ -66,6 +75,39 @@ class MyUserManager(BaseUserManager):
 
         return user
 
+    def move_rating(self, old_fields, new_fields):
+        """Move one review from the rating of the old receiver to the new one.
+
+        Args:
+            old_fields (dict): rating fields of the review before saving or None
+            new_fields (dict): rating fields of the review after saving or None
+        """
+        totals = defaultdict(lambda: [0, 0])
+        for fields, sign in ((old_fields, -1), (new_fields, 1)):
+            if fields and fields["to_user_id"]:
+                total = totals[fields["to_user_id"]]
+                total[0] += sign
+                total[1] += sign * fields["rating"]
+
+        for user_id, (count, rating_sum) in totals.items():
+            if count or rating_sum:
+                self.add_rating(user_id, count, rating_sum)
+
+    def add_rating(self, user_id, count, rating_sum):
+        """Add amount and sum of ratings of reviews to the user aggregate.
+
+        Columns are changed with F expressions in one UPDATE, so concurrent
+        reviews do not overwrite each other. Average is calculated from the
+        values before the update, which are read by the right-hand side.
+        """
+        review_count = F("review_count") + count
+        total = F("rating_sum") + rating_sum
+        self.filter(pk=user_id).update(
+            review_count=review_count,
+            rating_sum=total,
+            rating_avg=Coalesce(Cast(total, FloatField()) / NullIf(review_count, 0), 0.0),
+        )
+
 
 class CustomUser(PermissionsMixin, AbstractBaseUser):
     """This class represents a custom User model.
@@ -83,6 +125,9 @@ class CustomUser(PermissionsMixin, AbstractBaseUser):
         bio (str, optional): Additional information about user
         phone_number (str): Phone number of the user
         rating (int): Rating of the user (specialist group only)
+        review_count (int): Amount of reviews received by the user
+        rating_sum (int): Sum of ratings of reviews received by the user
+        rating_avg (float): Average rating of reviews received by the user
         avatar (image, optional): Avatar of the user
         is_active (bool): Determines whether user account is active
         is_admin (bool): Determines whether user is admin
@@ -129,6 +174,18 @@ class CustomUser(PermissionsMixin, AbstractBaseUser):
         blank=True,
         default=0,
     )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+    )
+    rating_sum = models.IntegerField(
+        default=0,
+        editable=False,
+    )
+    rating_avg = models.FloatField(
+        default=0,
+        editable=False,
+    )
     avatar = models.ImageField(
         blank=True,
         default="default_avatar.jpeg",
@@ -151,26 +208,55 @@ class CustomUser(PermissionsMixin, AbstractBaseUser):
         ordering = ["id"]
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(fields=["rating_avg", "id"], name="user_rating_idx"),
+        ]
 
     @property
     def is_staff(self):
         """Determines whether user is admin."""
         return self.is_admin
 
+    @property
+    def roles(self):
+        """Names of the user groups.
+
+        Names are loaded with one query per instance or taken from prefetched
+        groups. They are reset after groups of the instance are changed.
+        """
+        roles = self.__dict__.get("_roles")
+        if roles is None:
+            prefetched_groups = getattr(self, "_prefetched_objects_cache", {}).get("groups")
+            if prefetched_groups is not None:
+                roles = frozenset(group.name for group in prefetched_groups)
+            else:
+                roles = frozenset(self.groups.values_list("name", flat=True))
+            self._roles = roles
+        return roles
+
+    def reset_roles(self):
+        """Forget loaded roles, so they are loaded again on the next check."""
+        self.__dict__.pop("_roles", None)
+
+    def refresh_from_db(self, *args, **kwargs):
+        """Reload field values and forget loaded roles."""
+        super().refresh_from_db(*args, **kwargs)
+        self.reset_roles()
+
     @property
     def is_specialist(self):
         """Determines whether user is specialist."""
-        return self.groups.filter(name="Specialist").exists()
+        return "Specialist" in self.roles
 
     @property
     def is_customer(self):
         """Determines whether user is customer."""
-        return self.groups.filter(name="Customer").exists()
+        return "Customer" in self.roles
 
     @property
     def is_owner(self):
         """Determines whether user is an owner."""
-        return self.groups.filter(name="Owner").exists()
+        return "Owner" in self.roles
 
     @property
     def specialist_exist_orders(self):
@@ -202,8 +288,17 @@ class Location(models.Model):
         address (str): Address of business
         latitude (float): Latitude coordinate of business
         longitude (float): Longitude coordinate of business
+        geohash (str): Geohash of coordinates used for proximity search
+        geocode_status (int): Whether coordinates are known or wait for geocoding
     """
 
+    class GeocodeStatusChoices(models.IntegerChoices):
+        """This class is used for geocoding states of coordinates."""
+
+        READY = 0, _("Ready")
+        PENDING = 1, _("Pending")
+        NOT_FOUND = 2, _("Not found")
+
     address = models.CharField(
         verbose_name=_("Address"),
         max_length=100,
@@ -214,20 +309,206 @@ class Location(models.Model):
         max_digits=9,
         decimal_places=6,
         blank=True,
+        null=True,
     )
     longitude = models.DecimalField(
         verbose_name=_("Longitude"),
         max_digits=9,
         decimal_places=6,
         blank=True,
+        null=True,
+    )
+    geohash = models.CharField(
+        verbose_name=_("Geohash"),
+        max_length=GEOHASH_PRECISION,
+        blank=True,
+        db_index=True,
+        editable=False,
+    )
+    geocode_status = models.IntegerField(
+        verbose_name=_("Geocode status"),
+        choices=GeocodeStatusChoices.choices,
+        default=GeocodeStatusChoices.READY,
+        db_index=True,
     )
 
     def __str__(self):
         """str: Returns a verbose address of the business."""
         return self.address
 
+    @staticmethod
+    def are_valid_coordinates(latitude, longitude) -> bool:
+        """Return True if coordinates are set and within their ranges."""
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            return False
+        is_in_range = -90 <= latitude <= 90 and -180 <= longitude <= 180
+        return is_in_range and (latitude, longitude) != (0, 0)
+
+    def set_coordinates(self, latitude, longitude) -> bool:
+        """Set valid coordinates or make the location wait for geocoding of its address.
+
+        Returns:
+            bool: True if the location waits for geocoding
+        """
+        if self.are_valid_coordinates(latitude, longitude):
+            self.latitude, self.longitude = latitude, longitude
+            self.geocode_status = self.GeocodeStatusChoices.READY
+        else:
+            self.latitude = self.longitude = None
+            self.geocode_status = self.GeocodeStatusChoices.PENDING
+        return self.geocode_status == self.GeocodeStatusChoices.PENDING
+
+    def update_geohash(self) -> None:
+        """Set geohash of current coordinates."""
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ""
+        else:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+
+    def save(self, *args, **kwargs):
+        """Reimplemented save method to keep geohash of coordinates actual."""
+        self.update_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
 
-class Business(models.Model):
+class GeocodeCache(models.Model):
+    """This class represents a cached result of geocoding.
+
+    Attributes:
+        key (str): Normalised address or rounded coordinates
+        result (json): Coordinates or address, null if nothing was found
+        expires_at (datetime): Time after which geocoding is requested again
+    """
+
+    key = models.CharField(
+        verbose_name=_("Key"),
+        max_length=255,
+        unique=True,
+    )
+    result = models.JSONField(
+        verbose_name=_("Result"),
+        blank=True,
+        null=True,
+    )
+    expires_at = models.DateTimeField(
+        verbose_name=_("Expires at"),
+    )
+
+    class Meta:
+        """This meta class stores verbose names."""
+
+        verbose_name = _("Geocode cache")
+        verbose_name_plural = _("Geocode cache")
+
+    def __str__(self) -> str:
+        """str: Returns the key of the result."""
+        return self.key
+
+
+class OutgoingEmail(models.Model):
+    """This class represents an email queued for delivery.
+
+    Attributes:
+        message (json): Serialized email message
+        recipients (str): Recipients of the message
+        status (int): Delivery status of the message
+        attempts (int): Amount of delivery attempts
+        error (str): Error of the last failed attempt
+        created_at (datetime): Time when the message was queued
+        updated_at (datetime): Time of the last status change
+        sent_at (datetime): Time when the message was delivered
+    """
+
+    class StatusChoices(models.IntegerChoices):
+        """This class is used for delivery statuses."""
+
+        QUEUED = 0, _("Queued")
+        SENDING = 1, _("Sending")
+        SENT = 2, _("Sent")
+        FAILED = 3, _("Failed")
+
+    message = models.JSONField(
+        verbose_name=_("Message"),
+    )
+    recipients = models.CharField(
+        verbose_name=_("Recipients"),
+        max_length=255,
+    )
+    status = models.IntegerField(
+        verbose_name=_("Status"),
+        choices=StatusChoices.choices,
+        default=StatusChoices.QUEUED,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name=_("Attempts"),
+        default=0,
+    )
+    error = models.TextField(
+        verbose_name=_("Error"),
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Created at"),
+        auto_now_add=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Updated at"),
+        auto_now=True,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name=_("Sent at"),
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        """This meta class stores ordering and verbose names."""
+
+        ordering = ["id"]
+        verbose_name = _("Outgoing email")
+        verbose_name_plural = _("Outgoing emails")
+
+    def __str__(self) -> str:
+        """str: Returns recipients and status of the email."""
+        return f"{self.recipients} ({self.get_status_display()})"
+
+
+class WorkingTimeMixin:
+    """Mixin for models with working time of every week day.
+
+    Working time is stored as {"Mon": ["09:00", "18:00"], ...} JSON, a day
+    with a break holds a list of intervals like [["09:00", "13:00"],
+    ["14:00", "18:00"]]. It is compiled once per instance into IntervalSet
+    of every week day, the compiled form is rebuilt when the JSON changes.
+    """
+
+    @property
+    def compiled_working_time(self) -> tuple:
+        """tuple: IntervalSet of 7 days from Monday, empty for days off."""
+        source, compiled = self.__dict__.get("_compiled_working_time", (None, None))
+        if source != self.working_time:
+            source = deepcopy(self.working_time)
+            compiled = compile_working_time(source)
+            self._compiled_working_time = source, compiled
+        return compiled
+
+    def get_working_day(self, day):
+        """Return IntervalSet of working time in minutes, empty for days off.
+
+        Args:
+            day (date or int): date or week day number starting from Monday
+        """
+        week_day = day if isinstance(day, int) else day.weekday()
+        return self.compiled_working_time[week_day]
+
+
+class Business(WorkingTimeMixin, models.Model):
     """This class represents a Business model.
 
     Attributes:
@@ -327,22 +608,21 @@ class Business(models.Model):
         return services
 
     def get_orders_by_date(self, date):
-        """Get orders of current business by month."""
-        specialists = self.get_all_specialists()
-        services = self.get_all_services()
-
+        """Get orders of current business starting from date."""
         date = datetime.combine(date, datetime.min.time())
         date = CET.localize(date)
 
-        orders = Order.objects.filter(
-            start_time__gte=date, specialist__in=specialists,
-            service__in=services,
-        )
+        return self.orders.filter(start_time__gte=date)
 
-        return orders
+    def get_order_rollups_by_date(self, date):
+        """Get daily order rollups of current business starting from date."""
+        if isinstance(date, datetime):
+            date = date.date()
 
+        return self.order_rollups.filter(day__gte=date)
 
-class Position(models.Model):
+
+class Position(WorkingTimeMixin, models.Model):
     """This class represents position in Business.
 
     Attributes:
@@ -376,6 +656,13 @@ class Position(models.Model):
         validators=(validate_working_time_json,),
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded business to update orders after the position is moved."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_business_id = instance.__dict__.get("business_id")
+        return instance
+
     def __str__(self):
         """str: Returns name of Position."""
         return self.name
@@ -429,6 +716,47 @@ class Review(models.Model):
         related_name="specialist_reviews",
     )
 
+    RATING_FIELDS = ("to_user_id", "rating")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded receiver and rating.
+
+        They are used to move the review between rating aggregates of users.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._rating_fields = instance.get_rating_fields()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        """Reload field values and forget the old rating fields."""
+        super().refresh_from_db(*args, **kwargs)
+        self._rating_fields = self.get_rating_fields()
+
+    def save(self, *args, **kwargs):
+        """Save the review and update rating aggregates of users in the same transaction."""
+        with transaction.atomic(savepoint=False):
+            old_fields = getattr(self, "_rating_fields", None)
+            if old_fields is None and not self._state.adding:
+                old_fields = Review.objects.filter(pk=self.pk).values(*self.RATING_FIELDS).first()
+
+            super().save(*args, **kwargs)
+
+            new_fields = self.get_rating_fields()
+            if old_fields != new_fields:
+                CustomUser.objects.move_rating(old_fields, new_fields)
+            self._rating_fields = new_fields
+
+    def get_rating_fields(self):
+        """Return values of the fields which define rating aggregate of the receiver.
+
+        None is returned for deferred fields.
+        """
+        if not set(self.RATING_FIELDS).issubset(self.__dict__):
+            return None
+
+        return {field: self.__dict__[field] for field in self.RATING_FIELDS}
+
     def __str__(self):
         """str: Returns a verbose title of the review."""
         return self.text_body
@@ -441,6 +769,138 @@ class Review(models.Model):
         verbose_name_plural = _("Reviews")
 
 
+class OrderManager(models.Manager):
+    """Manager with queries used for booking orders."""
+
+    def overlapping(self, specialist, start_time, end_time):
+        """Return orders of the specialist which take time between start and end.
+
+        Touching orders don't overlap.
+        """
+        return self.filter(
+            specialist=specialist,
+            status__in=self.model.BUSY_STATUSES,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+
+    def overlapping_many(self, orders):
+        """Return orders which take time of any of the given orders with one query."""
+        if not orders:
+            return self.none()
+
+        overlapping = Q()
+        for order in orders:
+            overlapping |= Q(
+                specialist_id=order.specialist_id,
+                start_time__lt=order.end_time,
+                end_time__gt=order.start_time,
+            )
+
+        return self.filter(overlapping, status__in=self.model.BUSY_STATUSES)
+
+    def create_many(self, orders):
+        """Insert new orders with one query.
+
+        bulk_create() doesn't call save() and doesn't send signals, so daily
+        rollups and cached free time are updated here for all orders at once.
+        Services of the orders should be loaded with their positions.
+
+        Args:
+            orders (list): unsaved Order instances
+
+        Returns:
+            list: saved orders
+        """
+        token_generator = OrderApprovingTokenGenerator()
+        for order in orders:
+            order.end_time = order.start_time + order.service.duration
+            order.business_id = order.service.position.business_id
+            order.price = order.service.price
+            order.token = token_generator.make_token(order)
+
+        with transaction.atomic():
+            self.bulk_create(orders)
+
+            for order in orders:
+                order._rollup_fields = order.get_rollup_fields()
+
+            OrderRollup.objects.add_orders(orders)
+
+            availability_keys = {
+                order.get_availability_key(order._rollup_fields) for order in orders
+            }
+            for availability_key in availability_keys - {None}:
+                transaction.on_commit(partial(AvailabilityCache.invalidate, *availability_key))
+
+        return orders
+
+    def cancel_many(self, orders, reason=None):
+        """Cancel busy orders with one query.
+
+        update() doesn't call save(), so daily rollups and cached free time
+        are updated here for all orders at once. Orders changed by somebody
+        else in the meantime are skipped. Services of the orders should be
+        loaded with their positions.
+
+        Args:
+            orders (list): saved Order instances
+            reason (str): reason for cancellation
+
+        Returns:
+            list: cancelled orders
+        """
+        with transaction.atomic():
+            order_ids = set(self.select_for_update().filter(
+                pk__in=[order.pk for order in orders],
+                status__in=self.model.BUSY_STATUSES,
+            ).values_list("pk", flat=True))
+            orders = [order for order in orders if order.pk in order_ids]
+
+            self.filter(pk__in=order_ids).update(
+                status=self.model.StatusChoices.CANCELLED,
+                reason=reason,
+                update_at=timezone.now(),
+            )
+
+            old_fields = []
+            for order in orders:
+                old_fields.append(order._rollup_fields)
+                order.status = self.model.StatusChoices.CANCELLED
+                order.reason = reason
+                order._rollup_fields = order.get_rollup_fields()
+
+            OrderRollup.objects.move_orders(orders, old_fields)
+
+            availability_keys = {
+                order.get_availability_key(fields) for order, fields in zip(orders, old_fields)
+            }
+            for availability_key in availability_keys - {None}:
+                transaction.on_commit(partial(AvailabilityCache.invalidate, *availability_key))
+
+        return orders
+
+    def sync_business(self, services):
+        """Copy business of the services to their orders with one query.
+
+        Denormalised Order.business becomes stale when a service or its
+        position is moved to another business, or for orders saved before
+        the field was added.
+
+        Args:
+            services (QuerySet): services which orders should be updated
+
+        Returns:
+            int: amount of updated orders
+        """
+        business_id = Subquery(
+            Service.objects.filter(pk=OuterRef("service_id")).values("position__business_id")[:1],
+        )
+        return self.filter(service__in=services).exclude(
+            business_id=business_id,
+        ).update(business_id=business_id)
+
+
 class Order(models.Model):
     """This class represents a basic Order (for an appointment system).
 
@@ -458,6 +918,10 @@ class Order(models.Model):
         specialist (CustomUser): An appointed specialist for the order
         customer (CustomUser): A customer who will receive the order
         service (Service): Service that will be fulfilled for the order
+        business (Business): Business of the service, copied to query orders
+            of a business without joins
+        price (decimal): Price of the service when the order was booked, it is
+            counted in daily order rollups
         reason (str, optional): Reason for cancellation
 
     Properties:
@@ -481,6 +945,20 @@ class Order(models.Model):
 
         ordering = ["id"]
         get_latest_by = "created_at"
+        indexes = [
+            models.Index(fields=["service", "start_time"]),
+            # Busy (ACTIVE and APPROVED) orders of a specialist by time, which
+            # are read by schedules and overlap checks without the table rows
+            models.Index(
+                fields=["specialist", "start_time", "end_time", "service"],
+                condition=Q(status__in=[0, 3]),
+                name="order_busy_specialist_idx",
+            ),
+            models.Index(fields=["business", "status"], name="order_business_status_idx"),
+            models.Index(fields=["business", "start_time"], name="order_business_start_idx"),
+            models.Index(fields=["customer", "start_time"], name="order_customer_start_idx"),
+            models.Index(fields=["specialist", "start_time"], name="order_specialist_start_idx"),
+        ]
         permissions = [
             ("can_add_order", "Can add an order"),
             ("can_change_order", "Can change an order"),
@@ -504,7 +982,8 @@ class Order(models.Model):
         validators=[validate_rounded_minutes_seconds],
     )
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name=_("Created at"),
     )
     update_at = models.DateTimeField(
@@ -528,6 +1007,21 @@ class Order(models.Model):
         on_delete=models.CASCADE,
         verbose_name=_("Service"),
     )
+    business = models.ForeignKey(
+        "Business",
+        related_name="orders",
+        on_delete=models.CASCADE,
+        null=True,
+        editable=False,
+        verbose_name=_("Business"),
+    )
+    price = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        verbose_name=_("Price"),
+    )
     reason = models.TextField(
         blank=True,
         null=True,
@@ -548,15 +1042,126 @@ class Order(models.Model):
         verbose_name=_("Additional note"),
     )
 
+    objects = OrderManager()
+
+    ROLLUP_FIELDS = ("specialist_id", "service_id", "start_time", "status", "price")
+    BUSY_STATUSES = (StatusChoices.ACTIVE, StatusChoices.APPROVED)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded values of the fields which define rollup row.
+
+        They are used to move the order between OrderRollup rows when its
+        status, start time, specialist or service is changed.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._rollup_fields = instance.get_rollup_fields()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        """Reload field values and forget the old rollup fields."""
+        super().refresh_from_db(*args, **kwargs)
+        self._rollup_fields = self.get_rollup_fields()
+
     def save(self, *args, **kwargs):
-        """Reimplemented save method for end_time calculation."""
+        """Reimplemented save method for end_time calculation.
+
+        Token of a new order is created before inserting it, business is
+        copied from the service and price is copied from the service when
+        the order is booked or its service is changed. Daily OrderRollup rows
+        are updated in the same transaction.
+        """
         self.end_time = self.start_time + self.service.duration
+        self.business_id = self.service.position.business_id
 
         logger.info(f"Added end time({self.end_time}) for order")
 
-        super(Order, self).save(*args, **kwargs)
+        if self._state.adding and not self.token:
+            self.token = OrderApprovingTokenGenerator().make_token(self)
+
+        with transaction.atomic():
+            old_fields = getattr(self, "_rollup_fields", None)
+            if old_fields is None and not self._state.adding:
+                old_fields = Order.objects.filter(pk=self.pk).values(*self.ROLLUP_FIELDS).first()
+
+            if old_fields is None or old_fields["service_id"] != self.service_id:
+                self.price = self.service.price
+
+            super(Order, self).save(*args, **kwargs)
+
+            self._rollup_fields = self.get_rollup_fields()
+            if old_fields != self._rollup_fields:
+                OrderRollup.objects.move(
+                    self.get_rollup_key(old_fields),
+                    self.get_rollup_key(self._rollup_fields),
+                    self.get_rollup_price(old_fields),
+                    self.get_rollup_price(self._rollup_fields),
+                )
+                self.invalidate_availability(old_fields, self._rollup_fields)
+
         return self
 
+    def get_rollup_fields(self):
+        """Return values of the fields which define OrderRollup row.
+
+        Returns None if some of these fields were not loaded.
+        """
+        if not set(self.ROLLUP_FIELDS).issubset(self.__dict__):
+            return None
+
+        return {field: self.__dict__[field] for field in self.ROLLUP_FIELDS}
+
+    def get_rollup_price(self, rollup_fields):
+        """Return price counted in the OrderRollup row for the given field values.
+
+        Orders booked before prices were stored are counted with the current
+        service price.
+        """
+        if not rollup_fields:
+            return None
+        if rollup_fields["price"] is not None:
+            return rollup_fields["price"]
+        return self.service.price
+
+    def get_rollup_key(self, rollup_fields):
+        """Return lookup of the OrderRollup row for the given field values."""
+        if not rollup_fields:
+            return None
+
+        if rollup_fields["service_id"] == self.service_id:
+            business_id = self.business_id
+        else:
+            business_id = Service.objects.filter(
+                pk=rollup_fields["service_id"],
+            ).values_list("position__business_id", flat=True).first()
+
+        return {
+            "business_id": business_id,
+            "specialist_id": rollup_fields["specialist_id"],
+            "service_id": rollup_fields["service_id"],
+            "day": timezone.localtime(rollup_fields["start_time"], CET).date(),
+            "status": rollup_fields["status"],
+        }
+
+    def get_availability_key(self, rollup_fields):
+        """Return (specialist id, day) of the time taken by the order.
+
+        Returns None if the order with given field values doesn't take time.
+        """
+        if not rollup_fields or rollup_fields["status"] not in self.BUSY_STATUSES:
+            return None
+
+        return (
+            rollup_fields["specialist_id"],
+            timezone.localtime(rollup_fields["start_time"], CET).date(),
+        )
+
+    def invalidate_availability(self, *rollup_fields):
+        """Make cached free time of the order days stale after commit."""
+        availability_keys = {self.get_availability_key(fields) for fields in rollup_fields}
+        for availability_key in availability_keys - {None}:
+            transaction.on_commit(partial(AvailabilityCache.invalidate, *availability_key))
+
     @property
     def is_active(self) -> bool:
         """bool: Returns true if order"s status is active."""
@@ -647,6 +1252,13 @@ class Service(models.Model):
         validators=[validate_rounded_minutes_seconds],
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember loaded position to update orders after the service is moved."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_position_id = instance.__dict__.get("position_id")
+        return instance
+
     def __str__(self):
         """str: Returns a verbose name of the service."""
         return self.name
@@ -659,11 +1271,167 @@ class Service(models.Model):
         verbose_name_plural = _("Services")
 
 
+class OrderRollupManager(models.Manager):
+    """Manager which keeps OrderRollup rows in sync with orders."""
+
+    def move(self, old_key, new_key, old_price, new_price):
+        """Move one order from the old row to the new one.
+
+        Old row loses exactly the price the order was added to it with.
+
+        Args:
+            old_key (dict): rollup key of the order before saving or None
+            new_key (dict): rollup key of the order after saving or None
+            old_price (Decimal): price of the order before saving or None
+            new_price (Decimal): price of the order after saving or None
+        """
+        if old_key:
+            self.add(old_key, -1, -old_price)
+        if new_key:
+            self.add(new_key, 1, new_price)
+
+        for key in (old_key, new_key):
+            if key:
+                self.invalidate_statistic(key["business_id"])
+
+    def add_orders(self, orders):
+        """Add new orders to their rows, updating every row once."""
+        self.move_orders(orders, [None] * len(orders))
+
+    def move_orders(self, orders, old_fields):
+        """Move orders from rows of their old field values to the current ones.
+
+        Every row is updated once.
+
+        Args:
+            orders (list): saved Order instances
+            old_fields (list): rollup fields of every order before saving or None
+        """
+        totals = defaultdict(lambda: [0, 0])
+        for order, fields in zip(orders, old_fields):
+            new_fields = order.get_rollup_fields()
+            moves = (
+                (order.get_rollup_key(fields), order.get_rollup_price(fields), -1),
+                (order.get_rollup_key(new_fields), order.get_rollup_price(new_fields), 1),
+            )
+            for rollup_key, price, sign in moves:
+                if rollup_key:
+                    total = totals[tuple(rollup_key.items())]
+                    total[0] += sign
+                    total[1] += sign * price
+
+        for rollup_key, (count, revenue) in totals.items():
+            if count or revenue:
+                self.add(dict(rollup_key), count, revenue)
+
+        for business_id in {dict(rollup_key)["business_id"] for rollup_key in totals}:
+            self.invalidate_statistic(business_id)
+
+    @staticmethod
+    def invalidate_statistic(business_id):
+        """Make cached statistic of the business stale after commit."""
+        transaction.on_commit(partial(StatisticCache.bump_version, business_id))
+
+    def add(self, key, count, revenue):
+        """Add count and revenue to the row with given key.
+
+        Rows are changed with F expressions, so concurrent orders do not
+        overwrite each other. Rows are created for positive counts only.
+        """
+        updated = self.filter(**key).update(
+            count=F("count") + count,
+            revenue=F("revenue") + revenue,
+        )
+
+        if not updated and count > 0:
+            rollup, created = self.get_or_create(
+                **key, defaults={"count": count, "revenue": revenue},
+            )
+            if not created:
+                self.filter(pk=rollup.pk).update(
+                    count=F("count") + count,
+                    revenue=F("revenue") + revenue,
+                )
+
+
+class OrderRollup(models.Model):
+    """This class represents daily pre-aggregated orders of a business.
+
+    Rows are updated incrementally when an order is saved, so statistic
+    does not need to scan the whole Order table. They can be rebuilt from
+    scratch with the rebuild_order_rollup command.
+
+    Note:
+        revenue is calculated with prices of the orders, which are copied
+        from their services when the orders are booked
+
+    Attributes:
+        business (Business): Business of the order service
+        specialist (CustomUser): Specialist of the orders
+        service (Service): Service of the orders
+        day (date): Local date of the orders start time
+        status (int): Status of the orders
+        count (int): Amount of the orders
+        revenue (decimal): Total price of the orders
+    """
+
+    business = models.ForeignKey(
+        "Business",
+        on_delete=models.CASCADE,
+        related_name="order_rollups",
+        verbose_name=_("Business"),
+    )
+    specialist = models.ForeignKey(
+        "CustomUser",
+        on_delete=models.CASCADE,
+        related_name="specialist_order_rollups",
+        verbose_name=_("Specialist"),
+    )
+    service = models.ForeignKey(
+        "Service",
+        on_delete=models.CASCADE,
+        verbose_name=_("Service"),
+    )
+    day = models.DateField(
+        verbose_name=_("Day"),
+    )
+    status = models.IntegerField(
+        choices=Order.StatusChoices.choices,
+        verbose_name=_("Status"),
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name=_("Amount of orders"),
+    )
+    revenue = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name=_("Revenue"),
+    )
+
+    objects = OrderRollupManager()
+
+    class Meta:
+        """This meta class stores uniqueness and verbose names."""
+
+        unique_together = ["business", "specialist", "service", "day", "status"]
+        indexes = [
+            models.Index(fields=["business", "day"]),
+        ]
+        verbose_name = _("Order rollup")
+        verbose_name_plural = _("Order rollups")
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the rollup."""
+        return f"{self.day} {self.get_status_display()}: {self.count}"
+
+
 class Invitation(models.Model):
     """This class represents an invite for a position.
 
     Attributes:
-        created_at (datetime): represents time of creation, used in token
+        created_at (datetime): represents time of creation
         email (str): Email which was used to send an invite
         position (Position): position in question
         token (str): token used in confirmations
@@ -674,7 +1442,8 @@ class Invitation(models.Model):
         unique_together = ["email", "position"]
 
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name=_("Created at"),
     )
 
@@ -695,6 +1464,113 @@ class Invitation(models.Model):
         null=True,
     )
 
+    def save(self, *args, **kwargs):
+        """Create token of a new invitation before inserting it."""
+        if self._state.adding and not self.token:
+            self.token = SpecialistInviteTokenGenerator().make_token(self)
+
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         """This method changes representation of the Invite in the admin panel."""
         return f"Invite for {self.email} on {self.position}"
+
+
+class WorkingTimeJob(models.Model):
+    """This class represents a background job which applies reduced working time.
+
+    Orders of the business or of one its position which don't fit the new
+    working time are cancelled and their customers and specialists are
+    notified.
+
+    Attributes:
+        business (Business): Business which working time was reduced
+        position (Position, optional): Position which working time was reduced
+        working_time (json): New working time of the changed days
+        status (int): Progress status of the job
+        orders_cancelled (int): Amount of cancelled orders
+        emails_sent (int): Amount of sent notifications
+        error (str): Error which stopped the job
+        created_at (datetime): Time when the job was started
+        finished_at (datetime): Time when the job was finished
+    """
+
+    class StatusChoices(models.IntegerChoices):
+        """This class is used for progress statuses."""
+
+        PENDING = 0, _("Pending")
+        RUNNING = 1, _("Running")
+        DONE = 2, _("Done")
+        FAILED = 3, _("Failed")
+
+    business = models.ForeignKey(
+        "Business",
+        on_delete=models.CASCADE,
+        related_name="working_time_jobs",
+        verbose_name=_("Business"),
+    )
+    position = models.ForeignKey(
+        "Position",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="working_time_jobs",
+        verbose_name=_("Position"),
+    )
+    working_time = models.JSONField(
+        verbose_name=_("Working time"),
+    )
+    status = models.IntegerField(
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+        verbose_name=_("Status"),
+    )
+    orders_cancelled = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Cancelled orders"),
+    )
+    emails_sent = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Sent emails"),
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name=_("Error"),
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Created at"),
+    )
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name=_("Finished at"),
+    )
+
+    class Meta:
+        """This meta class stores ordering and verbose names."""
+
+        ordering = ["id"]
+        verbose_name = _("Working time job")
+        verbose_name_plural = _("Working time jobs")
+
+    @classmethod
+    def start(cls, business, working_time, position=None):
+        """Create the job and queue its task after commit."""
+        from api.tasks import apply_working_time
+
+        job = cls.objects.create(business=business, position=position,
+                                 working_time=working_time)
+        transaction.on_commit(partial(apply_working_time.delay, job.id))
+        logger.info(f"{job} was started")
+        return job
+
+    def get_orders(self):
+        """Return orders which working time of the job applies to."""
+        if self.position_id:
+            return Order.objects.filter(service__position_id=self.position_id)
+        return Order.objects.filter(business_id=self.business_id)
+
+    def __str__(self) -> str:
+        """str: Returns a verbose title of the job."""
+        return f"Working time job #{self.id} of business id={self.business_id}"
@@ -0,0 +1,208 @@
+"""This module provides keyset pagination of list endpoints.
+
+A page is selected by the position of its edge row, a pair of the ordering
+field value and id, instead of OFFSET. So the database seeks the page on an
+index and a deep page costs as much as the first one. The position is
+passed in an opaque cursor, which is bound to the ordering it was made for.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """Pagination by (ordering field, id) with opaque cursors.
+
+    The first field of the ordering chosen by OrderingFilter, the view
+    ordering or the model ordering is used, ties are ordered by id. Count
+    is returned on the first page only, next and previous links carry
+    cursors. Requests with offset are paginated by LimitOffsetPagination,
+    so existing clients keep working. Ordering must be a concrete field of
+    the model, ordering by a field of a related model, an annotation or an
+    expression is rejected with 400.
+
+    Views may set page_size and max_page_size attributes, otherwise
+    PAGE_SIZE and max_limit are used, and may provide a cheaper count with
+    get_pagination_count(queryset).
+
+    Attributes:
+        max_limit (int): max amount of items on a page
+    """
+
+    cursor_query_param = "cursor"
+    max_limit = 100
+    invalid_cursor_message = "Invalid cursor"
+    invalid_ordering_message = "Ordering by {ordering} is not supported by keyset pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of the queryset after or before the cursor position."""
+        self.view = view
+        self.default_limit = getattr(view, "page_size", self.default_limit)
+        self.max_limit = getattr(view, "max_page_size", self.max_limit)
+
+        self.keyset = self.offset_query_param not in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.field = self.get_ordering_field(queryset)
+
+        cursor = self.decode_cursor(request)
+        # Count is queried only when the first page is returned with envelope
+        self.count_queryset = None if cursor else queryset
+
+        descending = self.ordering.startswith("-")
+        reverse = bool(cursor and cursor["reverse"])
+        if reverse:
+            descending = not descending
+
+        if cursor:
+            queryset = queryset.filter(self.get_position_filter(cursor, descending))
+
+        sign = "-" if descending else ""
+        order_by = [f"{sign}{self.field.attname}"]
+        if not self.field.primary_key:
+            order_by.append(f"{sign}pk")
+
+        rows = list(queryset.order_by(*order_by)[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        self.next_row = rows[-1] if rows and (has_more or reverse) else None
+        self.previous_row = rows[0] if rows and cursor and (has_more or not reverse) else None
+        return rows
+
+    def get_count(self, queryset):
+        """Return amount of items, views may count them with get_pagination_count()."""
+        if hasattr(self.view, "get_pagination_count"):
+            return self.view.get_pagination_count(queryset)
+        return super().get_count(queryset)
+
+    def get_ordering(self, request, queryset, view):
+        """Return the first ordering chosen for the view like "-start_time"."""
+        ordering = None
+        for backend in getattr(view, "filter_backends", ()):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+
+        ordering = ordering or queryset.query.order_by or queryset.model._meta.ordering
+        return ordering[0] if ordering else "pk"
+
+    def get_ordering_field(self, queryset):
+        """Return model field of the ordering.
+
+        Raises ValidationError if the ordering is not a concrete field of the
+        model, as rows can't be positioned by its value.
+        """
+        meta = queryset.model._meta
+        try:
+            field_name = self.ordering.lstrip("-")
+            field = meta.pk if field_name == "pk" else meta.get_field(field_name)
+        except (AttributeError, FieldDoesNotExist):
+            field = None
+
+        if field is None or not field.concrete or field.many_to_many:
+            raise serializers.ValidationError(
+                {"ordering": self.invalid_ordering_message.format(ordering=self.ordering)},
+            )
+        return field
+
+    def get_position_filter(self, cursor, descending):
+        """Return filter of rows after the cursor position in the given direction."""
+        lookup = "lt" if descending else "gt"
+        attname = self.field.attname
+        if self.field.primary_key:
+            return Q(**{f"pk__{lookup}": cursor["pk"]})
+
+        return Q(**{f"{attname}__{lookup}": cursor["value"]}) | Q(
+            **{attname: cursor["value"], f"pk__{lookup}": cursor["pk"]},
+        )
+
+    def encode_cursor(self, row, reverse):
+        """Return link to the page after the row, or before it if reverse."""
+        position = {
+            "ordering": self.ordering,
+            "value": self.field.value_to_string(row),
+            "pk": row.pk,
+            "reverse": reverse,
+        }
+        cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """Return position of the cursor passed in the request or None.
+
+        Raises NotFound for cursors which are broken or made for another ordering.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+            if position["ordering"] != self.ordering:
+                raise ValueError("Cursor was made for another ordering")
+            position["value"] = self.field.to_python(position["value"])
+            position["pk"] = int(position["pk"])
+            position["reverse"] = bool(position["reverse"])
+        except (Base64Error, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position
+
+    def get_next_link(self):
+        """Return link to the next page or None on the last page."""
+        if not self.keyset:
+            return super().get_next_link()
+        return self.encode_cursor(self.next_row, reverse=False) if self.next_row else None
+
+    def get_previous_link(self):
+        """Return link to the previous page or None on the first page."""
+        if not self.keyset:
+            return super().get_previous_link()
+        if self.previous_row is None:
+            return None
+        return self.encode_cursor(self.previous_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        """Return page with links, count is added on the first page only."""
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        page = OrderedDict()
+        if self.count_queryset is not None:
+            page["count"] = self.get_count(self.count_queryset)
+        page["next"] = self.get_next_link()
+        page["previous"] = self.get_previous_link()
+        page["results"] = data
+        return Response(page)
+
+    def get_link_header(self):
+        """Return Link header with next and previous pages for list responses."""
+        links = [
+            f'<{url}>; rel="{rel}"'
+            for url, rel in ((self.get_next_link(), "next"), (self.get_previous_link(), "prev"))
+            if url
+        ]
+        return ", ".join(links)
@@ -5,10 +5,10 @@ import logging
 
 from rest_framework import serializers
 
-from beauty.utils import (Geolocator,
-                          get_working_time_from_dict)
+from beauty.utils import get_working_time_from_dict
 
-from api.models import (Business, CustomUser, Location)
+from api.eager_loading import EagerLoadingMixin
+from api.models import Business, WorkingTimeJob
 from api.serializers.location_serializer import LocationSerializer
 
 
@@ -24,37 +24,30 @@ class WorkingTimeSerializer(serializers.ModelSerializer):
 
     Sun = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Mon = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Tue = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Wed = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Thu = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Fri = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
     Sat = serializers.ListField(
         write_only=True,
-        max_length=2,
         default=[],
     )
 
@@ -100,17 +93,9 @@ class WorkingTimeSerializer(serializers.ModelSerializer):
             business (object): new business
 
         """
-        json_field = {key: value if len(value) != 2 else [
-                      value[0],
-                      value[1],
-                      ]
-                      for key, value in validated_data.items()
-                      if key in self.week_days}
-
         for key in self.week_days:
             validated_data.pop(key)
 
-        validated_data["working_time"] = json_field
         return super().create(validated_data)
 
 
@@ -121,24 +106,16 @@ class BaseBusinessSerializer(WorkingTimeSerializer):
     """
     location = LocationSerializer()
 
-    def correct_coordinates(self, address: str, latitude=None, longitude=None):
-        """Correct invalid coordinates."""
-        if not ((0 < latitude < 180) and (0 < longitude < 180)):
-            return Geolocator().get_coordinates_by_address(address)
-
-        return latitude, longitude
-
     def create(self, validated_data):
         """Overridden to create the nested Location model.
 
         In case when only address of location is provided, or one of coordinates is missed
-        location coordinates are calculated by address field.
+        location is saved pending geocoding and its coordinates are calculated by address
+        field in background.
         """
         try:
-            location = self.initial_data["location"]
-            location["latitude"], location["longitude"] = self.correct_coordinates(**location)
-            location_model = Location.objects.create(**location)
-            validated_data["location"] = location_model
+            location = dict(self.initial_data["location"])
+            validated_data["location"] = LocationSerializer().create(location)
 
             return super().create(validated_data)
 
@@ -146,7 +123,7 @@ class BaseBusinessSerializer(WorkingTimeSerializer):
             logger.warning("Can not update the address. No address provided")
             raise serializers.ValidationError({"location": "No address provided"})
 
-        except TypeError:
+        except (TypeError, ValueError):
             logger.warning("Can not update the address. The address is in the wrong format")
             raise serializers.ValidationError({"location": "The address is in the wrong format"})
 
@@ -154,7 +131,8 @@ class BaseBusinessSerializer(WorkingTimeSerializer):
         """Overridden to update the nested Location model.
 
         In case when only address of location is provided, or one of coordinates is missed
-        location coordinates are calculated by address field.
+        location is saved pending geocoding and its coordinates are calculated by address
+        field in background.
         """
         if self.context["request"].method == "PATCH" and "location" not in validated_data.keys():
             return super().update(instance, validated_data)
@@ -164,9 +142,7 @@ class BaseBusinessSerializer(WorkingTimeSerializer):
 
         try:
             location = validated_data.pop("location")
-            location_data = dict(location)
-            location["latitude"], location["longitude"] = self.correct_coordinates(**location_data)
-            location_serializer.update(location_instance, location)
+            location_serializer.update(location_instance, dict(location))
             return super().update(instance, validated_data)
 
         except KeyError:
@@ -181,8 +157,7 @@ class BaseBusinessSerializer(WorkingTimeSerializer):
         """Display owner full name."""
         data = super().to_representation(instance)
         if "owner" in data:
-            owner = CustomUser.objects.get(id=data["owner"])
-            data["owner"] = owner.get_full_name()
+            data["owner"] = instance.owner.get_full_name()
         return data
 
 
@@ -199,9 +174,11 @@ class BusinessCreateSerializer(BaseBusinessSerializer):
         read_only_fields = ("owner", )
 
 
-class BusinessesSerializer(serializers.HyperlinkedModelSerializer):
+class BusinessesSerializer(EagerLoadingMixin, serializers.HyperlinkedModelSerializer):
     """Serializer for business base fields."""
 
+    select_related_fields = ("location",)
+
     business_url = serializers.HyperlinkedIdentityField(
         view_name="api:business-detail", lookup_field="pk",
     )
@@ -239,9 +216,11 @@ class BusinessGetAllInfoSerializers(BaseBusinessSerializer):
         fields = "__all__"
 
 
-class BusinessInfoSerializer(serializers.ModelSerializer):
+class BusinessInfoSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Serializer for business base fields."""
 
+    select_related_fields = ("location",)
+
     location = LocationSerializer()
 
     class Meta:
@@ -251,24 +230,30 @@ class BusinessInfoSerializer(serializers.ModelSerializer):
         fields = ("id", "name", "business_type", "logo", "location", "description", "working_time")
 
 
-class NearestBusinessesSerializer(BaseBusinessSerializer):
+class NearestBusinessesSerializer(EagerLoadingMixin, BaseBusinessSerializer):
     """Serializer for getting nearest busineses info."""
 
+    select_related_fields = ("location",)
+    only_fields = ("id", "name", "business_type", "location")
+
     business_url = serializers.HyperlinkedIdentityField(
         view_name="api:business-detail", lookup_field="pk",
     )
     location = LocationSerializer()
+    distance = serializers.FloatField(read_only=True, help_text="Distance in kilometres")
 
     class Meta:
         """Meta for NearestBusinessesSerializer class."""
 
         model = Business
-        fields = ("id", "name", "business_type", "business_url", "location")
+        fields = ("id", "name", "business_type", "business_url", "location", "distance")
 
 
-class AllBusinessesSpecialOwnerSerializer(BaseBusinessSerializer):
+class AllBusinessesSpecialOwnerSerializer(EagerLoadingMixin, BaseBusinessSerializer):
     """Serializer for getting all businesses for current owner."""
 
+    select_related_fields = ("location",)
+
     location = LocationSerializer()
 
     class Meta:
@@ -276,3 +261,20 @@ class AllBusinessesSpecialOwnerSerializer(BaseBusinessSerializer):
 
         model = Business
         fields = ("id", "name", "business_type", "logo", "location")
+
+
+class WorkingTimeJobSerializer(serializers.ModelSerializer):
+    """Serializer for progress of the job which applies reduced working time."""
+
+    job_url = serializers.HyperlinkedIdentityField(
+        view_name="api:business-working-time-job",
+        lookup_field="pk",
+    )
+    status = serializers.CharField(source="get_status_display")
+
+    class Meta:
+        """Display progress fields of the job."""
+
+        model = WorkingTimeJob
+        fields = ("id", "job_url", "status", "orders_cancelled", "emails_sent", "error",
+                  "created_at", "finished_at")
@@ -7,6 +7,7 @@ from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
+from api.eager_loading import EagerLoadingMixin
 from api.models import CustomUser
 from beauty.tokens import OrderApprovingTokenGenerator
 from beauty.utils import order_approve_decline_urls
@@ -62,9 +63,9 @@ class OrderUserHyperlink(serializers.HyperlinkedRelatedField):
         """
         url = super().to_representation(order)
         request = self.context.get("request")
-        valid_token = OrderApprovingTokenGenerator().check_token(order, order.token)
-        if all([request.user.is_authenticated, request.user == order.specialist, valid_token,
-                self.url_user_id == "specialist_id"]):
+        is_specialist = all([request.user.is_authenticated, self.url_user_id == "specialist_id",
+                             order.specialist_id == request.user.id])
+        if is_specialist and OrderApprovingTokenGenerator().check_token(order, order.token):
             return {"url": url} | order_approve_decline_urls(order, request=request)
         return url
 
@@ -135,10 +136,12 @@ class GroupListingField(serializers.RelatedField):
         return self.get_queryset().get(name=data).id
 
 
-class CustomUserSerializer(PasswordsValidation,
+class CustomUserSerializer(EagerLoadingMixin, PasswordsValidation,
                            serializers.HyperlinkedModelSerializer):
     """Serializer for getting all users and creating a new user."""
 
+    prefetch_related_fields = ("groups", "specialist_orders", "customer_orders")
+
     url = serializers.HyperlinkedIdentityField(
         view_name="api:user-detail", lookup_field="pk",
     )
@@ -316,7 +319,8 @@ class SpecialistDetailSerializer(serializers.ModelSerializer):
 
         model = CustomUser
         fields = ["id", "first_name", "patronymic", "last_name", "bio",
-                  "rating", "avatar", "specialist_reviews", "make_order"]
+                  "rating", "review_count", "rating_avg", "avatar", "specialist_reviews",
+                  "make_order"]
 
     def to_representation(self, instance):
         """Method for representing an URL for making an order and for displaying reviews."""
@@ -324,7 +328,7 @@ class SpecialistDetailSerializer(serializers.ModelSerializer):
 
         data["specialist_reviews"] = reverse(
             "api:review-get",
-            kwargs={"to_user": self.instance.id},
+            kwargs={"to_user": instance.id},
             request=self.context.get("request"),
         )
         data["make_order"] = reverse(
@@ -2,18 +2,49 @@
 
 import logging
 
+from django.db import transaction
 from rest_framework import serializers
 
 from api.models import Location
+from api.tasks import geocode_locations
 
 
 logger = logging.getLogger(__name__)
 
 
 class LocationSerializer(serializers.ModelSerializer):
-    """Location serializer."""
+    """Location serializer.
+
+    Location with missing or invalid coordinates is saved pending geocoding
+    and its address is geocoded by a Celery task after the transaction.
+    """
 
     class Meta:
         """Displays address fields."""
         model = Location
-        fields = "__all__"
+        exclude = ("geohash",)
+        read_only_fields = ("geocode_status",)
+
+    @staticmethod
+    def set_coordinates(location: Location, data: dict) -> None:
+        """Set coordinates from data or schedule geocoding of the location address."""
+        latitude = data.get("latitude", location.latitude)
+        longitude = data.get("longitude", location.longitude)
+
+        if location.set_coordinates(latitude, longitude):
+            transaction.on_commit(geocode_locations.delay)
+            logger.info(f"Location with address {location.address} waits for geocoding")
+
+        data["latitude"], data["longitude"] = location.latitude, location.longitude
+
+    def create(self, validated_data: dict) -> Location:
+        """Create location, scheduling geocoding if coordinates are invalid."""
+        location = Location(**validated_data)
+        self.set_coordinates(location, validated_data)
+        location.save()
+        return location
+
+    def update(self, instance: Location, validated_data: dict) -> Location:
+        """Update location, scheduling geocoding if coordinates are invalid."""
+        self.set_coordinates(instance, validated_data)
+        return super().update(instance, validated_data)
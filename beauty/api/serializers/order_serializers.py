@@ -1,35 +1,123 @@
 """The module includes serializers for Order model."""
 
 import logging
+from django.db import IntegrityError
 from rest_framework.exceptions import ValidationError
 from django.utils import timezone
 from rest_framework import serializers
+from api.booking import OVERLAP_CONSTRAINT
 from api.models import (Order, CustomUser, Service, Position)
 
-from beauty.utils import string_to_time
+from beauty.availability import DaySchedule, to_time
 
 logger = logging.getLogger(__name__)
 
 
+def get_busy_specialist_error(specialist, start_time):
+    """Return validation error for the order of a busy specialist."""
+    return ValidationError(
+        {"start_time": f"Specialist {specialist.get_full_name()} "
+                       f"already has an order at {start_time}."},
+    )
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field which takes instances prefetched by the list serializer.
+
+    Instances missing in the prefetched ones are got from the queryset.
+    """
+
+    def to_internal_value(self, data):
+        """Return prefetched instance with given pk."""
+        prefetched = getattr(self.root, "prefetched", {}).get(self.field_name, {})
+        try:
+            return prefetched[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class OrderListSerializer(serializers.ListSerializer):
+    """Serializer for validating and creating a batch of orders at once.
+
+    Services and specialists of all orders are got with one query each
+    and the orders are inserted with one query.
+    """
+
+    def to_internal_value(self, data):
+        """Prefetch services and specialists of the orders before validation."""
+        if isinstance(data, list):
+            self.prefetched = {
+                "service": self.child.fields["service"].get_queryset().prefetch_related(
+                    "position__specialist",
+                ).in_bulk(self.get_ids(data, "service")),
+                "specialist": self.child.fields["specialist"].get_queryset().in_bulk(
+                    self.get_ids(data, "specialist"),
+                ),
+            }
+
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def get_ids(data, field_name):
+        """Return valid ids of the field from raw orders data."""
+        ids = set()
+        for item in data:
+            try:
+                ids.add(int(item[field_name]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        return ids
+
+    def create(self, validated_data):
+        """Create orders if their specialists are free at their time.
+
+        Should be called while the specialists are locked with
+        api.booking.lock_specialists, otherwise concurrent orders can overlap.
+        """
+        orders = [Order(**attrs) for attrs in validated_data]
+        for order in orders:
+            order.end_time = order.start_time + order.service.duration
+
+        booked = list(Order.objects.overlapping_many(orders).values_list(
+            "specialist", "start_time", "end_time",
+        ))
+        for order in orders:
+            if any(start_time < order.end_time and end_time > order.start_time
+                   for specialist_id, start_time, end_time in booked
+                   if specialist_id == order.specialist_id):
+                logger.info(f"Specialist {order.specialist.get_full_name()} "
+                            f"is busy at {order.start_time}")
+                raise get_busy_specialist_error(order.specialist, order.start_time)
+            booked.append((order.specialist_id, order.start_time, order.end_time))
+
+        try:
+            return Order.objects.create_many(orders)
+        except IntegrityError as error:
+            if OVERLAP_CONSTRAINT not in str(error):
+                raise
+            raise get_busy_specialist_error(orders[0].specialist, orders[0].start_time) from error
+
+
 class OrderSerializer(serializers.HyperlinkedModelSerializer):
     """Serializer for getting all orders and creating a new order."""
 
     url = serializers.HyperlinkedIdentityField(
         view_name="api:order-detail", lookup_field="pk",
     )
-    specialist = serializers.PrimaryKeyRelatedField(queryset=CustomUser.objects.filter(
+    specialist = PrefetchedPrimaryKeyRelatedField(queryset=CustomUser.objects.filter(
         groups__name__icontains="specialist"),
     )
     customer = serializers.PrimaryKeyRelatedField(read_only=True)
-    service = serializers.PrimaryKeyRelatedField(
-        queryset=Service.objects.all(),
+    service = PrefetchedPrimaryKeyRelatedField(
+        queryset=Service.objects.select_related("position"),
     )
 
     class Meta:
         """Class with a model and model fields for serialization."""
 
         model = Order
-        fields = "__all__"
+        exclude = ("business", "price")
+        list_serializer_class = OrderListSerializer
 
         read_only_fields = ("customer", "status", "reason")
 
@@ -51,9 +139,9 @@ class OrderSerializer(serializers.HyperlinkedModelSerializer):
             logger.info("The start time should be later than now.")
 
             errors.update({"start_time": "The start time should be later than now."})
-        specialist_services = Position.objects.filter(
-            specialist=specialist).values_list("service__name", flat=True)
-        if not service.position.specialist.filter(id=specialist.id):
+        if specialist not in service.position.specialist.all():
+            specialist_services = Position.objects.filter(
+                specialist=specialist).values_list("service__name", flat=True)
             logger.info(f"Specialist {specialist.get_full_name()}"
                         f"does not have {service.name} service")
 
@@ -68,17 +156,19 @@ class OrderSerializer(serializers.HyperlinkedModelSerializer):
 
             errors.update({"users": "Customer and specialist are the same person!"})
 
-        working_hours = service.position.working_time[start_time.strftime("%a")]
+        working_hours = service.position.get_working_day(start_time)
 
         if not working_hours and start_time < timezone.now():
             logger.info(f"{specialist} does not work {start_time.date()}")
 
             errors.update({"start_date": f"{specialist} does not work {start_time.date()}."})
 
-        if working_hours:
-            start_hour = string_to_time(working_hours[0])
-            end_hour = string_to_time(working_hours[1])
-            if start_hour > start_time.time() or start_time.time() > end_hour:
+        day_schedule = DaySchedule(working_hours)
+        if day_schedule:
+            working_intervals = ", ".join(
+                f"{to_time(start)} - {to_time(end)}" for start, end in day_schedule.working
+            )
+            if not day_schedule.is_working_time(start_time.time()):
                 logger.info(f"Specialist {specialist.get_full_name()} "
                             f"does not work at {start_time.time()}")
 
@@ -87,12 +177,33 @@ class OrderSerializer(serializers.HyperlinkedModelSerializer):
                         "message": f"Specialist {specialist.get_full_name()} "
                                    f"does not work at {start_time.time()}.",
                         "help_text": f"Specialist {specialist.get_full_name()} "
-                                     f"works between {start_hour} - {end_hour}."}},
+                                     f"works between {working_intervals}."}},
                 )
         if errors:
             raise ValidationError(errors)
         return super().validate(attrs)
 
+    def create(self, validated_data):
+        """Create an order if the specialist is free at its time.
+
+        Should be called while the specialist is locked with
+        api.booking.lock_specialists, otherwise concurrent orders can overlap.
+        """
+        specialist = validated_data["specialist"]
+        start_time = validated_data["start_time"]
+        end_time = start_time + validated_data["service"].duration
+
+        if Order.objects.overlapping(specialist, start_time, end_time).exists():
+            logger.info(f"Specialist {specialist.get_full_name()} is busy at {start_time}")
+            raise get_busy_specialist_error(specialist, start_time)
+
+        try:
+            return super().create(validated_data)
+        except IntegrityError as error:
+            if OVERLAP_CONSTRAINT not in str(error):
+                raise
+            raise get_busy_specialist_error(specialist, start_time) from error
+
 
 class OrderDeleteSerializer(serializers.ModelSerializer):
     """Serializer for order cancellation."""
@@ -103,7 +214,7 @@ class OrderDeleteSerializer(serializers.ModelSerializer):
         """Class with a model and model fields for serialization."""
 
         model = Order
-        fields = "__all__"
+        exclude = ("business", "price")
         read_only_fields = ("customer", "start_time",
                             "specialist", "service", "status", "note")
 
@@ -4,7 +4,8 @@ import logging
 import calendar
 
 from rest_framework import serializers
-from beauty.utils import (is_inside_interval, string_to_time)
+from beauty.availability import compile_working_time
+from api.eager_loading import EagerLoadingMixin
 from api.serializers.business_serializers import WorkingTimeSerializer
 from api.models import Position
 
@@ -13,35 +14,21 @@ logger = logging.getLogger(__name__)
 
 
 def is_valid_position_time(business_time, data):
-    """Return True if position time within business time."""
-    week_days = [day.capitalize() for day in calendar.HTMLCalendar.cssclasses]
+    """Return True if every position working interval is within business time."""
+    business_days = compile_working_time(business_time)
+    position_days = compile_working_time(data)
 
-    for time in week_days:
-        if len(business_time[time]) < len(data[time]):
-            return False
-        if len(business_time[time]) > len(data[time]):
-            continue
-        if len(business_time[time]) == len(data[time]) == 0:
-            continue
+    return all(
+        business_day.issuperset(position_day)
+        for business_day, position_day in zip(business_days, position_days)
+    )
 
-        inner_interval = (
-            string_to_time(data[time][0]),
-            string_to_time(data[time][1]),
-        )
 
-        main_interval = (
-            string_to_time(business_time[time][0]),
-            string_to_time(business_time[time][1]),
-        )
-
-        if not is_inside_interval(main_interval, inner_interval):
-            return False
-    return True
-
-
-class PositionGetSerializer(serializers.ModelSerializer):
+class PositionGetSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     """Position serializer for get all position method."""
 
+    prefetch_related_fields = ("specialist",)
+
     class Meta:
         """Class with a model and model fields for serialization."""
 
@@ -78,14 +65,16 @@ class PositionSerializer(WorkingTimeSerializer):
                 {"business": "you aren't business owner"},
             )
 
-        if not is_valid_position_time(business_time, data):
+        data = super().validate(data)
+
+        if not is_valid_position_time(business_time, data.get("working_time", {})):
             raise serializers.ValidationError(
                 {"working_time": "Position time isn't within working time"},
             )
 
         logger.info("Position_serializer: successfully set time")
 
-        return super().validate(data)
+        return data
 
 
 class PositionInviteSerializer(serializers.Serializer):
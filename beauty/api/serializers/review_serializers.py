@@ -1,6 +1,7 @@
 """The module includes serializers for Review model."""
 
 from rest_framework import serializers
+from api.eager_loading import EagerLoadingMixin
 from api.models import Review
 
 import logging
@@ -18,6 +19,18 @@ class ReviewDisplaySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ReviewListSerializer(EagerLoadingMixin, ReviewDisplaySerializer):
+    """Serializer for review listing with names of reviewers."""
+
+    select_related_fields = ("from_user",)
+
+    from_user_name = serializers.SerializerMethodField()
+
+    def get_from_user_name(self, review):
+        """Return full name of the reviewer or None for deleted one."""
+        return review.from_user.get_full_name() if review.from_user else None
+
+
 class ReviewAddSerializer(serializers.ModelSerializer):
     """This is a serializer for creating a Review."""
 
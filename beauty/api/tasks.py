@@ -2,14 +2,27 @@
 
 import logging
 import smtplib
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from beauty.celery import app
+from beauty.mail import DELIVERY_SCHEDULED_KEY, deliver_queued_emails, schedule_delivery
 from functools import wraps
-from api.models import Order
-from beauty.utils import (AutoDeclineOrderEmail, RemindAboutOrderEmail, ApprovingOrderEmail)
+from api.models import Location, Order, Position, WorkingTimeJob
+from api.views.schedule import get_free_intervals
+from api.working_time import filter_outside_working_time
+from beauty.utils import (AutoDeclineOrderEmail, RemindAboutOrderEmail, ApprovingOrderEmail,
+                          GeocoderError, Geolocator)
 
 
 logger = logging.getLogger(__name__)
 
+GEOCODE_LOCK_KEY = "geocode-locations:lock"
+
 
 def try_except(func):
     """Return a decorator that checks function.
@@ -106,3 +119,172 @@ def send_message_for_specialist_consideration(self, order_id, site_name, is_secu
 
     logger.info(f"{order}: approving email was sent to the specialist "
                 f"{order.specialist.get_full_name()}")
+
+
+@app.task
+def warm_availability_cache(days=None):
+    """Calculate free time of specialists for the next days in advance.
+
+    Only free time which is missing in the cache is calculated.
+
+    Args:
+        days (int): amount of days starting from today,
+            AVAILABILITY_CACHE_DAYS setting by default
+    """
+    today = timezone.localdate()
+    dates = [
+        today + timedelta(days=day)
+        for day in range(days or settings.AVAILABILITY_CACHE_DAYS)
+    ]
+
+    positions = Position.objects.filter(
+        business__is_active=True,
+    ).prefetch_related("specialist")
+
+    for position in positions:
+        specialist_ids = [specialist.id for specialist in position.specialist.all()]
+        if specialist_ids:
+            get_free_intervals(specialist_ids, position, dates)
+
+    logger.info(f"Availability cache was warmed for {len(dates)} days")
+
+
+@app.task(bind=True, max_retries=5, default_retry_delay=60)
+def geocode_locations(self):
+    """Resolve coordinates of locations waiting for geocoding.
+
+    Only one task geocodes locations at a time and the geocoder backend
+    throttles requests, so the Nominatim limit of one request per second
+    is respected. Locations are geocoded in batches of GEOCODE_BATCH_SIZE,
+    the next batch is scheduled while pending locations remain.
+
+    Args:
+        self: current object
+    """
+    lock_timeout = settings.GEOCODE_BATCH_SIZE * (
+        settings.GEOCODER_MIN_DELAY + settings.GEOCODER_TIMEOUT
+    )
+    if not cache.add(GEOCODE_LOCK_KEY, True, timeout=lock_timeout):
+        logger.info("Locations are already geocoded by another task")
+        return
+
+    try:
+        locations = list(Location.objects.filter(
+            geocode_status=Location.GeocodeStatusChoices.PENDING,
+        ).order_by("id")[:settings.GEOCODE_BATCH_SIZE])
+
+        for location in locations:
+            coordinates = location.address and Geolocator.get_coordinates_by_address(
+                location.address, fail_silently=False,
+            )
+            if coordinates:
+                location.set_coordinates(*coordinates)
+            else:
+                location.geocode_status = Location.GeocodeStatusChoices.NOT_FOUND
+                logger.info(f"Coordinates of location id={location.id} were not found")
+
+            location.save(update_fields=["latitude", "longitude", "geocode_status"])
+
+    except GeocoderError as error:
+        raise self.retry(exc=error)
+
+    finally:
+        cache.delete(GEOCODE_LOCK_KEY)
+
+    logger.info(f"{len(locations)} locations were geocoded")
+    if len(locations) == settings.GEOCODE_BATCH_SIZE:
+        geocode_locations.delay()
+
+
+@app.task
+def send_queued_emails():
+    """Deliver emails queued by QueuedEmailBackend.
+
+    One batch of MAIL_BATCH_SIZE emails is sent per run over the pooled
+    connection of the worker, the next batch is scheduled while the queue
+    is not empty.
+    """
+    cache.delete(DELIVERY_SCHEDULED_KEY)
+    amount = deliver_queued_emails(settings.MAIL_BATCH_SIZE)
+
+    logger.info(f"{amount} queued emails were processed")
+    if amount == settings.MAIL_BATCH_SIZE:
+        schedule_delivery()
+
+
+def cancel_orders_outside_working_time(job, orders):
+    """Cancel orders with one query and notify their customers and specialists.
+
+    Notifications are sent over one connection, progress of the job is
+    saved in the same transaction.
+
+    Args:
+        job (WorkingTimeJob): job which cancels the orders
+        orders (list): orders which don't fit new working time
+    """
+    with transaction.atomic():
+        orders = Order.objects.cancel_many(orders, reason="Working time was reduced")
+        messages = [
+            EmailMessage(
+                f"Order #{order.id} has been cancelled",
+                f"Order #{order.id} has been cancelled due to reduced working time",
+                settings.EMAIL_HOST_USER,
+                [order.customer.email, order.specialist.email],
+            )
+            for order in orders
+        ]
+        emails_sent = get_connection().send_messages(messages) or 0
+
+        WorkingTimeJob.objects.filter(pk=job.pk).update(
+            orders_cancelled=F("orders_cancelled") + len(orders),
+            emails_sent=F("emails_sent") + emails_sent,
+        )
+
+
+@app.task
+def apply_working_time(job_id):
+    """Cancel orders which don't fit reduced working time of a business or position.
+
+    Busy future orders outside the new working time are found with one
+    query and cancelled in batches of WORKING_TIME_JOB_BATCH_SIZE, every
+    batch with one query. Progress is saved after every batch, so the job
+    can be watched and started again after a failure.
+
+    Args:
+        job_id (int): WorkingTimeJob id
+    """
+    job = WorkingTimeJob.objects.filter(id=job_id).first()
+    if job is None or job.status == WorkingTimeJob.StatusChoices.DONE:
+        return
+
+    job.status = WorkingTimeJob.StatusChoices.RUNNING
+    job.save(update_fields=["status"])
+
+    last_id = 0
+    try:
+        orders = filter_outside_working_time(
+            job.get_orders().filter(
+                status__in=Order.BUSY_STATUSES,
+                start_time__gte=timezone.now(),
+            ),
+            job.working_time,
+        ).select_related("service__position", "customer", "specialist").order_by("id")
+
+        while True:
+            batch = list(orders.filter(id__gt=last_id)[:settings.WORKING_TIME_JOB_BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            cancel_orders_outside_working_time(job, batch)
+
+    except Exception as error:
+        job.status = WorkingTimeJob.StatusChoices.FAILED
+        job.error = str(error)
+        logger.error(f"{job} failed: {error}")
+    else:
+        job.status = WorkingTimeJob.StatusChoices.DONE
+        logger.info(f"{job} was done")
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
@@ -0,0 +1,240 @@
+"""This module is for testing availability engine.
+
+Tests for DaySchedule:
+- Free interval of a day without orders is the whole working day.
+- Day off has no free intervals.
+- Touching orders are merged.
+- Overlapping and duplicated orders are merged.
+- Orders outside of the working day are clipped.
+- Night shift is handled after midnight.
+- Free slots for service of given duration.
+- Check if interval is free.
+- Check if moment is a working time.
+- Lunch break is not free and not a working time.
+
+Tests for IntervalSet:
+- Overlapping and touching intervals are merged on creation.
+- Union, intersection and difference of two sets.
+- Containment of sets and intervals.
+- Working day JSON in both formats is converted to the set and back.
+
+Tests for compiled working time:
+- Working time is compiled into minutes of every week day.
+- Compiled working time is cached on the instance until JSON changes.
+- Working time strings are parsed without strptime, only in HH:MM format.
+"""
+
+from datetime import date, time
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from api.models import Position
+from beauty.availability import (DaySchedule, IntervalSet, compile_working_time, to_minutes,
+                                 to_time)
+from beauty.utils import string_to_time
+
+
+class DayScheduleTest(SimpleTestCase):
+    """Class with tests for DaySchedule."""
+
+    def setUp(self) -> None:
+        """Set up working day from 9:00 till 13:00."""
+        self.day_schedule = DaySchedule(["09:00", "13:00"])
+
+    def test_without_orders(self):
+        """Test if whole working day is free."""
+        self.assertEqual(self.day_schedule.free_intervals, [(540, 780)])
+
+    def test_day_off(self):
+        """Test if day off has no free time."""
+        day_schedule = DaySchedule([])
+        day_schedule.book("10:00", "11:00")
+
+        self.assertFalse(day_schedule)
+        self.assertEqual(day_schedule.free_intervals, [])
+        self.assertEqual(day_schedule.free_slots(15), [])
+
+    def test_touching_orders(self):
+        """Test if touching orders make one busy interval."""
+        self.day_schedule.book_many([
+            (time(10, 30), time(11)),
+            (time(10), time(10, 30)),
+        ])
+
+        self.assertEqual(self.day_schedule.free_intervals, [(540, 600), (660, 780)])
+
+    def test_overlapping_orders(self):
+        """Test if overlapping and duplicated orders make one busy interval."""
+        self.day_schedule.book_many([
+            (time(10), time(10, 30)),
+            (time(10), time(10, 30)),
+            (time(10, 15), time(11)),
+            (time(10, 20), time(10, 40)),
+        ])
+
+        self.assertEqual(self.day_schedule.free_intervals, [(540, 600), (660, 780)])
+
+    def test_orders_outside_working_day(self):
+        """Test if orders outside of the working day are clipped."""
+        self.day_schedule.book_many([
+            (time(8), time(9, 30)),
+            (time(12, 30), time(14)),
+            (time(15), time(16)),
+        ])
+
+        self.assertEqual(self.day_schedule.free_intervals, [(570, 750)])
+
+    def test_night_shift(self):
+        """Test if orders after midnight are booked for the night shift."""
+        day_schedule = DaySchedule(["22:00", "02:00"])
+        day_schedule.book(time(23, 30), time(0, 30))
+
+        self.assertEqual(
+            [(to_time(start), to_time(end)) for start, end in day_schedule.free_intervals],
+            [(time(22), time(23, 30)), (time(0, 30), time(2))],
+        )
+        self.assertTrue(day_schedule.is_working_time(time(1)))
+
+    def test_free_slots(self):
+        """Test if free slots leave enough time for the service."""
+        self.day_schedule.book(time(10), time(12))
+
+        self.assertEqual(
+            self.day_schedule.free_slots(30),
+            [[540, 555, 570], [720, 735, 750]],
+        )
+        self.assertEqual(self.day_schedule.free_slots(90), [])
+
+    def test_is_free(self):
+        """Test if interval is free only between orders."""
+        self.day_schedule.book(time(10), time(11))
+
+        self.assertTrue(self.day_schedule.is_free("09:00", "10:00"))
+        self.assertTrue(self.day_schedule.is_free("11:00", "13:00"))
+        self.assertFalse(self.day_schedule.is_free("09:30", "10:30"))
+        self.assertFalse(self.day_schedule.is_free("12:30", "13:30"))
+        self.assertFalse(self.day_schedule.is_free("08:30", "09:30"))
+
+    def test_is_working_time(self):
+        """Test if working time includes bounds of the working day."""
+        self.assertTrue(self.day_schedule.is_working_time(time(9)))
+        self.assertTrue(self.day_schedule.is_working_time(time(13)))
+        self.assertFalse(self.day_schedule.is_working_time(time(8, 55)))
+        self.assertEqual(to_minutes("13:05"), 785)
+        self.assertFalse(self.day_schedule.is_working_time("13:05"))
+
+    def test_lunch_break(self):
+        """Test if lunch break is not free and not a working time."""
+        day_schedule = DaySchedule([["09:00", "12:00"], ["13:00", "15:00"]])
+        day_schedule.book(time(11), time(14))
+
+        self.assertEqual(day_schedule.free_intervals, [(540, 660), (840, 900)])
+        self.assertEqual(day_schedule.free_slots(60), [[540, 555, 570, 585, 600], [840]])
+        self.assertFalse(day_schedule.is_working_time(time(12, 30)))
+        self.assertTrue(day_schedule.is_working_time(time(13)))
+
+
+class IntervalSetTest(SimpleTestCase):
+    """Class with tests for IntervalSet."""
+
+    def setUp(self) -> None:
+        """Set up two sets of intervals."""
+        self.first = IntervalSet([(60, 120), (200, 300), (400, 500)])
+        self.second = IntervalSet([(100, 250), (290, 410)])
+
+    def test_merge(self):
+        """Test if overlapping and touching intervals are merged on creation."""
+        interval_set = IntervalSet([(30, 40), (0, 10), (10, 20), (5, 15), (50, 50)])
+
+        self.assertEqual(interval_set.intervals, [(0, 20), (30, 40)])
+        self.assertEqual(len(interval_set), 2)
+        self.assertFalse(IntervalSet())
+
+    def test_operations(self):
+        """Test union, intersection and difference of two sets."""
+        self.assertEqual(
+            (self.first | self.second).intervals, [(60, 500)],
+        )
+        self.assertEqual(
+            (self.first & self.second).intervals, [(100, 120), (200, 250), (290, 300), (400, 410)],
+        )
+        self.assertEqual(
+            (self.first - self.second).intervals, [(60, 100), (250, 290), (410, 500)],
+        )
+        self.assertEqual(
+            (self.second - self.first).intervals, [(120, 200), (300, 400)],
+        )
+        self.assertEqual(self.first - IntervalSet(), self.first)
+
+    def test_containment(self):
+        """Test containment of sets and intervals."""
+        self.assertTrue(self.first.issuperset(IntervalSet([(70, 80), (200, 300)])))
+        self.assertTrue(self.first.issuperset(IntervalSet()))
+        self.assertFalse(self.first.issuperset(self.second))
+        self.assertFalse(IntervalSet().issuperset(self.first))
+
+        self.assertTrue(self.first.covers(200, 300))
+        self.assertTrue(self.first.covers(120, 120))
+        self.assertFalse(self.first.covers(100, 210))
+        self.assertFalse(self.first.covers(0, 10))
+
+    def test_working_day(self):
+        """Test if working day JSON in both formats is converted to the set and back."""
+        self.assertEqual(
+            IntervalSet.from_working_day(["09:00", "18:00"]).intervals, [(540, 1080)],
+        )
+        lunch_break = [["09:00", "13:00"], ["14:00", "18:00"]]
+        self.assertEqual(
+            IntervalSet.from_working_day(lunch_break).intervals, [(540, 780), (840, 1080)],
+        )
+        self.assertEqual(IntervalSet.from_working_day(lunch_break).to_working_day(), lunch_break)
+        self.assertEqual(
+            IntervalSet.from_working_day([["09:00", "13:00"], ["13:00", "18:00"]]).to_working_day(),
+            ["09:00", "18:00"],
+        )
+        self.assertEqual(IntervalSet.from_working_day(None).to_working_day(), [])
+
+
+class CompiledWorkingTimeTest(SimpleTestCase):
+    """Class with tests for compiled working time."""
+
+    def setUp(self) -> None:
+        """Set up a position working on Monday and Tuesday."""
+        self.position = Position(working_time={
+            "Mon": ["09:00", "18:00"], "Tue": ["10:30", "14:00"], "Wed": [],
+        })
+
+    def test_compile(self):
+        """Test if working time is compiled into minutes of every week day."""
+        self.assertEqual(
+            compile_working_time(self.position.working_time),
+            (IntervalSet([(540, 1080)]), IntervalSet([(630, 840)]), *[IntervalSet()] * 5),
+        )
+        self.assertEqual(self.position.get_working_day(date(2022, 5, 3)), IntervalSet([(630, 840)]))
+        self.assertFalse(self.position.get_working_day(2))
+
+    def test_cached(self):
+        """Test if compiled working time is cached on the instance until JSON changes."""
+        with patch("api.models.compile_working_time", wraps=compile_working_time) as compiler:
+            self.position.get_working_day(0)
+            self.position.get_working_day(1)
+            self.assertEqual(compiler.call_count, 1)
+
+            self.position.working_time["Mon"][1] = "17:00"
+            self.assertEqual(self.position.get_working_day(0), IntervalSet([(540, 1020)]))
+            self.position.working_time = {"Mon": []}
+            self.assertFalse(self.position.get_working_day(0))
+            self.assertEqual(compiler.call_count, 3)
+
+    def test_string_to_time(self):
+        """Working time strings are parsed without strptime, only in HH:MM format."""
+        self.assertEqual(string_to_time("09:05"), time(9, 5))
+        self.assertEqual(string_to_time("23:59"), time(23, 59))
+        invalid_strings = (
+            "09", "09:00:00", "ab:cd", "25:00", "9:00", "+9:00", " 9 : 00", "1_0:00",
+            "09:5", "09:00\n", "\u0660\u0669:00",
+        )
+        for invalid in invalid_strings:
+            with self.subTest(invalid=invalid), self.assertRaises(ValueError):
+                string_to_time(invalid)
@@ -181,7 +181,7 @@ class BusinessListCreateViewTest(TestCase):
         """Owner cannot create business if working time is invalid."""
         self.client.force_authenticate(user=self.owner)
 
-        self.valid_create_data["Mon"] = ["10:00", "9:00"]
+        self.valid_create_data["Mon"] = ["10:00", "09:00"]
         response = self.client.post(
             path=reverse(
                 "api:businesses-list-create",
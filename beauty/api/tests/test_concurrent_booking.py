@@ -0,0 +1,96 @@
+"""This module is for testing concurrent booking of orders.
+
+Tests for OrderCreateView:
+- Only one of concurrent requests books the same specialist time;
+- Concurrent requests for different time of the specialist are all booked.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Barrier
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from api.models import Order
+from api.views.schedule import get_working_day
+from beauty.utils import string_to_time
+from .factories import (CustomUserFactory, GroupFactory,
+                        PositionFactory, ServiceFactory)
+
+
+@patch("api.tasks.send_message_for_specialist_consideration.apply_async")
+@patch("api.tasks.change_order_status_to_decline.apply_async")
+class TestConcurrentBooking(TransactionTestCase):
+    """Stress tests which book orders from several threads at once."""
+
+    threads = 8
+    working_time = {day: ["08:00", "20:00"]
+                    for day in ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")}
+
+    def setUp(self) -> None:
+        """Create specialist, service and customers."""
+        self.groups = GroupFactory.groups_for_test()
+        self.specialist = CustomUserFactory(first_name="UserSpecialist")
+        self.groups.specialist.user_set.add(self.specialist)
+
+        self.position = PositionFactory(working_time=self.working_time)
+        self.position.specialist.add(self.specialist)
+        self.service = ServiceFactory(position=self.position, duration=timedelta(minutes=30))
+
+        self.customers = CustomUserFactory.create_batch(self.threads)
+
+        working_day = timezone.now() + timedelta(days=1)
+        self.start_time = timezone.datetime.combine(
+            working_day.date(),
+            string_to_time(get_working_day(self.position, working_day)[0]),
+        )
+
+    def book_concurrently(self, start_times):
+        """Post orders for every start time from its own thread at once.
+
+        Returns:
+            list: response status codes
+        """
+        barrier = Barrier(len(start_times))
+
+        def book(customer, start_time):
+            client = APIClient()
+            client.force_authenticate(user=customer)
+            data = [{"start_time": start_time,
+                     "specialist": self.specialist.id,
+                     "service": self.service.id}]
+            try:
+                barrier.wait()
+                return client.post(path=reverse("api:order-create"), data=data).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=len(start_times)) as executor:
+            return list(executor.map(book, self.customers, start_times))
+
+    def test_same_time(self, *mock_tasks):
+        """Only one of concurrent requests books the same specialist time."""
+        status_codes = self.book_concurrently([self.start_time] * self.threads)
+
+        self.assertEqual(status_codes.count(201), 1)
+        self.assertEqual(status_codes.count(400), self.threads - 1)
+        self.assertEqual(Order.objects.filter(specialist=self.specialist).count(), 1)
+
+    def test_different_time(self, *mock_tasks):
+        """Concurrent requests for different time of the specialist are all booked."""
+        start_times = [
+            self.start_time + self.service.duration * number
+            for number in range(self.threads)
+        ]
+
+        status_codes = self.book_concurrently(start_times)
+
+        self.assertEqual(status_codes, [201] * self.threads)
+        self.assertEqual(
+            Order.objects.filter(specialist=self.specialist).count(), self.threads,
+        )
@@ -7,17 +7,32 @@ Tests for TestSpecialistSchedule:
 - Test if endpoint return 400 response for weekend;
 - Test if endpoint return 400 response for past days;
 - Test if endpoint return 200 response for valid data wigth and without order.
+
+Tests for AvailabilityView:
+- Test if endpoint return 400 response for invalid date range;
+- Test if free time of all specialists is returned for every day;
+- Test if amount of queries doesn't depend on amount of days and specialists;
+- Test if free time is taken from cache;
+- Test if cached free time is invalidated by order changes;
+- Test if orders of the specialist in another position take free time;
+- Test if cached free time is invalidated by working time changes;
+- Test if periodic task warms cache for the next days.
 """
 
 
 from datetime import date, timedelta, datetime, time
 import json
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
+from api.tasks import warm_availability_cache
 from api.tests.factories import (CustomUserFactory, PositionFactory,
                                  ServiceFactory, OrderFactory)
+from beauty.utils import AvailabilityCache
 
 
 def get_next_desired_day(day_int: int) -> date:
@@ -60,6 +75,7 @@ class TestSpecialistSchedule(TestCase):
         self.specialist1 = CustomUserFactory.create()
         self.specialist2 = CustomUserFactory.create()
         self.position.specialist.add(self.specialist2)
+        cache.clear()
 
     def test_schedule_invalid_specialist(self):
         """Test if endpoint return 404 response for invalid specialist."""
@@ -163,11 +179,12 @@ class TestSpecialistSchedule(TestCase):
         order_time = timezone.make_aware(datetime.combine(
             get_next_desired_day(3), time(hour=13, minute=25),
         ))
-        self.order1 = OrderFactory.create(
-            start_time=order_time,
-            specialist=self.specialist2,
-            service=self.service2,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order1 = OrderFactory.create(
+                start_time=order_time,
+                specialist=self.specialist2,
+                service=self.service2,
+            )
 
         response2 = self.client.get(
             path=reverse(
@@ -187,3 +204,172 @@ class TestSpecialistSchedule(TestCase):
         for time_interval in response2:
             with self.subTest():
                 self.assertNotIn(order_time.time(), json.loads(time_interval))
+
+
+class TestAvailabilityView(TestCase):
+    """TestCase for schedule.py. AvailabilityView view."""
+
+    def setUp(self) -> None:
+        """Set up position with two specialists and a service."""
+        self.position = PositionFactory.create(
+            working_time=TestSpecialistSchedule.position_schedule,
+        )
+        self.service = ServiceFactory.create(
+            position=self.position, duration=timedelta(minutes=30),
+        )
+        self.specialists = CustomUserFactory.create_batch(2)
+        self.position.specialist.add(*self.specialists)
+
+        self.thursday = get_next_desired_day(3)
+        self.url_kwargs = {
+            "service_id": self.service.id,
+            "start_date": self.thursday,
+            "end_date": self.thursday + timedelta(days=3),
+        }
+        cache.clear()
+
+    def get_availability(self, **kwargs):
+        """Return response of the availability endpoint."""
+        return self.client.get(
+            path=reverse(
+                "api:service-availability",
+                kwargs=self.url_kwargs | kwargs,
+            ),
+        )
+
+    def test_invalid_date_range(self):
+        """Test if endpoint return 400 response for invalid date range."""
+        invalid_ranges = (
+            {"start_date": "2022-06-22"},
+            {"end_date": self.thursday - timedelta(days=1)},
+            {"end_date": self.thursday + timedelta(days=14)},
+        )
+
+        for invalid_range in invalid_ranges:
+            with self.subTest(invalid_range):
+                self.assertEqual(self.get_availability(**invalid_range).status_code, 400)
+
+    def test_availability(self):
+        """Test if free time of all specialists is returned for every day."""
+        OrderFactory.create(
+            start_time=timezone.make_aware(datetime.combine(
+                self.thursday, time(hour=13, minute=10),
+            )),
+            specialist=self.specialists[0],
+            service=self.service,
+        )
+
+        response = self.get_availability()
+        self.assertEqual(response.status_code, 200)
+
+        schedules = {
+            specialist["id"]: specialist["schedule"]
+            for specialist in response.data["specialists"]
+        }
+        thursday = self.thursday.isoformat()
+        sunday = (self.thursday + timedelta(days=3)).isoformat()
+
+        self.assertEqual(len(schedules[self.specialists[0].id]), 4)
+        self.assertEqual(schedules[self.specialists[0].id][sunday], [])
+        self.assertEqual(schedules[self.specialists[0].id][thursday][0][0], time(13, 40))
+        self.assertEqual(schedules[self.specialists[1].id][thursday][0][0], time(13, 10))
+        self.assertEqual(schedules[self.specialists[1].id][thursday][0][-1], time(15, 55))
+
+    def test_queries_count(self):
+        """Test if amount of queries doesn't depend on days and specialists."""
+        with CaptureQueriesContext(connection) as one_day_queries:
+            self.get_availability(end_date=self.thursday)
+
+        self.position.specialist.add(*CustomUserFactory.create_batch(3))
+
+        with CaptureQueriesContext(connection) as many_days_queries:
+            self.get_availability(end_date=self.thursday + timedelta(days=13))
+
+        self.assertEqual(len(one_day_queries), len(many_days_queries))
+
+    def test_cache_hit(self):
+        """Test if free time is taken from cache."""
+        with CaptureQueriesContext(connection) as first_queries:
+            response = self.get_availability()
+
+        with CaptureQueriesContext(connection) as cached_queries:
+            cached_response = self.get_availability()
+
+        self.assertEqual(len(cached_queries), len(first_queries) - 1)
+        self.assertEqual(response.data, cached_response.data)
+        self.assertEqual(
+            AvailabilityCache.get_stats(),
+            {"hits": 8, "misses": 8, "hit_rate": 0.5},
+        )
+
+    def test_invalidated_by_order(self):
+        """Test if cached free time is invalidated by order changes."""
+        self.get_availability()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order = OrderFactory.create(
+                start_time=timezone.make_aware(datetime.combine(
+                    self.thursday, time(hour=13, minute=10),
+                )),
+                specialist=self.specialists[0],
+                service=self.service,
+            )
+
+        response = self.get_availability()
+        first_start = response.data["specialists"][0]["schedule"][self.thursday.isoformat()][0][0]
+        self.assertEqual(first_start, time(13, 40))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.mark_as_declined()
+
+        response = self.get_availability()
+        first_start = response.data["specialists"][0]["schedule"][self.thursday.isoformat()][0][0]
+        self.assertEqual(first_start, time(13, 10))
+
+    def test_order_in_other_position(self):
+        """Test if orders of the specialist in another position take free time."""
+        other_position = PositionFactory.create(
+            working_time=TestSpecialistSchedule.position_schedule,
+        )
+        other_position.specialist.add(self.specialists[0])
+        other_service = ServiceFactory.create(
+            position=other_position, duration=timedelta(minutes=30),
+        )
+        self.get_availability()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                start_time=timezone.make_aware(datetime.combine(
+                    self.thursday, time(hour=13, minute=10),
+                )),
+                specialist=self.specialists[0],
+                service=other_service,
+            )
+
+        response = self.get_availability()
+        first_start = response.data["specialists"][0]["schedule"][self.thursday.isoformat()][0][0]
+        self.assertEqual(first_start, time(13, 40))
+
+    def test_invalidated_by_working_time(self):
+        """Test if cached free time is invalidated by working time changes."""
+        self.get_availability()
+
+        self.position.working_time = self.position.working_time | {"Thu": ["10:00", "12:00"]}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.position.save()
+
+        response = self.get_availability()
+        first_start = response.data["specialists"][0]["schedule"][self.thursday.isoformat()][0][0]
+        self.assertEqual(first_start, time(10))
+
+    def test_warm_cache(self):
+        """Test if periodic task warms cache for the next days."""
+        self.position.business.is_active = True
+        self.position.business.save()
+        days = (self.thursday - date.today()).days + 4
+
+        warm_availability_cache(days=days)
+        AvailabilityCache.reset_stats()
+        self.get_availability()
+
+        self.assertEqual(AvailabilityCache.get_stats()["misses"], 0)
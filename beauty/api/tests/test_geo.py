@@ -0,0 +1,175 @@
+"""This module is for testing proximity search of businesses.
+
+Tests for geo utilities:
+- Geohashes match the reference encoding;
+- Search cells cover every point within the radius;
+- Location tree finds the same nearest locations as the full scan;
+- Geohash of the location follows its coordinates.
+
+Tests for BusinessesListAPIView:
+- Businesses within the radius are ordered by distance;
+- Legacy delta in degrees is used as a radius;
+- Invalid radius is rejected;
+- Search in the location tree returns the same businesses;
+- Location tree is rebuilt after a business is deactivated.
+"""
+
+import math
+import random
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.geo import (KM_PER_DEGREE, LocationTree, encode_geohash, get_search_cells,
+                     get_search_precision, haversine)
+from api.models import Location
+from .factories import BusinessFactory, LocationFactory
+
+
+class GeoUtilsTest(TestCase):
+    """Tests for geohash encoding, search cells and location tree."""
+
+    def setUp(self) -> None:
+        """Create random generator with fixed seed."""
+        self.random = random.Random(13)
+
+    def random_point(self):
+        """Return random latitude and longitude."""
+        return self.random.uniform(-80, 80), self.random.uniform(-180, 180)
+
+    def test_geohash(self):
+        """Geohashes match the reference encoding."""
+        self.assertEqual(encode_geohash(42.6, -5.6, 5), "ezs42")
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_search_cells_cover_radius(self):
+        """Search cells cover every point within the radius."""
+        for _ in range(500):
+            latitude, longitude = self.random_point()
+            radius = self.random.choice((0.5, 5, 50, 500))
+            cells = get_search_cells(latitude, longitude, radius)
+            precision = get_search_precision(latitude, radius)
+            if cells is None:
+                continue
+
+            degrees = radius / KM_PER_DEGREE
+            point_latitude = latitude + self.random.uniform(-1, 1) * degrees
+            point_longitude = longitude + self.random.uniform(-1, 1) * degrees / math.cos(
+                math.radians(point_latitude),
+            )
+            point_longitude = (point_longitude + 180) % 360 - 180
+            if haversine(latitude, longitude, point_latitude, point_longitude) > radius:
+                continue
+
+            with self.subTest(latitude=latitude, longitude=longitude, radius=radius):
+                self.assertIn(encode_geohash(point_latitude, point_longitude, precision), cells)
+
+    def test_tree_nearest(self):
+        """Location tree finds the same nearest locations as the full scan."""
+        locations = [(pk, *self.random_point()) for pk in range(2000)]
+        tree = LocationTree(locations)
+
+        for limit in (None, 5):
+            latitude, longitude = self.random_point()
+            expected = sorted(
+                (haversine(latitude, longitude, location_latitude, location_longitude), pk)
+                for pk, location_latitude, location_longitude in locations
+            )
+            expected = [pk for distance, pk in expected if distance <= 3000][:limit]
+
+            found = tree.nearest(latitude, longitude, 3000, limit)
+
+            self.assertEqual([pk for pk, _ in found], expected)
+
+    def test_location_geohash(self):
+        """Geohash of the location follows its coordinates."""
+        location = LocationFactory(latitude=49.842957, longitude=24.031111)
+        self.assertEqual(location.geohash, encode_geohash(49.842957, 24.031111))
+
+        location.latitude = 50.450001
+        location.longitude = 30.523333
+        location.save(update_fields=["latitude", "longitude"])
+
+        location = Location.objects.get(pk=location.pk)
+        self.assertEqual(location.geohash, encode_geohash(50.450001, 30.523333))
+
+
+class NearestBusinessesViewTest(TestCase):
+    """Tests for nearest businesses search."""
+
+    def setUp(self) -> None:
+        """Create businesses in Lviv, its suburb and Kyiv."""
+        cache.clear()
+        self.client = APIClient()
+        self.point = (49.842957, 24.031111)
+
+        self.suburb = BusinessFactory(
+            location=LocationFactory(latitude=49.880000, longitude=24.100000),
+        )
+        self.center = BusinessFactory(
+            location=LocationFactory(latitude=49.841000, longitude=24.030000),
+        )
+        self.kyiv = BusinessFactory(
+            location=LocationFactory(latitude=50.450001, longitude=30.523333),
+        )
+
+    def get_nearest(self, radius=None, **kwargs):
+        """Return response of the nearest businesses search around Lviv."""
+        url = reverse(
+            "api:businesses-list-nearest-radius",
+            kwargs={"lat": self.point[0], "lon": self.point[1]},
+        )
+        if radius is not None:
+            url = f"{url}?radius={radius}"
+        return self.client.get(url, **kwargs)
+
+    def assert_businesses(self, response, businesses):
+        """Check that response contains businesses in given order."""
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [business["id"] for business in response.data["results"]],
+            [business.id for business in businesses],
+        )
+
+    def test_ordered_by_distance(self):
+        """Businesses within the radius are ordered by distance."""
+        response = self.get_nearest(radius=10)
+
+        self.assert_businesses(response, [self.center, self.suburb])
+        self.assertLess(response.data["results"][0]["distance"], 1)
+
+        self.assert_businesses(self.get_nearest(radius=600), [self.center, self.suburb, self.kyiv])
+
+    def test_legacy_delta(self):
+        """Legacy delta in degrees is used as a radius."""
+        response = self.client.get(reverse(
+            "api:businesses-list-nearest",
+            kwargs={"lat": self.point[0], "lon": self.point[1], "delta": 0.1},
+        ))
+
+        self.assert_businesses(response, [self.center, self.suburb])
+
+    def test_invalid_radius(self):
+        """Invalid radius is rejected."""
+        for radius in ("-1", "0", "far"):
+            with self.subTest(radius=radius):
+                self.assertEqual(self.get_nearest(radius=radius).status_code, 400)
+
+    @override_settings(NEAREST_BUSINESSES_TREE=True)
+    def test_tree_search(self):
+        """Search in the location tree returns the same businesses."""
+        self.assert_businesses(self.get_nearest(radius=10), [self.center, self.suburb])
+        self.assert_businesses(self.get_nearest(radius=600), [self.center, self.suburb, self.kyiv])
+
+    @override_settings(NEAREST_BUSINESSES_TREE=True)
+    def test_tree_invalidation(self):
+        """Location tree is rebuilt after a business is deactivated."""
+        self.assert_businesses(self.get_nearest(radius=10), [self.center, self.suburb])
+
+        self.center.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.center.save(update_fields=["is_active"])
+
+        self.assert_businesses(self.get_nearest(radius=10), [self.suburb])
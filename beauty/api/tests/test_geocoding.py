@@ -0,0 +1,290 @@
+"""This module is for testing cached geocoding.
+
+Tests for Geolocator:
+- Known address is found in the offline gazetteer;
+- Address is geocoded once and then taken from the memory;
+- Result is taken from the database after the memory is cleared;
+- Addresses differing in case and spaces share the result;
+- Not found address is cached for a shorter time;
+- Expired result is geocoded again;
+- Failed geocoding is not cached;
+- Coordinates are reversed into the nearest known address.
+
+Tests for background geocoding of business locations:
+- Business with invalid coordinates is created pending geocoding;
+- Business with valid coordinates is not geocoded;
+- Task sets coordinates of pending locations and marks unknown addresses;
+- Task geocodes one batch and schedules the next one;
+- Task is skipped while another task geocodes locations;
+- Task is retried if the geocoder fails and locations stay pending;
+- Nearest businesses search skips locations waiting for geocoding.
+"""
+
+import json
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+from rest_framework.test import APIClient
+
+from api.geo import encode_geohash
+from api.models import Business, GeocodeCache, Location
+from api.tasks import GEOCODE_LOCK_KEY, geocode_locations
+from beauty.utils import GazetteerGeocoder, GeocoderError, Geolocator, get_geocoder
+from .factories import BusinessFactory, CustomUserFactory, GroupFactory, LocationFactory
+
+
+faker = Faker()
+
+PLACES = [
+    {"address": "Svobody Ave, 1, Lviv", "latitude": 49.842957, "longitude": 24.031111},
+    {"address": "Khreshchatyk St, 22, Kyiv", "latitude": 50.450001, "longitude": 30.523333},
+]
+
+
+class GeocodingTestCase(TestCase):
+    """Base test case with the offline gazetteer geocoder."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Write the gazetteer file and use the gazetteer geocoder."""
+        super().setUpClass()
+        cls.gazetteer = tempfile.NamedTemporaryFile("w", suffix=".json")
+        json.dump(PLACES, cls.gazetteer)
+        cls.gazetteer.flush()
+
+        cls.settings_override = override_settings(
+            GEOCODER_BACKEND="beauty.utils.GazetteerGeocoder",
+            GEOCODER_GAZETTEER=cls.gazetteer.name,
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Restore settings and remove the gazetteer file."""
+        cls.settings_override.disable()
+        cls.gazetteer.close()
+        get_geocoder.cache_clear()
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        """Forget geocoders and results cached in the memory."""
+        get_geocoder.cache_clear()
+        Geolocator.clear_memory()
+
+
+class GeolocatorTest(GeocodingTestCase):
+    """Tests for cached translation of addresses and coordinates."""
+
+    def test_gazetteer(self):
+        """Known address is found in the offline gazetteer."""
+        self.assertEqual(
+            Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv"),
+            (49.842957, 24.031111),
+        )
+
+    def test_memory_cache(self):
+        """Address is geocoded once and then taken from the memory."""
+        with patch.object(GazetteerGeocoder, "geocode", return_value=(1.0, 2.0)) as geocode:
+            Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+
+            with self.assertNumQueries(0):
+                coordinates = Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+
+        self.assertEqual(coordinates, (1.0, 2.0))
+        geocode.assert_called_once()
+
+    def test_database_cache(self):
+        """Result is taken from the database after the memory is cleared."""
+        Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+        Geolocator.clear_memory()
+
+        with patch.object(GazetteerGeocoder, "geocode") as geocode, self.assertNumQueries(1):
+            coordinates = Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+
+        self.assertEqual(coordinates, (49.842957, 24.031111))
+        geocode.assert_not_called()
+
+    def test_normalised_address(self):
+        """Addresses differing in case and spaces share the result."""
+        Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+
+        with patch.object(GazetteerGeocoder, "geocode") as geocode:
+            coordinates = Geolocator.get_coordinates_by_address("  svobody   ave ,1,LVIV ")
+
+        self.assertEqual(coordinates, (49.842957, 24.031111))
+        geocode.assert_not_called()
+        self.assertEqual(GeocodeCache.objects.count(), 1)
+
+    def test_negative_cache(self):
+        """Not found address is cached for a shorter time."""
+        with patch.object(GazetteerGeocoder, "geocode", return_value=None) as geocode:
+            self.assertIsNone(Geolocator.get_coordinates_by_address("Nowhere"))
+            self.assertIsNone(Geolocator.get_coordinates_by_address("Nowhere"))
+
+        geocode.assert_called_once()
+        self.assertLess(
+            GeocodeCache.objects.get().expires_at,
+            timezone.now() + timedelta(days=2),
+        )
+
+    def test_expired_result(self):
+        """Expired result is geocoded again."""
+        Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+        GeocodeCache.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        Geolocator.clear_memory()
+
+        with patch.object(GazetteerGeocoder, "geocode", return_value=(1.0, 2.0)) as geocode:
+            coordinates = Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv")
+
+        self.assertEqual(coordinates, (1.0, 2.0))
+        geocode.assert_called_once()
+        self.assertEqual(GeocodeCache.objects.get().result, [1.0, 2.0])
+
+    def test_failed_geocoding(self):
+        """Failed geocoding is not cached."""
+        with patch.object(GazetteerGeocoder, "geocode", side_effect=GeocoderError("timeout")):
+            self.assertIsNone(Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv"))
+
+        self.assertFalse(GeocodeCache.objects.exists())
+        self.assertEqual(
+            Geolocator.get_coordinates_by_address("Svobody Ave, 1, Lviv"),
+            (49.842957, 24.031111),
+        )
+
+    def test_reverse(self):
+        """Coordinates are reversed into the nearest known address."""
+        self.assertEqual(
+            Geolocator.get_address_by_coordinates(50.45, 30.5234),
+            "Khreshchatyk St, 22, Kyiv",
+        )
+        self.assertIsNone(Geolocator.get_address_by_coordinates(0, 0))
+
+
+class BusinessGeocodingTest(GeocodingTestCase):
+    """Tests for background geocoding of business locations."""
+
+    def setUp(self) -> None:
+        """Create an owner with a business."""
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.groups = GroupFactory.groups_for_test()
+        self.owner = CustomUserFactory.create()
+        self.groups.owner.user_set.add(self.owner)
+        self.business = BusinessFactory.create(owner=self.owner)
+
+    def create_business(self, location):
+        """Post a business with the location, return its saved location."""
+        self.client.force_authenticate(user=self.owner)
+        data = {
+            "name": faker.word(),
+            "business_type": faker.word(),
+            "description": faker.text(),
+            "location": location,
+            **self.business.working_time,
+        }
+
+        with patch("api.tasks.geocode_locations.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("api:businesses-list-create"), data, format="json",
+                )
+
+        self.assertEqual(response.status_code, 201)
+        self.delay = delay
+        return Business.objects.get(name=data["name"]).location
+
+    def test_create_pending(self):
+        """Business with invalid coordinates is created pending geocoding."""
+        location = self.create_business(
+            {"address": "Svobody Ave, 1, Lviv", "latitude": 0, "longitude": 0},
+        )
+
+        self.assertEqual(location.geocode_status, Location.GeocodeStatusChoices.PENDING)
+        self.assertIsNone(location.latitude)
+        self.delay.assert_called_once_with()
+
+    def test_create_with_coordinates(self):
+        """Business with valid coordinates is not geocoded."""
+        location = self.create_business(
+            {"address": "Somewhere", "latitude": -33.8688, "longitude": 151.2093},
+        )
+
+        self.assertEqual(location.geocode_status, Location.GeocodeStatusChoices.READY)
+        self.assertEqual(float(location.longitude), 151.2093)
+        self.delay.assert_not_called()
+
+    def test_geocode_locations(self):
+        """Task sets coordinates of pending locations and marks unknown addresses."""
+        known = self.create_business({"address": "Svobody Ave, 1, Lviv"})
+        unknown = self.create_business({"address": "Nowhere"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            geocode_locations.apply()
+
+        known.refresh_from_db()
+        unknown.refresh_from_db()
+        self.assertEqual(known.geocode_status, Location.GeocodeStatusChoices.READY)
+        self.assertEqual((float(known.latitude), float(known.longitude)), (49.842957, 24.031111))
+        self.assertEqual(known.geohash, encode_geohash(49.842957, 24.031111))
+        self.assertEqual(unknown.geocode_status, Location.GeocodeStatusChoices.NOT_FOUND)
+
+    @override_settings(GEOCODE_BATCH_SIZE=1)
+    def test_next_batch(self):
+        """Task geocodes one batch and schedules the next one."""
+        first = self.create_business({"address": "Svobody Ave, 1, Lviv"})
+        second = self.create_business({"address": "Khreshchatyk St, 22, Kyiv"})
+
+        with patch("api.tasks.geocode_locations.delay") as delay:
+            geocode_locations.apply()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.geocode_status, Location.GeocodeStatusChoices.READY)
+        self.assertEqual(second.geocode_status, Location.GeocodeStatusChoices.PENDING)
+        delay.assert_called_once_with()
+
+    def test_locked(self):
+        """Task is skipped while another task geocodes locations."""
+        location = self.create_business({"address": "Svobody Ave, 1, Lviv"})
+        cache.add(GEOCODE_LOCK_KEY, True)
+
+        geocode_locations.apply()
+
+        location.refresh_from_db()
+        self.assertEqual(location.geocode_status, Location.GeocodeStatusChoices.PENDING)
+
+    def test_failed_geocoding(self):
+        """Task is retried if the geocoder fails and locations stay pending."""
+        location = self.create_business({"address": "Svobody Ave, 1, Lviv"})
+
+        with patch.object(GazetteerGeocoder, "geocode",
+                          side_effect=GeocoderError("timeout")) as geocode:
+            geocode_locations.apply()
+
+        self.assertEqual(geocode.call_count, geocode_locations.max_retries + 1)
+        location.refresh_from_db()
+        self.assertEqual(location.geocode_status, Location.GeocodeStatusChoices.PENDING)
+        self.assertIsNone(cache.get(GEOCODE_LOCK_KEY))
+
+    def test_nearest_skips_pending(self):
+        """Nearest businesses search skips locations waiting for geocoding."""
+        pending = self.create_business({"address": "Svobody Ave, 1, Lviv"}).businesses
+        business = BusinessFactory(
+            location=LocationFactory(latitude=49.841000, longitude=24.030000),
+        )
+
+        response = self.client.get(
+            reverse("api:businesses-list-nearest-radius", kwargs={"lat": 49.84, "lon": 24.03}),
+        )
+
+        self.assertEqual(response.status_code, 200)
+        found = [item["id"] for item in response.data["results"]]
+        self.assertEqual(found[0], business.id)
+        self.assertNotIn(pending.id, found)
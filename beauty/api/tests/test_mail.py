@@ -0,0 +1,211 @@
+"""This module is for testing queued email delivery.
+
+Tests for QueuedEmailBackend:
+- Request handler queues emails instead of sending them;
+- Delivery task is scheduled once for many emails;
+- Queued emails are delivered with their HTML alternatives;
+- Failed emails are retried and then marked failed;
+- Emails left sending by a dead worker are queued again.
+
+Tests for delivery over SMTP:
+- Batches of emails are sent over one reused SMTP connection;
+- Connection closed by the server is reopened.
+"""
+
+import smtplib
+import socketserver
+from datetime import timedelta
+from threading import Thread
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import OutgoingEmail
+from api.tasks import send_queued_emails
+from beauty.mail import DeliveryConnection
+
+
+def queue_email(subject="Subject", to="customer@example.com"):
+    """Queue an email with the HTML alternative."""
+    message = EmailMultiAlternatives(subject, "Text", "beauty@example.com", [to])
+    message.attach_alternative("<p>Text</p>", "text/html")
+    message.send()
+
+
+@override_settings(
+    EMAIL_BACKEND="beauty.mail.QueuedEmailBackend",
+    MAIL_DELIVERY_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class QueuedEmailBackendTest(TestCase):
+    """Tests for queueing and delivery of emails."""
+
+    def setUp(self) -> None:
+        """Forget scheduled deliveries and the pooled connection."""
+        cache.clear()
+        DeliveryConnection.close()
+
+    def test_request_queues_emails(self):
+        """Request handler queues emails instead of sending them."""
+        data = {"name": "Customer", "email": "customer@example.com", "message": "Hello"}
+
+        with patch("api.tasks.send_queued_emails.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = APIClient().post(reverse("api:contact-form"), data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(
+            OutgoingEmail.objects.filter(status=OutgoingEmail.StatusChoices.QUEUED).count(), 2,
+        )
+        delay.assert_called_once_with()
+
+    def test_delivery_scheduled_once(self):
+        """Delivery task is scheduled once for many emails."""
+        with patch("api.tasks.send_queued_emails.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                for number in range(3):
+                    queue_email(subject=f"Subject {number}")
+            with self.captureOnCommitCallbacks(execute=True):
+                send_mail("Subject", "Text", "beauty@example.com", ["owner@example.com"])
+
+        delay.assert_called_once_with()
+
+    def test_delivery(self):
+        """Queued emails are delivered with their HTML alternatives."""
+        queue_email()
+
+        send_queued_emails.apply()
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.StatusChoices.SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["customer@example.com"])
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Text</p>", "text/html")])
+
+    @override_settings(MAIL_MAX_ATTEMPTS=2, MAIL_RETRY_DELAY=0)
+    def test_failed_delivery(self):
+        """Failed emails are retried and then marked failed."""
+        queue_email()
+        error = smtplib.SMTPRecipientsRefused({})
+
+        with patch.object(DeliveryConnection, "send", side_effect=error):
+            send_queued_emails.apply()
+            self.assertEqual(OutgoingEmail.objects.get().status,
+                             OutgoingEmail.StatusChoices.QUEUED)
+
+            send_queued_emails.apply()
+
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.StatusChoices.FAILED)
+        self.assertEqual(email.attempts, 2)
+        self.assertTrue(email.error)
+        self.assertEqual(mail.outbox, [])
+
+    def test_stale_sending(self):
+        """Emails left sending by a dead worker are queued again."""
+        queue_email()
+        OutgoingEmail.objects.update(
+            status=OutgoingEmail.StatusChoices.SENDING,
+            updated_at=timezone.now() - timedelta(days=1),
+        )
+
+        send_queued_emails.apply()
+
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.StatusChoices.SENT)
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server session which counts connections and messages."""
+
+    def reply(self, line):
+        """Send the reply line to the client."""
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        """Answer SMTP commands until the client quits."""
+        self.server.connections += 1
+        self.reply("220 stub")
+        for line in self.rfile:
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 stub")
+            elif command.startswith(("MAIL", "RCPT", "RSET", "NOOP")):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+
+class SMTPDeliveryTest(TestCase):
+    """Tests for delivery over a local SMTP stub."""
+
+    def setUp(self) -> None:
+        """Start SMTP stub and deliver queued emails to it."""
+        cache.clear()
+        DeliveryConnection.close()
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), SMTPStubHandler)
+        self.server.daemon_threads = True
+        self.server.connections = self.server.messages = 0
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+        settings_override = override_settings(
+            EMAIL_BACKEND="beauty.mail.QueuedEmailBackend",
+            MAIL_DELIVERY_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            MAIL_BATCH_SIZE=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def tearDown(self) -> None:
+        """Close the pooled connection and stop SMTP stub."""
+        DeliveryConnection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        """Batches of emails are sent over one reused SMTP connection."""
+        for number in range(5):
+            queue_email(to=f"customer{number}@example.com")
+
+        with patch("api.tasks.send_queued_emails.delay", side_effect=send_queued_emails):
+            send_queued_emails.apply()
+
+        self.assertEqual(self.server.messages, 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.StatusChoices.SENT))
+
+    def test_reconnect(self):
+        """Connection closed by the server is reopened."""
+        queue_email()
+        send_queued_emails.apply()
+
+        DeliveryConnection.get().connection.close()
+        queue_email()
+        send_queued_emails.apply()
+
+        self.assertEqual(self.server.messages, 2)
+        self.assertEqual(self.server.connections, 2)
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.StatusChoices.SENT))
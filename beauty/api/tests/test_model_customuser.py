@@ -0,0 +1,47 @@
+"""This module is for testing CustomUser model.
+
+Tests for CustomUser roles:
+- Roles are loaded with one query;
+- Roles are taken from prefetched groups;
+- Roles are reset after groups of the user are changed.
+"""
+
+from django.test import TestCase
+
+from api.models import CustomUser
+from .factories import CustomUserFactory, GroupFactory
+
+
+class CustomUserRolesTest(TestCase):
+    """Tests for roles of CustomUser."""
+
+    def setUp(self) -> None:
+        """Create groups and a user."""
+        self.groups = GroupFactory.groups_for_test()
+        self.user = CustomUserFactory(groups=[self.groups.owner])
+        self.user = CustomUser.objects.get(pk=self.user.pk)
+
+    def test_roles_loaded_once(self):
+        """Roles are loaded with one query."""
+        with self.assertNumQueries(1):
+            self.assertTrue(self.user.is_owner)
+            self.assertFalse(self.user.is_specialist)
+            self.assertFalse(self.user.is_customer)
+            self.assertTrue(self.user.is_owner)
+
+    def test_prefetched_roles(self):
+        """Roles are taken from prefetched groups."""
+        user = CustomUser.objects.prefetch_related("groups").get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.roles, {"Owner"})
+
+    def test_roles_reset(self):
+        """Roles are reset after groups of the user are changed."""
+        self.assertFalse(self.user.is_specialist)
+
+        self.user.groups.add(self.groups.specialist)
+        self.assertTrue(self.user.is_specialist)
+
+        self.user.groups.remove(self.groups.owner)
+        self.assertFalse(self.user.is_owner)
@@ -6,16 +6,21 @@ Test includes:
 - Reduce time in different day then order;
 - Reduce working time in day, when order is;
 - Change day to weekend when order is;
+- Job cancels orders in batches and moves them in rollups;
+- Job skips past and already cancelled orders;
+- Progress of the job is shown to the owner only.
 """
 import calendar
 import pytz
 from django.core import mail
 from django.utils.timezone import localtime
 from datetime import (date, datetime, timedelta)
-from django.test import TestCase
+from unittest.mock import patch
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
-from api.models import Business
+from api.models import Business, Order, OrderRollup, WorkingTimeJob
+from api.tasks import apply_working_time
 from beauty.settings import EMAIL_HOST_USER, TIME_ZONE
 from beauty.utils import string_to_time, time_to_string
 from .factories import (BusinessFactory,
@@ -66,6 +71,23 @@ class TestUpdateWorkingTime(TestCase):
         self.client = APIClient()
         self.client.force_authenticate(user=self.business.owner)
 
+    def reduce_working_time(self, data):
+        """Patch working time and run the started job after commit."""
+        with patch("api.tasks.apply_working_time.delay", side_effect=apply_working_time):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(path=self.url, data=data, format="json")
+        return response
+
+    def closing_order_day(self):
+        """Return working time which closes before the order ends."""
+        changed_time = localtime(self.order.start_time + timedelta(seconds=10 * 60)).time()
+        return {
+            self.weekday: [
+                time_to_string(changed_time),
+                self.business.working_time[self.weekday][1],
+            ],
+        }
+
     def test_patch_specific_day(self):
         """Patch only one day."""
         changed_time = (self.order.start_time - timedelta(seconds=10 * 60)).time()
@@ -110,10 +132,7 @@ class TestUpdateWorkingTime(TestCase):
                 self.business.working_time[self.weekday][1],
             ],
         }
-        response = self.client.patch(
-            path=self.url,
-            data=data,
-        )
+        response = self.reduce_working_time(data)
         self.assertEqual(len(Business.objects.all()[0].working_time), 7)
         self.assertListEqual(
             [self.order.customer.email, self.specialist.email],
@@ -124,16 +143,20 @@ class TestUpdateWorkingTime(TestCase):
             mail.outbox[0].from_email,
         )
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["working_time_job"]["status"], "Pending")
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.StatusChoices.CANCELLED)
+        job = WorkingTimeJob.objects.get()
+        self.assertEqual(job.status, WorkingTimeJob.StatusChoices.DONE)
+        self.assertEqual((job.orders_cancelled, job.emails_sent), (1, 1))
 
     def test_patch_weekend_order_day(self):
         """Patch adn reduce time not in order day."""
         data = {
             self.weekday: [],
         }
-        response = self.client.patch(
-            path=self.url,
-            data=data,
-        )
+        response = self.reduce_working_time(data)
         self.assertEqual(len(Business.objects.all()[0].working_time), 7)
         self.assertListEqual(
             [self.order.customer.email, self.specialist.email],
@@ -144,3 +167,68 @@ class TestUpdateWorkingTime(TestCase):
             mail.outbox[0].from_email,
         )
         self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["working_time_job"]["status"], "Pending")
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.StatusChoices.CANCELLED)
+        job = WorkingTimeJob.objects.get()
+        self.assertEqual(job.status, WorkingTimeJob.StatusChoices.DONE)
+        self.assertEqual((job.orders_cancelled, job.emails_sent), (1, 1))
+
+    @override_settings(WORKING_TIME_JOB_BATCH_SIZE=1)
+    def test_job_batches(self):
+        """Job cancels orders in batches and moves them in rollups."""
+        OrderFactory.create(
+            specialist=self.specialist,
+            service=self.service,
+            start_time=self.order.start_time + timedelta(days=7),
+        )
+
+        self.reduce_working_time(self.closing_order_day())
+
+        job = WorkingTimeJob.objects.get()
+        self.assertEqual((job.orders_cancelled, job.emails_sent), (2, 2))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(Order.objects.exclude(status=Order.StatusChoices.CANCELLED).exists())
+        self.assertFalse(OrderRollup.objects.filter(
+            status=Order.StatusChoices.ACTIVE, count__gt=0,
+        ).exists())
+        self.assertListEqual(
+            [rollup.count for rollup in OrderRollup.objects.filter(
+                status=Order.StatusChoices.CANCELLED,
+            )],
+            [1, 1],
+        )
+
+    def test_job_skips_past_orders(self):
+        """Job skips past and already cancelled orders."""
+        Order.objects.filter(pk=self.order.pk).update(
+            start_time=self.order.start_time - timedelta(days=364),
+        )
+        cancelled = OrderFactory.create(
+            specialist=self.specialist,
+            service=self.service,
+            start_time=self.order.start_time + timedelta(days=7),
+        )
+        cancelled.mark_as_cancelled()
+
+        self.reduce_working_time(self.closing_order_day())
+
+        self.assertEqual(WorkingTimeJob.objects.get().orders_cancelled, 0)
+        self.assertEqual(mail.outbox, [])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.StatusChoices.ACTIVE)
+
+    def test_job_progress(self):
+        """Progress of the job is shown to the owner only."""
+        with patch("api.tasks.apply_working_time.delay"):
+            response = self.client.patch(path=self.url, data=self.closing_order_day(),
+                                         format="json")
+        job_url = response.data["working_time_job"]["job_url"]
+
+        response = self.client.get(job_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "Pending")
+
+        self.client.force_authenticate(user=self.specialist)
+        self.assertEqual(self.client.get(job_url).status_code, 403)
@@ -0,0 +1,85 @@
+"""This module is for testing denormalised business of orders.
+
+Tests for Order.business:
+- Business is copied from the service on creation;
+- Business follows reassigned service of the order;
+- Business follows a service or a position moved to another business;
+- Command fills business of existing orders;
+- Business orders are queried without joins.
+"""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Order
+from .factories import BusinessFactory, OrderFactory, PositionFactory, ServiceFactory
+
+
+class OrderBusinessTest(TestCase):
+    """Class with tests for denormalised Order.business."""
+
+    def setUp(self):
+        """Create an order and a service of another business."""
+        self.order = OrderFactory()
+        self.business = self.order.service.position.business
+        self.other_service = ServiceFactory()
+        self.other_business = self.other_service.position.business
+
+    def test_created(self):
+        """Business is copied from the service on creation."""
+        self.assertEqual(self.order.business, self.business)
+
+        orders = Order.objects.create_many([
+            Order(
+                service=self.other_service,
+                specialist=self.order.specialist,
+                customer=self.order.customer,
+                start_time=self.order.start_time + timedelta(days=1),
+            ),
+        ])
+        self.assertEqual(Order.objects.get(pk=orders[0].pk).business, self.other_business)
+
+    def test_service_reassigned(self):
+        """Business follows reassigned service of the order."""
+        self.order.service = self.other_service
+        self.order.save()
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.business, self.other_business)
+
+    def test_moved(self):
+        """Business follows a service or a position moved to another business."""
+        service = self.order.service
+        service.position = self.other_service.position
+        service.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.business, self.other_business)
+
+        position = service.position
+        position.business = BusinessFactory()
+        position.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.business, position.business)
+
+    def test_backfill(self):
+        """Command fills business of existing orders."""
+        Order.objects.update(business=None)
+
+        stdout = StringIO()
+        call_command("backfill_order_business", batch_size=1, stdout=stdout)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.business, self.business)
+        self.assertIn("Updated business of 1 orders", stdout.getvalue())
+
+    def test_without_joins(self):
+        """Business orders are queried without joins."""
+        orders = self.business.get_orders_by_date(timezone.localdate() - timedelta(days=1))
+
+        self.assertNotIn("JOIN", str(orders.query))
+        self.assertEqual(list(orders), [self.order])
+        self.assertNotIn("JOIN", str(PositionFactory().business.orders.all().query))
@@ -0,0 +1,43 @@
+"""This module is for testing the 'order_query_plans' command.
+
+Tests for order_query_plans:
+- Plans and timings are shown before and after indexes, the database is left as it was;
+- Command fails without orders.
+"""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from api.models import Order
+from .factories import OrderFactory
+
+
+class OrderQueryPlansTest(TestCase):
+    """Class with tests for the 'order_query_plans' command."""
+
+    def test_plans(self):
+        """Plans and timings are shown before and after indexes, the database is left as it was."""
+        OrderFactory.create_batch(2)
+        stdout = StringIO()
+
+        call_command("order_query_plans", orders=50, repeat=1, stdout=stdout)
+
+        output = stdout.getvalue()
+        self.assertIn("Overlapping orders", output)
+        self.assertEqual(output.count("Before: "), 7)
+        self.assertEqual(output.count("After: "), 7)
+        self.assertIn("order_customer_start_idx", output)
+        self.assertEqual(Order.objects.count(), 2)
+
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(cursor, Order._meta.db_table)
+        self.assertIn("order_busy_specialist_idx", indexes)
+
+    def test_no_orders(self):
+        """Command fails without orders."""
+        with self.assertRaises(CommandError):
+            call_command("order_query_plans", stdout=StringIO())
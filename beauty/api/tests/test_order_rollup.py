@@ -0,0 +1,151 @@
+"""This module is for testing daily order rollups.
+
+Tests for OrderRollup:
+- Created order is added to the rollup of its day.
+- Changed order status moves order between rollups.
+- Changed order start time moves order to another day.
+- Deleted order is subtracted from the rollup.
+- Order is moved with the price it was booked with after the service price changed.
+- Rebuild command recalculates rollups from orders.
+- Rebuild command fills prices of orders booked before prices were stored.
+"""
+
+from datetime import datetime, time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from pytz import timezone
+
+from api.models import Order, OrderRollup
+from api.tests.factories import (
+    BusinessFactory, CustomUserFactory, OrderFactory, PositionFactory, ServiceFactory,
+)
+from beauty.settings import TIME_ZONE
+
+
+CET = timezone(TIME_ZONE)
+
+
+class OrderRollupTest(TestCase):
+    """Class with tests for OrderRollup."""
+
+    def setUp(self) -> None:
+        """Set up required objects for tests."""
+        self.specialist = CustomUserFactory.create()
+        self.customer = CustomUserFactory.create()
+        self.business = BusinessFactory.create()
+        self.position = PositionFactory.create(business=self.business)
+        self.service = ServiceFactory.create(position=self.position)
+        self.day = datetime.now().date() + timedelta(days=1)
+        self.start_time = CET.localize(datetime.combine(self.day, time(hour=10)))
+
+        self.order = OrderFactory.create(
+            customer=self.customer, specialist=self.specialist,
+            service=self.service, start_time=self.start_time,
+        )
+
+    def get_rollup(self, **kwargs):
+        """Return rollup of the test order with given lookups."""
+        return OrderRollup.objects.get(
+            business=self.business, specialist=self.specialist,
+            service=self.service, **kwargs,
+        )
+
+    def test_order_created(self):
+        """Test if created order is added to the rollup."""
+        rollup = self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE)
+
+        self.assertEqual(rollup.count, 1)
+        self.assertEqual(rollup.revenue, self.service.price)
+
+    def test_order_status_changed(self):
+        """Test if order with changed status is moved to another rollup."""
+        self.order.mark_as_completed()
+
+        active = self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE)
+        completed = self.get_rollup(day=self.day, status=Order.StatusChoices.COMPLETED)
+
+        self.assertEqual(active.count, 0)
+        self.assertEqual(completed.count, 1)
+        self.assertEqual(completed.revenue, self.service.price)
+
+    def test_order_start_time_changed(self):
+        """Test if order with changed start time is moved to another day."""
+        order = Order.objects.get(pk=self.order.pk)
+        order.start_time += timedelta(days=1)
+        order.save()
+
+        self.assertEqual(
+            self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE).count, 0,
+        )
+        self.assertEqual(
+            self.get_rollup(
+                day=self.day + timedelta(days=1), status=Order.StatusChoices.ACTIVE,
+            ).count,
+            1,
+        )
+
+    def test_order_deleted(self):
+        """Test if deleted order is subtracted from the rollup."""
+        self.order.delete()
+        rollup = self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE)
+
+        self.assertEqual(rollup.count, 0)
+        self.assertEqual(rollup.revenue, 0)
+
+    def test_service_price_changed(self):
+        """Test if order is moved with the booked price after the service price changed."""
+        booked_price = self.service.price
+        other_order = OrderFactory.create(
+            customer=self.customer, specialist=self.specialist,
+            service=self.service, start_time=self.start_time + timedelta(hours=2),
+        )
+        self.service.price = booked_price + 30
+        self.service.save()
+
+        Order.objects.get(pk=self.order.pk).mark_as_completed()
+        Order.objects.cancel_many(
+            list(Order.objects.select_related("service__position").filter(pk=other_order.pk)),
+        )
+
+        active = self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE)
+        completed = self.get_rollup(day=self.day, status=Order.StatusChoices.COMPLETED)
+        cancelled = self.get_rollup(day=self.day, status=Order.StatusChoices.CANCELLED)
+
+        self.assertEqual((active.count, active.revenue), (0, 0))
+        self.assertEqual((completed.count, completed.revenue), (1, booked_price))
+        self.assertEqual((cancelled.count, cancelled.revenue), (1, booked_price))
+
+    def test_rebuild_command(self):
+        """Test if rebuild command recalculates rollups from orders."""
+        OrderFactory.create(
+            customer=self.customer, specialist=self.specialist,
+            service=self.service, start_time=self.start_time + timedelta(hours=2),
+        )
+        Order.objects.filter(pk=self.order.pk).update(
+            status=Order.StatusChoices.DECLINED,
+        )
+
+        call_command("rebuild_order_rollup", business=self.business.id, stdout=StringIO())
+
+        active = self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE)
+        declined = self.get_rollup(day=self.day, status=Order.StatusChoices.DECLINED)
+
+        self.assertEqual(OrderRollup.objects.count(), 2)
+        self.assertEqual(active.count, 1)
+        self.assertEqual(declined.count, 1)
+        self.assertEqual(declined.revenue, self.service.price)
+
+    def test_rebuild_command_fills_prices(self):
+        """Test if rebuild command fills prices of orders booked before prices were stored."""
+        Order.objects.update(price=None)
+
+        call_command("rebuild_order_rollup", stdout=StringIO())
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.price, self.service.price)
+        self.assertEqual(
+            self.get_rollup(day=self.day, status=Order.StatusChoices.ACTIVE).revenue,
+            self.service.price,
+        )
@@ -8,7 +8,12 @@ Tests for OrderCreateView:
 - Service of the order should not be empty;
 - Specialist of the order should not be empty;
 - Specialist should not be able to create order for himself;
-- Check calling change_order_status_to_decline task when order creates.
+- Check calling change_order_status_to_decline task when order creates;
+- Order overlapping an existing order of the specialist is not created;
+- Overlapping orders of one request are not created;
+- Order touching an existing order of the specialist is created;
+- Orders of one request are created with tokens and rollups;
+- Amount of queries doesn't depend on amount of orders in a request.
 
 Tests for OrderApprovingView:
 - SetUp method adds needed info for tests;
@@ -16,7 +21,9 @@ Tests for OrderApprovingView:
 - The specialist is redirected to the own page if he declined the order;
 - The specialist is redirected to the own page if the order token expired;
 - The user is redirected to the order specialist detail page if he is not logged;
-- Check calling reminder_for_customer task before start order.
+- Check calling reminder_for_customer task before start order;
+- Order is inserted together with its token;
+- Token of a deleted order doesn't fit the order booked again at the same time.
 
 Tests for OrderRetrieveCancelView:
 - SetUp method adds needed info for tests;
@@ -52,9 +59,11 @@ Tests for SpecialistOrdersViews:
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.db import connection
 from django.utils import timezone
 from django.conf import settings
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from djoser.utils import encode_uid
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.reverse import reverse
@@ -67,7 +76,7 @@ from .factories import (GroupFactory,
                         PositionFactory,
                         ServiceFactory,
                         OrderFactory)
-from api.models import Order
+from api.models import Order, OrderRollup
 from beauty.utils import string_to_time
 from api.views.schedule import get_working_day
 
@@ -87,7 +96,9 @@ class TestOrderCreateView(TestCase):
         self.specialist = CustomUserFactory(first_name="UserSpecialist")
         self.customer = CustomUserFactory(first_name="UserCustomer")
         self.position = PositionFactory(name="Position_1", working_time=self.working_time)
-        self.service = ServiceFactory(name="Service_1", position=self.position)
+        self.service = ServiceFactory(
+            name="Service_1", position=self.position, duration=timedelta(minutes=30),
+        )
 
         self.groups.specialist.user_set.add(self.specialist)
         self.groups.customer.user_set.add(self.customer)
@@ -153,6 +164,86 @@ class TestOrderCreateView(TestCase):
         self.client.post(path=reverse("api:order-create"), data=self.data)
         self.assertTrue(mock_task.called)
 
+    @patch("api.tasks.change_order_status_to_decline.apply_async")
+    def test_overlapping_order(self, mock_task):
+        """Order overlapping an existing order of the specialist is not created."""
+        OrderFactory(
+            specialist=self.specialist,
+            service=self.service,
+            start_time=timezone.make_aware(self.start_time) - timedelta(minutes=5),
+        )
+
+        response = self.client.post(path=reverse("api:order-create"), data=self.data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("start_time", response.data)
+        self.assertFalse(mock_task.called)
+
+    @patch("api.tasks.change_order_status_to_decline.apply_async")
+    def test_overlapping_orders_in_request(self, mock_task):
+        """Overlapping orders of one request are not created."""
+        response = self.client.post(path=reverse("api:order-create"), data=self.data * 2)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.filter(specialist=self.specialist).exists())
+
+    @patch("api.tasks.change_order_status_to_decline.apply_async")
+    def test_touching_order(self, mock_task):
+        """Order touching an existing order of the specialist is created."""
+        OrderFactory(
+            specialist=self.specialist,
+            service=self.service,
+            start_time=timezone.make_aware(self.start_time) - self.service.duration,
+        )
+
+        response = self.client.post(path=reverse("api:order-create"), data=self.data)
+
+        self.assertEqual(response.status_code, 201)
+
+    def get_orders_data(self, amount):
+        """Return data of orders, following each other."""
+        return [
+            {"start_time": self.start_time + self.service.duration * number,
+             "specialist": self.specialist.id,
+             "service": self.service.id}
+            for number in range(amount)
+        ]
+
+    @patch("api.tasks.send_message_for_specialist_consideration.apply_async")
+    @patch("api.tasks.change_order_status_to_decline.apply_async")
+    def test_many_orders(self, mock_decline, mock_message):
+        """Orders of one request are created with tokens and rollups."""
+        response = self.client.post(path=reverse("api:order-create"),
+                                    data=self.get_orders_data(3))
+
+        orders = Order.objects.filter(specialist=self.specialist)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(orders.count(), 3)
+        self.assertFalse(orders.filter(token=None).exists())
+        self.assertEqual(OrderRollup.objects.get(specialist=self.specialist).count, 3)
+        self.assertEqual(mock_decline.call_count, 3)
+        self.assertEqual(mock_message.call_count, 3)
+
+    @patch("api.tasks.send_message_for_specialist_consideration.apply_async")
+    @patch("api.tasks.change_order_status_to_decline.apply_async")
+    def test_many_orders_queries(self, *mock_tasks):
+        """Amount of queries doesn't depend on amount of orders in a request."""
+        self.client.post(path=reverse("api:order-create"), data=self.get_orders_data(1))
+        Order.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as one_order:
+            self.client.post(path=reverse("api:order-create"), data=self.get_orders_data(1))
+
+        Order.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as many_orders:
+            response = self.client.post(path=reverse("api:order-create"),
+                                        data=self.get_orders_data(5))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(many_orders), len(one_order))
+
 
 class TestOrderApprovingView(TestCase):
     """This class represents a Test case and has all the tests for OrderApprovingView."""
@@ -220,6 +311,31 @@ class TestOrderApprovingView(TestCase):
         self.client.get(path=reverse("api:order-approving", kwargs=self.url_kwargs))
         self.assertTrue(mock_reminder.called)
 
+    def test_order_is_saved_once(self):
+        """Order is inserted together with its token."""
+        order = Order(specialist=self.specialist, customer=self.customer, service=self.service,
+                      start_time=self.order.start_time + self.service.duration)
+
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+
+        order_writes = [query["sql"].split()[0] for query in queries.captured_queries
+                        if '"api_order" ' in query["sql"]]
+        self.assertEqual(order_writes, ["INSERT"])
+
+        order = Order.objects.get(pk=order.pk)
+        self.assertTrue(OrderApprovingTokenGenerator().check_token(order, order.token))
+
+    def test_token_of_rebooked_order(self):
+        """Token of a deleted order doesn't fit the order booked again at the same time."""
+        self.order.delete()
+        order = OrderFactory(specialist=self.specialist, customer=self.customer,
+                             service=self.service, start_time=self.order.start_time)
+
+        order = Order.objects.get(pk=order.pk)
+        self.assertFalse(OrderApprovingTokenGenerator().check_token(order, self.token))
+        self.assertTrue(OrderApprovingTokenGenerator().check_token(order, order.token))
+
 
 class TestOrderRetrieveCancelView(TestCase):
     """This class represents a Test case and has all the tests for OrderRetrieveCancelView."""
@@ -229,7 +345,9 @@ class TestOrderRetrieveCancelView(TestCase):
         self.specialist = CustomUserFactory(first_name="UserSpecialist")
         self.customer = CustomUserFactory(first_name="UserCustomer")
         self.position = PositionFactory(name="Position_1", specialist=[self.specialist])
-        self.service = ServiceFactory(name="Service_1", position=self.position)
+        self.service = ServiceFactory(
+            name="Service_1", position=self.position, duration=timedelta(minutes=30),
+        )
 
         self.order = OrderFactory(specialist=self.specialist, customer=self.customer)
 
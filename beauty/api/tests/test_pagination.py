@@ -0,0 +1,138 @@
+"""This module is for testing keyset pagination.
+
+Tests for KeysetPagination:
+- Pages follow each other by cursors in both directions with ties ordered by id;
+- Deep pages are selected without OFFSET and count;
+- Broken cursors and cursors of another ordering are rejected;
+- Orderings which are not concrete fields of the model are rejected;
+- Offset requests are paginated as before;
+- Page size is limited;
+- Reviews are linked in the Link header.
+"""
+
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.models import Review, Service
+from api.pagination import KeysetPagination
+from .factories import CustomUserFactory, ReviewFactory, ServiceFactory
+
+
+class KeysetPaginationTest(TestCase):
+    """Class with tests for keyset pagination of services and reviews."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create services with repeated prices."""
+        position = ServiceFactory().position
+        for price in (10, 20, 20, 20, 30, 40, 40, 50):
+            ServiceFactory(position=position, price=price)
+        cls.url = reverse("api:service-list-create")
+
+    def setUp(self):
+        """Set up an anonymous client."""
+        self.client = APIClient()
+
+    def walk(self, url, link):
+        """Return ids of all pages following the link from the url."""
+        ids = []
+        while url:
+            data = self.client.get(url).data
+            ids.append([service["id"] for service in data["results"]])
+            url = data[link]
+        return ids
+
+    def test_pages(self):
+        """Pages follow each other by cursors in both directions with ties ordered by id."""
+        expected = list(
+            Service.objects.order_by("-price", "-id").values_list("id", flat=True),
+        )
+
+        pages = self.walk(f"{self.url}?ordering=-price&limit=2", "next")
+        self.assertEqual([service_id for page in pages for service_id in page], expected)
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 2, 1])
+
+        last_page = self.client.get(f"{self.url}?ordering=-price&limit=2").data
+        while last_page["next"]:
+            last_page = self.client.get(last_page["next"]).data
+        back = self.walk(last_page["previous"], "previous")
+        self.assertEqual([service_id for page in back[::-1] for service_id in page], expected[:8])
+
+    def test_deep_page(self):
+        """Deep pages are selected without OFFSET and count."""
+        first = self.client.get(f"{self.url}?ordering=price&limit=3").data
+        self.assertEqual(first["count"], 9)
+
+        with self.assertNumQueries(1) as queries:
+            second = self.client.get(first["next"]).data
+        self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"])
+        self.assertNotIn("count", second)
+        self.assertEqual(len(second["results"]), 3)
+
+    def test_invalid_cursor(self):
+        """Broken cursors and cursors of another ordering are rejected."""
+        response = self.client.get(f"{self.url}?cursor=broken")
+        self.assertEqual(response.status_code, 404)
+
+        cursor = self.client.get(f"{self.url}?ordering=price&limit=2").data["next"]
+        response = self.client.get(cursor.replace("ordering=price", "ordering=name"))
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_ordering(self):
+        """Orderings which are not concrete fields of the model are rejected."""
+        request = Request(APIRequestFactory().get(f"{self.url}?limit=2"))
+        querysets = (
+            Service.objects.order_by("position__name"),
+            Service.objects.annotate(position_name=F("position__name")).order_by("position_name"),
+            Service.objects.order_by(F("price").desc()),
+        )
+        for queryset in querysets:
+            with self.subTest(ordering=queryset.query.order_by), self.assertRaises(ValidationError):
+                KeysetPagination().paginate_queryset(queryset, request)
+
+        services = KeysetPagination().paginate_queryset(
+            Service.objects.order_by("-position"), request,
+        )
+        self.assertEqual(len(services), 2)
+
+    def test_offset(self):
+        """Offset requests are paginated as before."""
+        data = self.client.get(f"{self.url}?limit=2&offset=4").data
+
+        self.assertEqual(data["count"], 9)
+        self.assertIn("offset=6", data["next"])
+        self.assertEqual(len(data["results"]), 2)
+
+    def test_max_page_size(self):
+        """Page size is limited."""
+        ServiceFactory.create_batch(100, position=Service.objects.first().position)
+
+        data = self.client.get(f"{self.url}?limit=1000").data
+
+        self.assertEqual(len(data["results"]), 100)
+        self.assertIsNotNone(data["next"])
+
+    def test_reviews_link(self):
+        """Reviews are linked in the Link header."""
+        to_user = CustomUserFactory()
+        ReviewFactory.create_batch(3, to_user=to_user)
+        Review.objects.update(date_of_publication=timezone.now() - timedelta(days=1))
+        url = reverse("api:review-get", kwargs={"to_user": to_user.id})
+        client = APIClient()
+        client.force_authenticate(user=to_user)
+
+        first = client.get(f"{url}?limit=2")
+        self.assertEqual(len(first.data), 2)
+        next_url = first["Link"].split(">")[0].lstrip("<")
+
+        second = client.get(next_url)
+        self.assertEqual(len(second.data), 1)
+        self.assertNotIn(second.data[0]["id"], [review["id"] for review in first.data])
+        self.assertIn('rel="prev"', second["Link"])
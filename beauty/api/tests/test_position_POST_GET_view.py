@@ -103,7 +103,7 @@ class TestPositionListCreateView(TestCase):
         """Owner cannot create position if working time is invalid."""
         self.client.force_authenticate(user=self.owner)
 
-        self.valid_data["Mon"] = ["10:00", "9:00"]
+        self.valid_data["Mon"] = ["10:00", "09:00"]
         response = self.client.post(
             path=self.url,
             data=self.valid_data,
@@ -6,6 +6,7 @@ from django.core import mail
 from rest_framework.test import APIClient
 from rest_framework.reverse import reverse
 from api.models import Invitation
+from beauty.tokens import SpecialistInviteTokenGenerator
 from .factories import (CustomUserFactory,
                         PositionFactory,
                         GroupFactory)
@@ -138,3 +139,25 @@ class TestInvitePosition(TestCase):
         self.assertIn(email_for_register, mail.outbox[0].to)
         self.assertIn(self.position.name, mail.outbox[0].subject)
         self.assertIn(self.invitation.token, mail.outbox[0].html)
+
+    def test_invitation_is_saved_once(self):
+        """Invitation is inserted together with its token."""
+        invitation = Invitation(email=self.specialist.email, position=self.position)
+
+        with self.assertNumQueries(1):
+            invitation.save()
+
+        invitation = Invitation.objects.get(pk=invitation.pk)
+        self.assertTrue(SpecialistInviteTokenGenerator().check_token(invitation, invitation.token))
+
+    def test_token_of_declined_invitation(self):
+        """Token of a declined invitation doesn't fit the email invited again."""
+        invitation = Invitation.objects.create(email=self.specialist.email, position=self.position)
+        token = invitation.token
+        invitation.delete()
+
+        invitation = Invitation.objects.create(email=self.specialist.email, position=self.position)
+
+        invitation = Invitation.objects.get(pk=invitation.pk)
+        self.assertFalse(SpecialistInviteTokenGenerator().check_token(invitation, token))
+        self.assertTrue(SpecialistInviteTokenGenerator().check_token(invitation, invitation.token))
@@ -0,0 +1,353 @@
+"""This module is a query budget harness for API endpoints.
+
+Every route of api/urls.py is requested with realistic amounts of data.
+Amount of queries of every request is checked against the endpoint budget
+and written with wall time to the JSON report if QUERY_BUDGET_REPORT setting
+is set, so reports can be compared between commits to find N+1 regressions.
+Wall time is checked only when QUERY_BUDGET_TIME_LIMIT setting is set, as
+it depends on the machine.
+
+Tests for API endpoints:
+- Every route of the api app has a query budget;
+- Requests fit into query budgets and the optional time limit;
+- Amount of queries of list endpoints doesn't depend on the page size.
+"""
+
+import json
+import time
+from collections import namedtuple
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+from djoser.utils import encode_uid
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Invitation, WorkingTimeJob
+from .factories import (BusinessFactory, CustomUserFactory, GroupFactory, OrderFactory,
+                        PositionFactory, ReviewFactory, ServiceFactory)
+
+
+EndpointRequest = namedtuple(
+    "EndpointRequest", ["name", "kwargs", "user", "method", "data", "params"],
+    defaults=["get", None, None],
+)
+
+# Maximal amount of queries of a request to the endpoint.
+QUERY_BUDGETS = {
+    "user-list-create": 6,
+    "user-detail": 6,
+    "specialist-detail": 2,
+    "specialist-list": 3,
+    "user-order-detail": 4,
+    "customer-orders-list": 4,
+    "specialist-orders-list": 4,
+    "order-create": 16,
+    "order-detail": 7,
+    "order-approving": 16,
+    "businesses-list-create": 4,
+    "businesses-list-active": 2,
+    "businesses-list-nearest": 2,
+    "businesses-list-nearest-radius": 2,
+    "business-detail": 7,
+    "business-working-time-job": 2,
+    "location-create": 2,
+    "location-detail": 2,
+    "position-list": 4,
+    "position-detail-list": 6,
+    "position-delete-specialist": 9,
+    "position-add-specialist": 7,
+    "position-approve": 17,
+    "register-invite": 18,
+    "review-add": 5,
+    "review-get": 3,
+    "review-detail": 3,
+    "service-list-create": 4,
+    "service-detail": 2,
+    "specialist-schedule": 8,
+    "owner-specialist-schedule": 8,
+    "service-availability": 4,
+    "service-by-business": 5,
+    "service-by-specialist": 5,
+    "statistic-of-business": 7,
+    "contact-form": 0,
+}
+
+# Endpoints which return a page of objects.
+PAGINATED = {
+    "user-list-create",
+    "customer-orders-list",
+    "specialist-orders-list",
+    "businesses-list-create",
+    "businesses-list-active",
+    "businesses-list-nearest",
+    "businesses-list-nearest-radius",
+    "position-list",
+    "review-get",
+    "service-list-create",
+    "specialist-list",
+    "service-by-business",
+    "service-by-specialist",
+}
+
+# List endpoints with known N+1 problems. Their queries grow with the page
+# size, so they are only reported. Remove an endpoint after fixing it.
+PAGE_SIZE_DEPENDENT = set()
+
+PAGE_SIZES = (2, 10)
+OBJECTS_AMOUNT = 12
+
+
+@patch("api.tasks.reminder_for_customer.apply_async")
+@patch("api.tasks.send_message_for_specialist_consideration.apply_async")
+@patch("api.tasks.change_order_status_to_decline.apply_async")
+class QueryBudgetTest(TestCase):
+    """Query and time budgets of API endpoints."""
+
+    report = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        """Populate database with businesses, specialists, orders and reviews."""
+        cls.groups = GroupFactory.groups_for_test()
+        cls.owner = CustomUserFactory(is_active=True, groups=[cls.groups.owner])
+        cls.specialist = CustomUserFactory(is_active=True, groups=[cls.groups.specialist])
+        cls.customer = CustomUserFactory(is_active=True, groups=[cls.groups.customer])
+        cls.invited = CustomUserFactory(is_active=True, groups=[cls.groups.customer])
+
+        cls.businesses = BusinessFactory.create_batch(OBJECTS_AMOUNT, owner=cls.owner)
+        cls.business = cls.businesses[0]
+        cls.position = PositionFactory(business=cls.business, specialist=[cls.specialist])
+        cls.services = ServiceFactory.create_batch(OBJECTS_AMOUNT, position=cls.position)
+        cls.service = cls.services[0]
+
+        for business in cls.businesses[1:]:
+            PositionFactory(
+                business=business,
+                specialist=[CustomUserFactory(groups=[cls.groups.specialist])],
+            )
+
+        start_time = timezone.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        cls.orders = [
+            OrderFactory(
+                specialist=cls.specialist,
+                customer=cls.customer,
+                service=service,
+                start_time=start_time + timedelta(days=day),
+            )
+            for day, service in enumerate(cls.services, start=1)
+        ]
+        cls.order = cls.orders[0]
+
+        cls.working_time_job = WorkingTimeJob.objects.create(
+            business=cls.business, working_time={},
+        )
+
+        cls.reviews = ReviewFactory.create_batch(
+            OBJECTS_AMOUNT, from_user=cls.customer, to_user=cls.specialist,
+        )
+
+        cls.invitation = Invitation.objects.create(
+            email=cls.invited.email, position=cls.businesses[1].position_set.first(),
+        )
+        cls.register_invitation = Invitation.objects.create(
+            email="registered@example.com", position=cls.businesses[2].position_set.first(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """Write the report of the measured requests if its path is set."""
+        super().tearDownClass()
+
+        if not settings.QUERY_BUDGET_REPORT:
+            return
+        report_path = Path(settings.QUERY_BUDGET_REPORT)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(cls.report, indent=4, sort_keys=True))
+
+    def get_requests(self):
+        """Return requests to every endpoint.
+
+        Requests which change data go after the ones which only read it.
+        """
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        working_day = next(
+            day for day in (tomorrow + timedelta(days=days) for days in range(7))
+            if self.position.working_time[day.strftime("%a")]
+        )
+        location = self.business.location
+        other_position = self.businesses[3].position_set.first()
+
+        return [
+            EndpointRequest("user-list-create", {}, self.owner),
+            EndpointRequest("user-detail", {"pk": self.owner.id}, self.owner),
+            EndpointRequest("specialist-detail", {"pk": self.specialist.id}, self.customer),
+            EndpointRequest("specialist-list", {}, self.customer),
+            EndpointRequest("user-order-detail",
+                            {"user": self.customer.id, "pk": self.order.id}, self.customer),
+            EndpointRequest("customer-orders-list", {"pk": self.customer.id}, self.customer),
+            EndpointRequest("specialist-orders-list",
+                            {"pk": self.specialist.id}, self.specialist),
+            EndpointRequest("order-detail", {"pk": self.order.id}, self.customer),
+            EndpointRequest("businesses-list-create", {}, self.owner),
+            EndpointRequest("businesses-list-active", {}, None),
+            EndpointRequest("businesses-list-nearest",
+                            {"lat": location.latitude, "lon": location.longitude, "delta": 1},
+                            None),
+            EndpointRequest("businesses-list-nearest-radius",
+                            {"lat": location.latitude, "lon": location.longitude},
+                            None, params={"radius": 100}),
+            EndpointRequest("business-detail", {"pk": self.business.id}, self.owner),
+            EndpointRequest("business-working-time-job",
+                            {"pk": self.working_time_job.id}, self.owner),
+            EndpointRequest("location-detail", {"pk": location.id}, self.owner),
+            EndpointRequest("position-list", {}, self.owner),
+            EndpointRequest("position-detail-list", {"pk": self.position.id}, self.owner),
+            EndpointRequest("review-get", {"to_user": self.specialist.id}, self.customer),
+            EndpointRequest("review-detail", {"pk": self.reviews[0].id}, self.customer),
+            EndpointRequest("service-list-create", {}, self.customer),
+            EndpointRequest("service-detail", {"pk": self.service.id}, self.customer),
+            EndpointRequest("specialist-schedule",
+                            {"position_id": self.position.id,
+                             "specialist_id": self.specialist.id,
+                             "service_id": self.service.id,
+                             "order_date": working_day.isoformat()},
+                            self.customer),
+            EndpointRequest("owner-specialist-schedule",
+                            {"position_id": self.position.id,
+                             "specialist_id": self.specialist.id,
+                             "order_date": working_day.isoformat()},
+                            self.owner),
+            EndpointRequest("service-availability",
+                            {"service_id": self.service.id,
+                             "start_date": tomorrow.isoformat(),
+                             "end_date": (tomorrow + timedelta(days=6)).isoformat()},
+                            self.customer),
+            EndpointRequest("service-by-business", {"pk": self.business.id}, self.customer),
+            EndpointRequest("service-by-specialist", {"pk": self.specialist.id}, self.customer),
+            EndpointRequest("statistic-of-business",
+                            {"business_id": self.business.id}, self.owner,
+                            params={"timeInterval": "currentMonth"}),
+            EndpointRequest("order-create", {}, self.invited, "post",
+                            [{"start_time": self.order.start_time + timedelta(days=30),
+                              "specialist": self.specialist.id,
+                              "service": self.service.id}]),
+            EndpointRequest("order-approving",
+                            {"uid": encode_uid(self.order.pk),
+                             "token": self.order.token,
+                             "status": encode_uid("approved")},
+                            self.specialist),
+            EndpointRequest("location-create", {}, self.owner, "post",
+                            {"address": "Lviv", "latitude": 49.84, "longitude": 24.03}),
+            EndpointRequest("position-delete-specialist",
+                            {"pk": other_position.id,
+                             "specialist_id": other_position.specialist.first().id},
+                            self.owner, "delete"),
+            EndpointRequest("position-add-specialist", {"pk": self.position.id}, self.owner,
+                            "post", {"email": "new_specialist@example.com"}),
+            EndpointRequest("position-approve",
+                            {"email": encode_uid(self.invitation.email),
+                             "position": encode_uid(self.invitation.position_id),
+                             "token": self.invitation.token,
+                             "answer": encode_uid("approve")},
+                            self.invited),
+            EndpointRequest("register-invite",
+                            {"invite": encode_uid(self.register_invitation.id),
+                             "token": self.register_invitation.token},
+                            None, "post",
+                            {"first_name": "Registered", "last_name": "User",
+                             "phone_number": "+380509999999",
+                             "password": "Secret_password_1",
+                             "confirm_password": "Secret_password_1"}),
+            EndpointRequest("review-add", {"user": self.specialist.id}, self.invited, "post",
+                            {"text_body": "Good specialist", "rating": 5}),
+            EndpointRequest("contact-form", {}, None, "post",
+                            {"name": "Customer", "email": "customer@example.com",
+                             "message": "Question"}),
+        ]
+
+    def measure(self, request, page_size=None):
+        """Send the request of the user with JWT and a cold cache.
+
+        Returns:
+            tuple: response, list of queries and wall time in seconds
+        """
+        client = APIClient()
+        if request.user:
+            access_token = RefreshToken.for_user(request.user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"JWT {access_token}")
+
+        params = dict(request.params or {})
+        if page_size:
+            params["limit"] = page_size
+
+        path = reverse(f"api:{request.name}", kwargs=request.kwargs)
+        data = request.data if request.method != "get" else params
+        if params and request.method != "get":
+            path = f"{path}?{urlencode(params)}"
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, request.method)(path=path, data=data)
+            wall_time = time.perf_counter() - started
+
+        return response, queries.captured_queries, wall_time
+
+    def test_every_route_has_budget(self, *mock_tasks):
+        """Every route of the api app has a query budget."""
+        namespace = get_resolver().namespace_dict["api"][1]
+        route_names = {pattern.name for pattern in namespace.url_patterns}
+        requested = {request.name for request in self.get_requests()}
+
+        self.assertEqual(route_names, set(QUERY_BUDGETS))
+        self.assertEqual(requested, set(QUERY_BUDGETS))
+
+    def test_budgets(self, *mock_tasks):
+        """Requests fit into query budgets and the optional time limit."""
+        for request in self.get_requests():
+            with self.subTest(endpoint=request.name):
+                response, queries, wall_time = self.measure(request)
+
+                self.report.setdefault(request.name, {}).update({
+                    "method": request.method.upper(),
+                    "status": response.status_code,
+                    "queries": len(queries),
+                    "query_budget": QUERY_BUDGETS[request.name],
+                    "time_ms": round(wall_time * 1000, 1),
+                })
+
+                self.assertLess(response.status_code, 500)
+                self.assertLessEqual(
+                    len(queries), QUERY_BUDGETS[request.name],
+                    "\n".join(query["sql"] for query in queries),
+                )
+                if settings.QUERY_BUDGET_TIME_LIMIT:
+                    self.assertLessEqual(wall_time, settings.QUERY_BUDGET_TIME_LIMIT)
+
+    def test_page_size(self, *mock_tasks):
+        """Amount of queries of list endpoints doesn't depend on the page size."""
+        for request in self.get_requests():
+            if request.name not in PAGINATED:
+                continue
+
+            with self.subTest(endpoint=request.name):
+                page_queries = {
+                    page_size: len(self.measure(request, page_size)[1])
+                    for page_size in PAGE_SIZES
+                }
+
+                self.report.setdefault(request.name, {})["page_queries"] = page_queries
+
+                if request.name not in PAGE_SIZE_DEPENDENT:
+                    self.assertEqual(len(set(page_queries.values())), 1, page_queries)
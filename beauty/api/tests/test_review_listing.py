@@ -0,0 +1,75 @@
+"""This module is for testing review listing.
+
+Tests for ReviewDisplayView:
+- User without reviews gets 404 without selecting a page;
+- Amount of reviews is read from the user row without counting reviews;
+- Amount follows added, moved and deleted reviews;
+- Names of reviewers are listed without a query per review.
+"""
+
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from api.models import Review
+from .factories import CustomUserFactory, ReviewFactory
+
+
+class ReviewListingTest(TestCase):
+    """Class with tests for listing reviews of a user."""
+
+    def setUp(self):
+        """Create a reviewed specialist and an authenticated client."""
+        self.to_user = CustomUserFactory()
+        ReviewFactory.create_batch(2, to_user=self.to_user)
+        self.url = reverse("api:review-get", kwargs={"to_user": self.to_user.id})
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.to_user)
+
+    def test_not_reviewed(self):
+        """User without reviews gets 404 without selecting a page."""
+        user = CustomUserFactory()
+        url = reverse("api:review-get", kwargs={"to_user": user.id})
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_not_queried(self):
+        """Amount of reviews is read from the user row without counting reviews."""
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get(self.url)
+
+        self.assertNotIn("COUNT", " ".join(query["sql"] for query in queries.captured_queries))
+        self.assertEqual(len(response.data), 2)
+
+    def test_count_follows_reviews(self):
+        """Amount follows added, moved and deleted reviews."""
+        other_user = CustomUserFactory()
+        review = ReviewFactory(to_user=self.to_user)
+        self.assertEqual(len(self.client.get(self.url).data), 3)
+
+        review.to_user = other_user
+        review.save()
+        self.assertEqual(len(self.client.get(self.url).data), 2)
+
+        Review.objects.filter(to_user=self.to_user).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_reviewer_names(self):
+        """Names of reviewers are listed without a query per review."""
+        url = f"{self.url}?limit=10"
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        reviewers = CustomUserFactory.create_batch(5)
+        for reviewer in reviewers:
+            ReviewFactory(from_user=reviewer, to_user=self.to_user)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(
+            {review["from_user_name"] for review in response.data},
+            {None, *(reviewer.get_full_name() for reviewer in reviewers)},
+        )
@@ -46,7 +46,7 @@ class TestOwnerSpecialistScheduleView(TestCase):
         self.groups.owner.user_set.add(self.owner_other)
         self.groups.specialist.user_set.add(self.specialist_other)
 
-        self.start_time = "9:00"
+        self.start_time = "09:00"
         self.end_time = "13:00"
         self.duration = timedelta(minutes=10)
         self.working_time = generate_working_time(
@@ -8,9 +8,15 @@ Tests for StatisticView:
 - Statistic for lastSevenDays.
 - Statistic for currentMonth.
 - Statistic for lastThreeMonthes.
+- Amount of queries doesn't depend on amount of specialists.
+- Statistic is fetched from cache.
+- Cached statistic is invalidated when an order is changed.
 """
 
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from django.urls import reverse
 from api.tests.factories import (
@@ -45,6 +51,7 @@ class StatisticTest(TestCase):
         self.position = PositionFactory.create(business=self.business)
         self.position.specialist.add(self.specialist)
         self.service = ServiceFactory.create(position=self.position)
+        cache.clear()
 
     def test_not_auth_user(self):
         """Test if user is not authenticated."""
@@ -148,10 +155,11 @@ class StatisticTest(TestCase):
         start_time = datetime.combine(date.today(), time(hour=11, minute=35))
         start_time = CET.localize(start_time)
 
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response2 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
@@ -163,10 +171,11 @@ class StatisticTest(TestCase):
         self.assertNotEqual(data, data2)
 
         start_time -= timedelta(days=11)
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response3 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
@@ -198,10 +207,11 @@ class StatisticTest(TestCase):
         )
         start_time = CET.localize(start_time)
 
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response2 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
@@ -210,10 +220,11 @@ class StatisticTest(TestCase):
         self.assertNotEqual(data, data2)
 
         start_time -= timedelta(days=31)
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response3 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
@@ -245,10 +256,11 @@ class StatisticTest(TestCase):
         )
         start_time = CET.localize(start_time)
 
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response2 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
@@ -258,13 +270,110 @@ class StatisticTest(TestCase):
         self.assertEqual(len(data["line_chart_data"]["labels"]), 4)
 
         start_time -= timedelta(days=90)
-        OrderFactory.create(
-            customer=self.customer, specialist=self.specialist,
-            service=self.service, start_time=start_time,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
 
         response3 = self.client.get(url)
         self.assertEqual(response2.status_code, 200)
 
         data3 = response3.data
         self.assertEqual(data2, data3)
+
+    def test_queries_count_not_depend_on_specialists(self):
+        """Test if amount of queries is the same for one and many specialists.
+
+        Check that detailed statistic of every specialist is still correct.
+        """
+        url = reverse(
+            "api:statistic-of-business",
+            kwargs={"business_id": self.business.id},
+        )
+        url += "?timeInterval=lastThreeMonthes"
+
+        start_time = CET.localize(datetime.combine(
+            datetime.today() - timedelta(days=2),
+            time(hour=11, minute=35),
+        ))
+        OrderFactory.create(
+            customer=self.customer, specialist=self.specialist,
+            service=self.service, start_time=start_time,
+        )
+
+        with CaptureQueriesContext(connection) as one_specialist_queries:
+            self.client.get(url)
+
+        specialists = CustomUserFactory.create_batch(5)
+        self.position.specialist.add(*specialists)
+        with self.captureOnCommitCallbacks(execute=True):
+            for specialist in specialists:
+                OrderFactory.create_batch(
+                    2, customer=self.customer, specialist=specialist,
+                    service=self.service, start_time=start_time,
+                )
+
+        self.owner.reset_roles()
+        with CaptureQueriesContext(connection) as many_specialists_queries:
+            response = self.client.get(url)
+
+        self.assertEqual(
+            len(one_specialist_queries), len(many_specialists_queries),
+        )
+
+        data = response.data
+        self.assertEqual(data["general_statistic"][0]["business_orders_count"], 11)
+        self.assertEqual(data["general_statistic"][0]["active"], 11)
+        self.assertEqual(len(data["business_specialists"]), 6)
+        for specialist_stat in data["business_specialists"][1:]:
+            with self.subTest():
+                self.assertEqual(specialist_stat["specialist_orders_count"], 2)
+                self.assertEqual(specialist_stat["most_pop_service"], "Not enought data")
+
+    def test_statistic_from_cache(self):
+        """Test if repeated request doesn't aggregate orders again."""
+        url = reverse(
+            "api:statistic-of-business",
+            kwargs={"business_id": self.business.id},
+        )
+        url += "?timeInterval=currentMonth"
+
+        OrderFactory.create(
+            customer=self.customer, specialist=self.specialist,
+            service=self.service,
+        )
+
+        with CaptureQueriesContext(connection) as first_queries:
+            response = self.client.get(url)
+
+        with CaptureQueriesContext(connection) as cached_queries:
+            cached_response = self.client.get(url)
+
+        self.assertLess(len(cached_queries), len(first_queries))
+        self.assertEqual(response.data, cached_response.data)
+
+    def test_cache_invalidated_by_order(self):
+        """Test if cached statistic is recalculated after order is changed."""
+        url = reverse(
+            "api:statistic-of-business",
+            kwargs={"business_id": self.business.id},
+        )
+        url += "?timeInterval=lastSevenDays"
+
+        start_time = CET.localize(datetime.combine(date.today(), time(hour=11)))
+        with self.captureOnCommitCallbacks(execute=True):
+            order = OrderFactory.create(
+                customer=self.customer, specialist=self.specialist,
+                service=self.service, start_time=start_time,
+            )
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["general_statistic"][0]["active"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.mark_as_completed()
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["general_statistic"][0]["active"], 0)
+        self.assertEqual(response.data["general_statistic"][0]["completed"], 1)
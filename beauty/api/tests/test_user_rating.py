@@ -0,0 +1,112 @@
+"""This module is for testing rating aggregates of users.
+
+Tests for CustomUser rating aggregate:
+- Aggregate is updated when a review is added, changed or deleted;
+- Review moved to another user is moved between aggregates;
+- Reviews deleted with the reviewer are subtracted;
+- Command rebuilds aggregates of stale users only;
+- Specialists are listed by rating with the index.
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from api.models import CustomUser, Review
+from .factories import CustomUserFactory, ReviewFactory
+
+
+class UserRatingTest(TestCase):
+    """Class with tests for denormalised rating of users."""
+
+    def setUp(self):
+        """Create a specialist with two reviews."""
+        self.specialist = CustomUserFactory()
+        ReviewFactory(to_user=self.specialist, rating=5)
+        ReviewFactory(to_user=self.specialist, rating=2)
+
+    def assert_rating(self, user, review_count, rating_sum, rating_avg):
+        """Assert aggregate of the user stored in the database."""
+        user.refresh_from_db()
+        self.assertEqual(
+            (user.review_count, user.rating_sum, user.rating_avg),
+            (review_count, rating_sum, rating_avg),
+        )
+
+    def test_updated(self):
+        """Aggregate is updated when a review is added, changed or deleted."""
+        self.assert_rating(self.specialist, 2, 7, 3.5)
+
+        review = ReviewFactory(to_user=self.specialist, rating=4)
+        self.assert_rating(self.specialist, 3, 11, 11 / 3)
+
+        review.rating = 1
+        review.save()
+        self.assert_rating(self.specialist, 3, 8, 8 / 3)
+
+        review.text_body = "Changed"
+        with self.assertNumQueries(1):
+            review.save()
+
+        Review.objects.filter(to_user=self.specialist).delete()
+        self.assert_rating(self.specialist, 0, 0, 0)
+
+    def test_moved(self):
+        """Review moved to another user is moved between aggregates."""
+        other_user = CustomUserFactory()
+        review = Review.objects.get(to_user=self.specialist, rating=5)
+
+        review.to_user = other_user
+        review.save()
+
+        self.assert_rating(self.specialist, 1, 2, 2)
+        self.assert_rating(other_user, 1, 5, 5)
+
+    def test_reviewer_deleted(self):
+        """Reviews deleted with the reviewer are subtracted."""
+        reviewer = CustomUserFactory()
+        ReviewFactory(from_user=reviewer, to_user=self.specialist, rating=3)
+        self.assert_rating(self.specialist, 3, 10, 10 / 3)
+
+        reviewer.delete()
+
+        self.assert_rating(self.specialist, 2, 7, 3.5)
+
+    def test_rebuild(self):
+        """Command rebuilds aggregates of stale users only."""
+        other_user = CustomUserFactory()
+        CustomUser.objects.filter(pk=self.specialist.pk).update(
+            review_count=0, rating_sum=0, rating_avg=0,
+        )
+        CustomUser.objects.filter(pk=other_user.pk).update(review_count=1, rating_sum=4)
+
+        stdout = StringIO()
+        call_command("rebuild_user_rating", batch_size=1, stdout=stdout)
+
+        self.assert_rating(self.specialist, 2, 7, 3.5)
+        self.assert_rating(other_user, 0, 0, 0)
+        self.assertIn("Rebuilt rating of 2 users", stdout.getvalue())
+
+    def test_specialists_by_rating(self):
+        """Specialists are listed by rating with the index."""
+        group = Group.objects.get_or_create(name="Specialist")[0]
+        best, unrated = CustomUserFactory.create_batch(2)
+        ReviewFactory(to_user=best, rating=5)
+        for user in (self.specialist, best, unrated):
+            user.groups.add(group)
+
+        data = APIClient().get(reverse("api:specialist-list")).data
+
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(
+            [(specialist["id"], specialist["rating_avg"]) for specialist in data["results"]],
+            [(best.id, 5), (self.specialist.id, 3.5), (unrated.id, 0)],
+        )
+        plan = CustomUser.objects.order_by("-rating_avg", "-id").explain()
+        if connection.vendor == "sqlite":
+            self.assertIn("user_rating_idx", plan)
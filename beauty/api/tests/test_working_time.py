@@ -0,0 +1,208 @@
+"""This module is for testing detection of orders outside working time.
+
+Tests for filter_outside_working_time:
+- Database filter and in-memory check agree with is_order_fit_working_time;
+- Orders of a day off don't fit and orders of unchanged days fit;
+- Orders ending on the next day don't fit;
+- Orders during a lunch break don't fit;
+- Nothing is found without changed days.
+
+Tests for reduced working time of a position:
+- Orders of the position outside its new working time are cancelled;
+- Orders of the position during a new lunch break are cancelled;
+- Shifted working time starts a job;
+- Extended working time doesn't start a job;
+- Overlapping working intervals are rejected.
+"""
+
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from api.models import Order, WorkingTimeJob
+from api.tasks import apply_working_time
+from api.working_time import filter_outside_working_time
+from beauty.utils import WEEK_DAYS, is_order_fit_working_time
+from .factories import (BusinessFactory, CustomUserFactory, GroupFactory, OrderFactory,
+                        PositionFactory, ServiceFactory)
+
+
+WORKING_TIME = {day: ["08:00", "20:00"] for day in WEEK_DAYS}
+POSITION_TIME = {day: ["10:00", "18:00"] for day in WEEK_DAYS}
+
+
+def get_next_day(week_day):
+    """Return the nearest future date of the week day."""
+    day = timezone.localdate() + timedelta(days=1)
+    while day.weekday() != week_day:
+        day += timedelta(days=1)
+    return day
+
+
+class OutsideWorkingTimeTest(TestCase):
+    """Tests for the engine which finds orders outside working time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Create a service of one hour and orders during the week."""
+        service = ServiceFactory(duration=timedelta(hours=1))
+        specialist, customer = CustomUserFactory.create_batch(2)
+        cls.orders = [
+            OrderFactory(
+                service=service,
+                specialist=specialist,
+                customer=customer,
+                start_time=timezone.make_aware(
+                    datetime.combine(get_next_day(week_day), time(hour)),
+                ),
+            )
+            for week_day in range(7)
+            for hour in (0, 8, 9, 12, 18, 19, 23)
+        ]
+
+    def assert_outside(self, working_time, expected_ids):
+        """Check both ways of finding orders outside working time."""
+        for in_memory in (False, True):
+            with self.subTest(in_memory=in_memory):
+                found = filter_outside_working_time(
+                    Order.objects.all(), working_time, in_memory=in_memory,
+                )
+                self.assertEqual(set(found.values_list("id", flat=True)), set(expected_ids))
+
+    def test_agrees_with_order_check(self):
+        """Database filter and in-memory check agree with is_order_fit_working_time."""
+        working_time = {"Mon": ["09:00", "19:00"], "Wed": ["12:00", "13:00"], "Sat": []}
+
+        self.assert_outside(working_time, [
+            order.id for order in Order.objects.all()
+            if not is_order_fit_working_time(order, working_time)
+        ])
+
+    def test_day_off(self):
+        """Orders of a day off don't fit and orders of unchanged days fit."""
+        self.assert_outside({"Tue": []}, [
+            order.id for order in self.orders
+            if timezone.localtime(order.start_time).weekday() == 1
+        ])
+
+    def test_next_day(self):
+        """Orders ending on the next day don't fit."""
+        order = self.orders[-1]
+        Order.objects.filter(pk=order.pk).update(end_time=order.end_time + timedelta(hours=1))
+
+        self.assert_outside({"Sun": ["00:00", "23:59"]}, [order.id])
+
+    def test_lunch_break(self):
+        """Orders during a lunch break don't fit."""
+        starts = [timezone.localtime(order.start_time) for order in self.orders]
+        self.assert_outside({"Mon": [["08:00", "12:00"], ["13:00", "20:00"]]}, [
+            order.id for order, start in zip(self.orders, starts)
+            if (start.weekday(), start.hour) in ((0, 0), (0, 12), (0, 23))
+        ])
+
+    def test_no_changed_days(self):
+        """Nothing is found without changed days."""
+        with self.assertNumQueries(0):
+            self.assertFalse(list(filter_outside_working_time(Order.objects.all(), {})))
+
+
+class PositionWorkingTimeTest(TestCase):
+    """Tests for reduced working time of a position."""
+
+    def setUp(self):
+        """Create two positions of a business with orders on Monday."""
+        groups = GroupFactory.groups_for_test()
+        self.owner = CustomUserFactory(groups=[groups.owner])
+        self.specialist = CustomUserFactory(groups=[groups.specialist])
+        business = BusinessFactory(owner=self.owner, working_time=WORKING_TIME)
+        self.position, other_position = PositionFactory.create_batch(
+            2, business=business, working_time=POSITION_TIME, specialist=[self.specialist],
+        )
+
+        start_time = timezone.make_aware(datetime.combine(get_next_day(0), time(12)))
+        self.order, self.other_order = [
+            OrderFactory(
+                specialist=self.specialist,
+                service=ServiceFactory(position=position, duration=timedelta(hours=1)),
+                start_time=start_time,
+            )
+            for position in (self.position, other_position)
+        ]
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        self.data = {
+            "name": self.position.name,
+            "business": business.id,
+            "specialist": [self.specialist.id],
+            **POSITION_TIME,
+        }
+
+    def put_position(self, working_time):
+        """Put working time of the position and run the started job."""
+        with patch("api.tasks.apply_working_time.delay", side_effect=apply_working_time):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.put(
+                    reverse("api:position-detail-list", kwargs={"pk": self.position.id}),
+                    {**self.data, **working_time},
+                    format="json",
+                )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_reduced(self):
+        """Orders of the position outside its new working time are cancelled."""
+        response = self.put_position({"Mon": ["13:00", "18:00"]})
+
+        job = WorkingTimeJob.objects.get()
+        self.assertEqual(response.data["working_time_job"]["id"], job.id)
+        self.assertEqual(job.position, self.position)
+        self.assertEqual(job.working_time, {"Mon": ["13:00", "18:00"]})
+        self.assertEqual(job.orders_cancelled, 1)
+
+        self.order.refresh_from_db()
+        self.other_order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.StatusChoices.CANCELLED)
+        self.assertEqual(self.other_order.status, Order.StatusChoices.ACTIVE)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_lunch_break(self):
+        """Orders of the position during a new lunch break are cancelled."""
+        lunch_break = [["10:00", "12:00"], ["13:00", "18:00"]]
+        self.put_position({"Mon": lunch_break})
+
+        self.position.refresh_from_db()
+        self.assertEqual(self.position.working_time["Mon"], lunch_break)
+        self.assertEqual(WorkingTimeJob.objects.get().orders_cancelled, 1)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.StatusChoices.CANCELLED)
+
+    def test_shifted(self):
+        """Shifted working time starts a job."""
+        self.put_position({"Mon": ["11:00", "19:00"]})
+
+        self.assertEqual(WorkingTimeJob.objects.get().orders_cancelled, 0)
+
+    def test_extended(self):
+        """Extended working time doesn't start a job."""
+        response = self.put_position({"Mon": ["08:00", "20:00"]})
+
+        self.assertNotIn("working_time_job", response.data)
+        self.assertFalse(WorkingTimeJob.objects.exists())
+
+    def test_overlapping_intervals(self):
+        """Overlapping working intervals are rejected."""
+        response = self.client.put(
+            reverse("api:position-detail-list", kwargs={"pk": self.position.id}),
+            {**self.data, "Mon": [["10:00", "13:00"], ["12:00", "18:00"]]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["Mon"], ["Working intervals must not overlap."])
@@ -11,7 +11,8 @@ from api.views.location_views import LocationRUDView, LocationCreateView
 from api.views.order_views import (CustomerOrdersViews, OrderApprovingView, SpecialistOrdersViews,
                                    OrderCreateView, OrderRetrieveCancelView)
 
-from api.views.schedule import OwnerSpecialistScheduleView, SpecialistScheduleView
+from api.views.schedule import (AvailabilityView, OwnerSpecialistScheduleView,
+                                SpecialistScheduleView)
 
 from api.views.review_views import (ReviewDisplayView,
                                     ReviewRUDView,
@@ -28,7 +29,8 @@ from .views_api import (AllServicesListCreateView, BusinessesListCreateAPIView,
                         BusinessDetailRUDView, BusinessesListAPIView, ActiveBusinessesListAPIView,
                         CustomUserListCreateView, PositionListCreateView, CustomUserDetailRUDView,
                         ServiceUpdateView, PositionRetrieveUpdateDestroyView, SpecialistDetailView,
-                        RemoveSpecialistFromPosition, BusinessServicesView, SpecialistsServicesView)
+                        RemoveSpecialistFromPosition, BusinessServicesView, SpecialistsServicesView,
+                        SpecialistListView, WorkingTimeJobView)
 
 
 app_name = "api"
@@ -57,7 +59,7 @@ class FloatUrlParameterConverter:
     Provide to_python and to_url methods.
     """
 
-    regex = "\d{0,3}?.\d{0,6}" # noqa
+    regex = "-?\d{0,3}?.\d{0,6}" # noqa
 
     def to_python(self, value):
         """Converts coordinate from url to float."""
@@ -82,6 +84,11 @@ urlpatterns = [
         CustomUserDetailRUDView.as_view(),
         name="user-detail",
     ),
+    path(
+        "specialists/",
+        SpecialistListView.as_view(),
+        name="specialist-list",
+    ),
     path(
         "specialist/<int:pk>/",
         SpecialistDetailView.as_view(),
@@ -127,6 +134,11 @@ urlpatterns = [
         ActiveBusinessesListAPIView.as_view(),
         name="businesses-list-active",
     ),
+    path(
+        "businesses/nearest/<float:lat>/<float:lon>/",
+        BusinessesListAPIView.as_view(),
+        name="businesses-list-nearest-radius",
+    ),
     path(
         "businesses/nearest/<float:lat>/<float:lon>/<float:delta>",
         BusinessesListAPIView.as_view(),
@@ -137,6 +149,11 @@ urlpatterns = [
         BusinessDetailRUDView.as_view(),
         name="business-detail",
     ),
+    path(
+        "business/working_time_job/<int:pk>/",
+        WorkingTimeJobView.as_view(),
+        name="business-working-time-job",
+    ),
     path(
         "location/",
         LocationCreateView.as_view(),
@@ -210,6 +227,11 @@ urlpatterns = [
         OwnerSpecialistScheduleView.as_view(),
         name="owner-specialist-schedule",
     ),
+    path(
+        "availability/<int:service_id>/<date:start_date>/<date:end_date>/",
+        AvailabilityView.as_view(),
+        name="service-availability",
+    ),
     path(
         "business/<int:pk>/services/",
         BusinessServicesView.as_view(),
@@ -2,6 +2,7 @@
 import datetime
 import logging
 
+from celery import group
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Q
@@ -17,7 +18,9 @@ from rest_framework.generics import (CreateAPIView,
 from rest_framework.permissions import (IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
+from api.booking import lock_specialists
 from api.models import (CustomUser, Order)
+from api.pagination import KeysetPagination
 from api.permissions import (IsOrderUser, IsCustomerOrIsAdmin, IsOwnerOfSpecialist)
 from api.serializers.order_serializers import (OrderDeleteSerializer, OrderSerializer)
 from api.tasks import (change_order_status_to_decline, reminder_for_customer,
@@ -56,21 +59,31 @@ class OrderCreateView(CreateAPIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, *args, **kwargs):
-        """Create an order and add an authenticated customer to it."""
+        """Create orders and add an authenticated customer to them.
+
+        Orders are inserted with one query and their tasks are sent as one group.
+        """
         serializer = self.get_serializer(data=request.data, many=True)
         serializer.is_valid(raise_exception=True)
-        orders = serializer.save(customer=request.user)
+
+        specialist_ids = [order["specialist"].id for order in serializer.validated_data]
+        with lock_specialists(specialist_ids):
+            orders = serializer.save(customer=request.user)
+
+        tasks = []
         for order in orders:
             logger.info(f"{order} with {order.service.name} was created")
 
             expiration_time = get_order_expiration_time(order, order.created_at)
 
-            send_message_for_specialist_consideration.delay(order.id, request.get_host(),
-                                                            request.is_secure())
-
-            change_order_status_to_decline.apply_async(
+            tasks.append(send_message_for_specialist_consideration.s(
+                order.id, request.get_host(), request.is_secure(),
+            ))
+            tasks.append(change_order_status_to_decline.signature(
                 (order.id, request.get_host()), eta=expiration_time, task_id=encode_uid(order.pk),
-            )
+            ))
+
+        group(tasks).apply_async()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -213,6 +226,7 @@ class CustomerOrdersViews(ListAPIView):
 
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated, IsCustomerOrIsAdmin)
+    pagination_class = KeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["status", "specialist", "service", "start_time", "end_time"]
 
@@ -230,6 +244,7 @@ class SpecialistOrdersViews(ListAPIView):
 
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated, IsCustomerOrIsAdmin | IsOwnerOfSpecialist)
+    pagination_class = KeysetPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["status", "specialist", "service", "start_time", "end_time"]
 
@@ -243,5 +258,4 @@ class SpecialistOrdersViews(ListAPIView):
         if self.request.user == specialist:
             return specialist.specialist_orders.all()
 
-        return specialist.specialist_orders.filter(
-            service__position__business__owner=self.request.user)
+        return specialist.specialist_orders.filter(business__owner=self.request.user)
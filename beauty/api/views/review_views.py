@@ -8,9 +8,12 @@ from rest_framework.generics import (GenericAPIView, RetrieveUpdateDestroyAPIVie
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from api.eager_loading import EagerLoadingViewMixin
 from api.models import (CustomUser, Review)
+from api.pagination import KeysetPagination
 
-from api.serializers.review_serializers import (ReviewAddSerializer, ReviewDisplaySerializer)
+from api.serializers.review_serializers import (ReviewAddSerializer, ReviewDisplaySerializer,
+                                                ReviewListSerializer)
 
 from api.permissions import IsAdminOrCurrentReviewOwner
 
@@ -18,28 +21,39 @@ from api.permissions import IsAdminOrCurrentReviewOwner
 logger = logging.getLogger(__name__)
 
 
-class ReviewDisplayView(GenericAPIView):
+class ReviewDisplayView(EagerLoadingViewMixin, GenericAPIView):
     """Generic API for custom GET method."""
     queryset = Review.objects.all()
-    serializer_class = ReviewDisplaySerializer
+    serializer_class = ReviewListSerializer
+    pagination_class = KeysetPagination
     filter_backends = (filters.OrderingFilter, )
     ordering_fields = ("date_of_publication", )
     ordering = ("-date_of_publication", )
 
+    def get_pagination_count(self, queryset):
+        """Return amount of reviews of the user kept in CustomUser.review_count."""
+        review_count = CustomUser.objects.filter(
+            pk=self.kwargs["to_user"],
+        ).values_list("review_count", flat=True).first()
+        return review_count or 0
+
     def get(self, request, to_user):
         """Method for retrieving reviews from the database."""
         queryset = self.queryset.filter(to_user=to_user)
         queryset = super().filter_queryset(queryset)
 
-        if not queryset:
+        if not self.get_pagination_count(queryset):
             logger.info(f"Failed to get reviews for user with id {to_user}")
             return Response({"error": "User wasn't reviewed yet"},
                             status=status.HTTP_404_NOT_FOUND)
 
-        queryset = super().paginate_queryset(queryset)
+        reviews = super().paginate_queryset(queryset)
         logger.info(f"Reviews for user with id {to_user} were successfully obtained")
-        serialized_data = self.serializer_class(queryset, many=True)
-        return Response(serialized_data.data, status=status.HTTP_200_OK)
+        serialized_data = self.serializer_class(reviews, many=True)
+        # Reviews are listed without envelope, pages are linked in the header
+        link = self.paginator.get_link_header()
+        return Response(serialized_data.data, status=status.HTTP_200_OK,
+                        headers={"Link": link} if link else None)
 
 
 class ReviewRUDView(RetrieveUpdateDestroyAPIView):
@@ -1,158 +1,149 @@
-"""Module with SpecialistScheduleView."""
+"""Module with SpecialistScheduleView and AvailabilityView."""
 
+from collections import defaultdict
 from api.models import Order, Position, CustomUser, Service
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from datetime import timedelta, datetime, date
+from datetime import timedelta, date, datetime, time
 from api.serializers.order_serializers import OrderSerializer
-from beauty.utils import string_to_time
-from django.utils.timezone import localtime
+from beauty.availability import WEEK_DAYS, DaySchedule, free_slots, to_time
+from beauty.utils import AvailabilityCache
+from django.utils.timezone import localtime, make_aware
 
 
-def get_orders_for_specific_date(specialist, position, order_date):
+def get_orders_for_specific_date(specialist, order_date):
     """Return active or approved orders.
 
-    Filter them by certain specialist and specific date.
+    Filter them by certain specialist and specific date. Orders of the
+    specialist in all positions take time, as booking checks them all.
     """
-    valid_order_statuses = [
-        Order.StatusChoices.ACTIVE,
-        Order.StatusChoices.APPROVED,
-    ]
-
     return Order.objects.filter(
         specialist=specialist,
-        status__in=valid_order_statuses,
-        service__position=position,
+        status__in=Order.BUSY_STATUSES,
         start_time__range=(order_date, order_date + timedelta(days=1)),
     )
 
 
-def get_working_day(position, order_date):
-    """Return working time of a position, according to the order_date day."""
-    weekdays = {
-        0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu",
-        4: "Fri", 5: "Sat", 6: "Sun",
-    }
-
-    order_day = order_date.weekday()
-    return position.working_time[weekdays[order_day]]
-
+def get_orders_for_date_range(specialists, start_date, end_date):
+    """Return active or approved orders of all specialists between two dates.
 
-def get_free_time(specialist, position, order_date, working_day):
-    """Return list of time moments."""
-    free_time = [
-        string_to_time(time) for time in working_day
-    ]
-    orders = get_orders_for_specific_date(specialist, position, order_date)
-
-    # Adds all time moments from orders (start and end) to free_time list.
-    orders_time = [
-        order_time
-        for order in orders
-        for order_time in (
-            localtime(order.start_time).time(),
-            localtime(order.end_time).time(),
-        )
-    ]
-
-    free_time.extend(orders_time)
-
-    # Remove values that are dublicated, including origin of dublicated value.
-    # [1, 1, 2, 3, 4] then remove elements at 0 and 1 index.
-    free_time = [time for time in free_time if free_time.count(time) == 1]
-    free_time.sort()
+    Both dates are included and are counted in the local time zone. Orders
+    of the specialists in all positions are returned.
+    """
+    return Order.objects.filter(
+        specialist__in=specialists,
+        status__in=Order.BUSY_STATUSES,
+        start_time__gte=make_aware(datetime.combine(start_date, time.min)),
+        start_time__lt=make_aware(datetime.combine(end_date + timedelta(days=1), time.min)),
+    ).only("specialist", "start_time", "end_time")
 
-    return free_time
 
+def get_working_day(position, order_date):
+    """Return working time of a position, according to the order_date day."""
+    return position.working_time[WEEK_DAYS[order_date.weekday()]]
 
-def get_time_intervals(start_time, end_time):
-    """Divides given time range in blocks by 15 min."""
-    intervals = []
 
-    start_time = datetime.combine(date.today(), start_time)
-    end_time = datetime.combine(date.today(), end_time)
+def get_free_intervals(specialist_ids, position, days):
+    """Return free intervals of every specialist for every day.
 
-    # If only one aviable block
-    if end_time >= start_time:
-        time_range = end_time - start_time
-    else:
-        time_range = (end_time + timedelta(hours=24)) - start_time
+    Intervals are taken from AvailabilityCache, missing ones are calculated
+    with one orders query and saved to the cache.
 
-    time_block = start_time
+    Args:
+        specialist_ids (list): ids of the position specialists
+        position (Position): position of the specialists
+        days (list): dates in the local time zone
 
-    for _ in range(time_range // timedelta(minutes=15) + 1):
-        intervals.append(time_block.time())
-        time_block += timedelta(minutes=15)
+    Returns:
+        dict: free (start, end) intervals in minutes by (specialist id, day)
+    """
+    keys = AvailabilityCache.make_keys(
+        position.id, [(specialist_id, day) for specialist_id in specialist_ids for day in days],
+    )
+    free_intervals = AvailabilityCache.load_many(keys)
+
+    missing = [specialist_day for specialist_day in keys if specialist_day not in free_intervals]
+    if missing:
+        missing_days = [day for _, day in missing]
+        orders = get_orders_for_date_range(
+            {specialist_id for specialist_id, _ in missing},
+            min(missing_days), max(missing_days),
+        )
 
-    return intervals
+        booked_time = defaultdict(list)
+        for order in orders:
+            start_time, end_time = localtime(order.start_time), localtime(order.end_time)
+            booked_time[(order.specialist_id, start_time.date())].append(
+                (start_time.time(), end_time.time()),
+            )
 
+        calculated = {}
+        for specialist_id, day in missing:
+            day_schedule = DaySchedule(position.get_working_day(day))
+            day_schedule.book_many(booked_time[(specialist_id, day)])
+            calculated[(specialist_id, day)] = day_schedule.free_intervals
 
-def get_free_time_for_customer(specialist, service, order_date, working_day):
-    """Returns free time intervals."""
-    free_time = get_free_time(specialist, service.position, order_date, working_day)
+        AvailabilityCache.store_many(keys, calculated)
+        free_intervals.update(calculated)
 
-    new_free_time = []
+    return free_intervals
 
-    for start, end in zip(free_time[::2], free_time[1::2]):
-        end = datetime.combine(datetime.today(), end)
 
-        if end - datetime.combine(
-            datetime.today(),
-            start,
-        ) >= service.duration:
-            new_free_time.extend((start, (end - service.duration).time()))
+def get_free_time_for_customer(specialist, service, order_date):
+    """Returns free time intervals.
 
-    # First value is start of free time block, and second is end of block.
-    free_time_blocks = [
-        get_time_intervals(start, end)
-        for start, end in
-        zip(new_free_time[::2], new_free_time[1::2])
-    ]
+    Every interval is a list of possible order starts with 15 minutes step.
+    """
+    day = order_date.date()
+    free_intervals = get_free_intervals([specialist.id], service.position, [day])
 
-    return free_time_blocks
+    return get_free_slots(free_intervals[(specialist.id, day)], service)
 
 
-def get_free_time_specialist_for_owner(specialist, position, order_date,
-                                       working_day, request):
-    """Return list of free time blocks and orders."""
-    specialist_schedule = get_free_time(specialist, position, order_date, working_day)
+def get_free_slots(free_intervals, service):
+    """Return possible order starts for the service with 15 minutes step."""
+    duration = service.duration // timedelta(minutes=1)
 
-    specialist_schedule = [
-        [start, end]
-        for start, end in
-        zip(specialist_schedule[::2], specialist_schedule[1::2])
+    return [
+        [to_time(minutes) for minutes in slots]
+        for slots in free_slots(free_intervals, duration)
     ]
 
-    orders = get_orders_for_specific_date(specialist, position, order_date)
-
-    # Needed of use insert method and access to list in same loop
-    new_specialist_schedule = specialist_schedule.copy()
 
-    for time in specialist_schedule:
-        current_order = [
-            OrderSerializer(order, context={"request": request}).data["url"]
-            for order in orders
-            if localtime(order.start_time).time() == time[1]
-        ]
-
-        if current_order:
-            new_specialist_schedule.insert(
-                new_specialist_schedule.index(time) + 1,
-                current_order[0],
-            )
+def get_free_time_specialist_for_owner(specialist, order_date, working_day, request):
+    """Return list of free time blocks and orders.
 
-    start_order = [
-        OrderSerializer(order, context={"request": request}).data["url"]
-        for order in orders
-        if localtime(order.end_time).time() == specialist_schedule[0][0]
-    ]
-
-    if start_order:
-        new_specialist_schedule.insert(0, start_order[0])
+    Order url follows the free time block which ends at the order start.
+    If the working day starts with an order, its url goes first.
+    """
+    day_schedule = DaySchedule(working_day)
+    orders = list(get_orders_for_specific_date(specialist, order_date))
+
+    orders_by_start = {}
+    orders_by_end = {}
+    for order in orders:
+        start, end = localtime(order.start_time).time(), localtime(order.end_time).time()
+        day_schedule.book(start, end)
+        orders_by_start.setdefault(day_schedule.normalize(start), order)
+        orders_by_end.setdefault(day_schedule.normalize(end), order)
+
+    def order_url(order):
+        return OrderSerializer(order, context={"request": request}).data["url"]
+
+    specialist_schedule = []
+    for start, end in day_schedule.free_intervals:
+        specialist_schedule.append([to_time(start), to_time(end)])
+        if end in orders_by_start:
+            specialist_schedule.append(order_url(orders_by_start[end]))
+
+    if specialist_schedule and day_schedule.free_intervals[0][0] in orders_by_end:
+        specialist_schedule.insert(
+            0, order_url(orders_by_end[day_schedule.free_intervals[0][0]]),
+        )
 
-    return new_specialist_schedule
+    return specialist_schedule
 
 
 class SpecialistScheduleView(APIView):
@@ -183,7 +174,7 @@ class SpecialistScheduleView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        working_day = get_working_day(position, order_date)
+        working_day = position.get_working_day(order_date)
 
         if not working_day:
             return Response(
@@ -192,9 +183,75 @@ class SpecialistScheduleView(APIView):
             )
 
         return Response(
-            get_free_time_for_customer(
-                specialist, service, order_date, working_day,
-            ),
+            get_free_time_for_customer(specialist, service, order_date),
+            status=status.HTTP_200_OK,
+        )
+
+
+class AvailabilityView(APIView):
+    """View for searching free time of all position specialists.
+
+    Returns possible order starts of the service for every specialist and
+    every day of the date range. Free time missing in the cache is
+    calculated in memory from orders fetched with one query.
+    """
+
+    max_days = 14
+
+    def get(self, request, service_id, start_date, end_date):
+        """GET method for retrieving free time of specialists."""
+        service = get_object_or_404(
+            Service.objects.select_related("position"), id=service_id,
+        )
+        position = service.position
+        start_date, end_date = start_date.date(), end_date.date()
+
+        if start_date < date.today():
+            return Response(
+                {"detail": "You can't see schedule of the past days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if end_date < start_date:
+            return Response(
+                {"detail": "End date can't be earlier than start date"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if (end_date - start_date).days >= self.max_days:
+            return Response(
+                {"detail": f"Date range can't be longer than {self.max_days} days"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        specialists = list(position.specialist.all())
+        days = [
+            start_date + timedelta(days=day)
+            for day in range((end_date - start_date).days + 1)
+        ]
+        free_intervals = get_free_intervals(
+            [specialist.id for specialist in specialists], position, days,
+        )
+
+        specialists_schedule = []
+        for specialist in specialists:
+            schedule = {
+                day.isoformat(): get_free_slots(free_intervals[(specialist.id, day)], service)
+                for day in days
+            }
+
+            specialists_schedule.append({
+                "id": specialist.id,
+                "name": specialist.get_full_name(),
+                "schedule": schedule,
+            })
+
+        return Response(
+            {
+                "service": service.id,
+                "position": position.id,
+                "specialists": specialists_schedule,
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -212,7 +269,7 @@ class OwnerSpecialistScheduleView(APIView):
 
         position = get_object_or_404(Position, id=position_id)
         specialist = get_object_or_404(CustomUser, id=specialist_id)
-        working_day = get_working_day(position, order_date)
+        working_day = position.get_working_day(order_date)
 
         if request.user != position.business.owner:
             return Response(
@@ -228,7 +285,6 @@ class OwnerSpecialistScheduleView(APIView):
 
         schedule = get_free_time_specialist_for_owner(
             specialist,
-            position,
             order_date,
             working_day,
             request,
@@ -5,19 +5,17 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework import status
 from api.models import Business, Order
-from django.db.models import Avg, Sum, Count
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractMonth
 from datetime import date, timedelta, datetime
-from beauty.settings import TIME_ZONE
-import pytz
 from dateutil.relativedelta import relativedelta
 from api.permissions import IsOwner, IsAdminOrThisBusinessOwner
-from beauty.utils import Chart
+from beauty.utils import Chart, StatisticCache
 from api.serializers.chart_serializers import ChartSerializer
 import logging
 from enum import Enum
 
 
-CET = pytz.timezone(TIME_ZONE)
 logger = logging.getLogger(__name__)
 
 
@@ -45,7 +43,8 @@ class StatisticView(GenericAPIView):
         """Return statistic, according to the timeInterval value.
 
         Check if timeInterval value is provided and correct, return data for
-        chart, business table and specialists table.
+        chart, business table and specialists table. Statistic is cached
+        until an order of the business is changed.
         """
         business = self.get_object()
 
@@ -66,23 +65,29 @@ class StatisticView(GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        statistic = StatisticCache.load(business.id, time_interval)
+        if statistic is not None:
+            logger.info(f"Statstic about business {business} was fetched from cache.")
+            return Response(statistic, status=status.HTTP_200_OK)
+
         specialists = business.get_all_specialists()
-        business_orders = business.get_orders_by_date(
+        business_rollups = business.get_order_rollups_by_date(
             orders_date,
         )
 
-        orders_count_by_time = count_orders_by_time_interval(
-            business_orders, time_interval, orders_date,
+        business_statistic = OrdersStatistic(
+            business_rollups, time_interval, orders_date,
         )
+        orders_count_by_time = business_statistic.count_by_time_interval()
 
         labels = [label for label in orders_count_by_time]
         data = [el for el in orders_count_by_time.values()]
 
         line_chart_data = self._line_chart(labels, data)
 
-        genaral_business_stat = self._general_statistic(business_orders)
+        genaral_business_stat = self._general_statistic(business_statistic)
         detailed_statistic = self._detailed_statistic(
-            business_orders, specialists,
+            business_statistic, specialists,
         )
 
         statistic = {
@@ -91,6 +96,8 @@ class StatisticView(GenericAPIView):
             "business_specialists": detailed_statistic,
         }
 
+        StatisticCache.store(business.id, time_interval, statistic)
+
         logger.info(f"Statstic about business {business} was fetched.")
         return Response(statistic, status=status.HTTP_200_OK)
 
@@ -99,44 +106,31 @@ class StatisticView(GenericAPIView):
         logger.info("Got labels and data for chart.")
         return ChartSerializer(line_chart).data
 
-    def _general_statistic(self, business_orders):
+    def _general_statistic(self, business_statistic):
         """Return general statistic about business.
 
         This data is used for building business table on a FrontEnd statistic
         page.
         """
-        business_profit = calc_sum_orders_price(business_orders)
-
-        business_orders_count = business_orders.count()
-        detailed_count = count_orders_by_status(business_orders)
-
-        business_average_order = business_orders.aggregate(
-            avg_price=Avg("service__price"),
-        )["avg_price"]
+        rows = business_statistic.rows
 
-        if not business_average_order:
-            business_average_order = 0
-
-        business_average_order = round(business_average_order, 2)
-
-        most_pop_service, least_pop_service = get_most_least_pop_service(
-            business_orders,
-        )
+        business_average_order = business_statistic.average_price(rows)
+        most_pop_service, least_pop_service = get_most_least_pop_service(rows)
 
         result = {
-            "business_orders_count": business_orders_count,
-            "business_profit": business_profit,
+            "business_orders_count": count_orders(rows),
+            "business_profit": calc_sum_orders_price(rows),
             "business_average_order": business_average_order,
             "most_popular_service": most_pop_service,
             "least_popular_service": least_pop_service,
         }
 
-        result.update(detailed_count)
+        result.update(count_orders_by_status(rows))
 
         logger.info("Got general statistic about business.")
         return [result]
 
-    def _detailed_statistic(self, business_orders, specialists):
+    def _detailed_statistic(self, business_statistic, specialists):
         """Return detailed statistic about businesses' specialists.
 
         This data is used for building specialist table on a FrontEnd statistic
@@ -146,135 +140,191 @@ class StatisticView(GenericAPIView):
 
         for specialist in specialists.iterator():
 
-            specialist_orders = business_orders.filter(specialist=specialist)
-            specialist_orders_count = specialist_orders.count()
-            orders_count_status = count_orders_by_status(
-                specialist_orders,
-            )
-            specialist_orders_profit = calc_sum_orders_price(
-                specialist_orders,
-            )
-
+            specialist_rows = business_statistic.rows_for_specialist(specialist.id)
             most_pop_serv, least_pop_serv = get_most_least_pop_service(
-                specialist_orders,
+                specialist_rows,
             )
 
             specialist_stat = {
                 "specialist_name": specialist.get_full_name(),
                 "most_pop_service": most_pop_serv,
                 "least_pop_service": least_pop_serv,
-                "specialist_orders_count": specialist_orders_count,
-                "specialist_orders_profit": specialist_orders_profit,
+                "specialist_orders_count": count_orders(specialist_rows),
+                "specialist_orders_profit": calc_sum_orders_price(
+                    specialist_rows,
+                ),
             }
 
-            specialist_stat.update(orders_count_status)
+            specialist_stat.update(count_orders_by_status(specialist_rows))
             business_specialists.append(specialist_stat)
 
         logger.info("Got detailed statistic about each specilalist.")
         return business_specialists
 
 
-def calc_sum_orders_price(orders_queryset):
-    """Return sum of order's prices.
+class OrdersStatistic:
+    """Grouped aggregation of orders used by StatisticView.
+
+    Statistic is read from daily OrderRollup rows instead of the Order
+    table, so its cost doesn't depend on the amount of order history.
+    Rollups are aggregated once by (specialist, service name, status) and
+    once by time stamp. All numbers of the statistic page are then
+    calculated in memory from these rows.
+
+    Attributes:
+        rollups (QuerySet[OrderRollup]): rollups the statistic is calculated for
+        time_interval (str): one of the TimeIntervals values
+        orders_date (date): date from which orders are counted
+    """
+
+    def __init__(self, rollups, time_interval, orders_date):
+        """Initialize OrdersStatistic instance."""
+        self.rollups = rollups
+        self.time_interval = time_interval
+        self.orders_date = orders_date
+        self._rows = None
+
+    @property
+    def rows(self):
+        """list: Order amount and total price grouped by specialist, service and status.
+
+        Every row is a dict with specialist_id, service_name, status,
+        total and price keys. Rows are fetched with a single query.
+        """
+        if self._rows is None:
+            self._rows = list(
+                self.rollups.order_by().values(
+                    "specialist_id", "status", service_name=F("service__name"),
+                ).annotate(
+                    total=Sum("count"),
+                    price=Sum("revenue"),
+                ).filter(total__gt=0),
+            )
+            logger.debug(f"Got {len(self._rows)} grouped rows for statistic.")
+
+        return self._rows
+
+    def rows_for_specialist(self, specialist_id):
+        """Return grouped rows which belong to the given specialist."""
+        return [row for row in self.rows if row["specialist_id"] == specialist_id]
+
+    @staticmethod
+    def average_price(rows):
+        """Return average price of an order, rounded to 2 decimal places."""
+        orders_count = count_orders(rows)
+        if not orders_count:
+            return 0
+
+        return round(sum(row["price"] for row in rows) / orders_count, 2)
+
+    def count_by_time_interval(self):
+        """Return amount of orders starting from orders_date.
+
+        Orders are counted per day for lastSevenDays and currentMonth
+        intervals and per month for lastThreeMonthes with one grouped query.
+
+        Returns:
+            dict: keys - time stamps and value - count of orders
+        """
+        date_dict = {}
+        time_with_date = [
+            self.time_interval == TimeIntervals.CURRENT_WEEK.value,
+            self.time_interval == TimeIntervals.CURRENT_MONTH.value,
+        ]
+
+        if any(time_with_date):
+            orders_count = dict(
+                self.rollups.order_by().values_list("day").annotate(
+                    total=Sum("count"),
+                ),
+            )
+
+            new_date = self.orders_date
+            while new_date != date.today() + timedelta(days=1):
+                date_str = str(new_date.day) + " " + new_date.strftime("%B")[:3]
+                date_dict[date_str] = orders_count.get(new_date, 0)
+                new_date += timedelta(days=1)
+
+        else:
+            orders_count = dict(
+                self.rollups.order_by().annotate(
+                    month=ExtractMonth("day"),
+                ).values_list("month").annotate(total=Sum("count")),
+            )
+
+            new_date = self.orders_date
+            today = date.today()
+
+            while (new_date.year, new_date.month) <= (today.year, today.month):
+                date_dict[new_date.strftime("%B")] = orders_count.get(new_date.month, 0)
+                new_date += relativedelta(months=1)
+
+        return date_dict
+
+
+def count_orders(rows):
+    """Return amount of orders in grouped rows."""
+    return sum(row["total"] for row in rows)
+
+
+def calc_sum_orders_price(rows):
+    """Return sum of completed order's prices.
 
     Args:
-        orders_queryset (QuerySet[Order])
+        rows (list): grouped rows of OrdersStatistic
 
     Returns:
         int: total of order's prices
     """
-    orders_queryset = orders_queryset.filter(
-        status=Order.StatusChoices.COMPLETED,
+    sum_price = sum(
+        row["price"] for row in rows
+        if row["status"] == Order.StatusChoices.COMPLETED
     )
-    sum_price = orders_queryset.aggregate(
-        total_price_orders=Sum("service__price"))["total_price_orders"]
-
-    if sum_price is None:
-        sum_price = 0
 
     return round(sum_price, 2)
 
 
-def count_orders_by_status(orders):
+def count_orders_by_status(rows):
     """Return dict with amount of orders depending on their status.
 
     Args:
-        orders (QuerySet[Order])
+        rows (list): grouped rows of OrdersStatistic
 
     Returns:
         dict: dict with orders amount, counted by its statuses
     """
+    orders_count = {status_int: 0 for status_int in Order.StatusChoices.values}
+    for row in rows:
+        orders_count[row["status"]] += row["total"]
+
     return {
-        status_str.lower(): orders.filter(status=status_int).count()
+        status_str.lower(): orders_count[status_int]
         for status_str, status_int in
         Order.StatusChoices.__members__.items()
     }
 
 
-def count_orders_by_time_interval(orders, time_interval,
-                                  orders_date):
-    """Return amount of orders starting from certain date.
-
-    Args:
-        orders (QuerySet[Order])
-        time_interval (str): time from which it is needed to count orders
-        orders_date (date)
-
-    Returns:
-        dict: keys - time stamps and value - count of orders
-    """
-    date_dict = {}
-    time_with_date = [
-        time_interval == TimeIntervals.CURRENT_WEEK.value,
-        time_interval == TimeIntervals.CURRENT_MONTH.value,
-    ]
-
-    if any(time_with_date):
-        orders_date = datetime.combine(orders_date, datetime.min.time())
-        new_date = CET.localize(orders_date)
-
-        while new_date.date() != date.today() + timedelta(days=1):
-            orders_for_date = orders.filter(
-                start_time__range=(new_date, new_date + timedelta(days=1)),
-            ).count()
-            date_str = str(new_date.day) + " " + new_date.strftime("%B")[:3]
-            date_dict[date_str] = orders_for_date
-            new_date += timedelta(days=1)
-
-    else:
-        new_date = orders_date
-        current_month = date.today().month
-
-        while new_date.month != current_month + 1:
-            orders_for_date = orders.filter(
-                start_time__month=new_date.month,
-            ).count()
-            date_dict[new_date.strftime("%B")] = orders_for_date
-            new_date += relativedelta(months=1)
-
-    return date_dict
-
-
-def get_most_least_pop_service(orders):
+def get_most_least_pop_service(rows):
     """Return most and least popular service according to the orders.
 
     Args:
-        orders (QuerySet[Order])
+        rows (list): grouped rows of OrdersStatistic
 
     Returns:
         tuple: tuple of two elements: most and least popular service
     """
-    count_services = orders.values("service__name").annotate(
-        total=Count("service__name"),
-    )
+    count_services = {}
+    for row in rows:
+        count_services[row["service_name"]] = (
+            count_services.get(row["service_name"], 0) + row["total"]
+        )
 
     if count_services:
-        most_pop_service = max(
-            count_services, key=lambda x: x["total"])["service__name"]
-        least_pop_service = min(
-            count_services, key=lambda x: x["total"])["service__name"]
+        services = sorted(count_services.items())
+        most_pop_service = max(services, key=lambda x: x[1])[0]
+        least_pop_service = min(services, key=lambda x: x[1])[0]
 
-        if len(orders) < 3:
+        if count_orders(rows) < 3:
             message = "Not enought data"
             most_pop_service, least_pop_service = (message,) * 2
 
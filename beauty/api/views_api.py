@@ -1,7 +1,9 @@
 """This module provides all needed api views."""
 
 import logging
+import math
 
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.shortcuts import redirect
 from django.utils.encoding import force_str
@@ -22,14 +24,19 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 
 from djoser.views import UserViewSet as DjoserUserViewSet
 
 from beauty.settings import EMAIL_HOST_USER
 
+from .eager_loading import EagerLoadingViewMixin
 from .filters import ServiceFilter
+from .geo import (EARTH_RADIUS_KM, KM_PER_DEGREE, LocationTreeCache,
+                  filter_nearest, get_distance_expression)
 
-from .models import (Business, CustomUser, Order, Position, Service)
+from .models import (Business, CustomUser, Order, Position, Service, WorkingTimeJob)
+from .pagination import KeysetPagination
 
 from .permissions import (IsAdminOrThisBusinessOwner, IsOwner, IsServiceOwner,
                           IsPositionOwner, IsProfileOwner, ReadOnly)
@@ -39,7 +46,8 @@ from .serializers.business_serializers import (BusinessCreateSerializer,
                                                BusinessGetAllInfoSerializers,
                                                BusinessDetailSerializer,
                                                BusinessInfoSerializer,
-                                               NearestBusinessesSerializer)
+                                               NearestBusinessesSerializer,
+                                               WorkingTimeJobSerializer)
 
 from .serializers.customuser_serializers import (CustomUserDetailSerializer,
                                                  CustomUserSerializer,
@@ -49,7 +57,6 @@ from .serializers.customuser_serializers import (CustomUserDetailSerializer,
 from .serializers.position_serializer import PositionGetSerializer, PositionSerializer
 from .serializers.service_serializers import ServiceSerializer
 from beauty.utils import (get_working_time_from_dict,
-                          is_order_fit_working_time,
                           is_working_time_reduced,
                           update_position_time_by_business)
 
@@ -57,7 +64,38 @@ from beauty.utils import (get_working_time_from_dict,
 logger = logging.getLogger(__name__)
 
 
-class CustomUserListCreateView(ListCreateAPIView):
+class WorkingTimeJobMixin:
+    """Mixin for views which apply reduced working time in the background.
+
+    Orders outside the new working time are cancelled and their users are
+    notified by WorkingTimeJob, progress of the job is added to the
+    successful response.
+    """
+
+    working_time_job = None
+
+    def start_working_time_job(self, business, old_working_time, new_working_time,
+                               position=None):
+        """Start the job if working time of the business or position was reduced."""
+        if not is_working_time_reduced(old_working_time, new_working_time):
+            return
+
+        changed_days = {
+            day: hours for day, hours in new_working_time.items()
+            if old_working_time.get(day) != hours
+        }
+        self.working_time_job = WorkingTimeJob.start(business, changed_days, position)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Add progress of the started job to the response."""
+        if self.working_time_job and response.status_code == status.HTTP_200_OK:
+            response.data["working_time_job"] = WorkingTimeJobSerializer(
+                self.working_time_job, context=self.get_serializer_context(),
+            ).data
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class CustomUserListCreateView(EagerLoadingViewMixin, ListCreateAPIView):
     """Generic API for users custom POST methods."""
 
     queryset = CustomUser.objects.all()
@@ -164,7 +202,22 @@ class SpecialistDetailView(RetrieveAPIView):
     serializer_class = SpecialistDetailSerializer
 
 
-class PositionListCreateView(ListCreateAPIView):
+class SpecialistListView(ListAPIView):
+    """Generic API for listing specialists, the best rated first.
+
+    Specialists are sorted by the rating aggregate of their reviews, which
+    is read from user_rating_idx, and paginated by cursors.
+    """
+
+    queryset = CustomUser.objects.filter(groups__name="Specialist")
+    serializer_class = SpecialistDetailSerializer
+    pagination_class = KeysetPagination
+    filter_backends = (OrderingFilter, )
+    ordering_fields = ("rating_avg", "review_count")
+    ordering = ("-rating_avg", )
+
+
+class PositionListCreateView(EagerLoadingViewMixin, ListCreateAPIView):
     """Generic API for position POST methods."""
 
     permission_classes = (IsAuthenticated, IsPositionOwner)
@@ -187,13 +240,21 @@ class PositionListCreateView(ListCreateAPIView):
         return positions
 
 
-class PositionRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
+class PositionRetrieveUpdateDestroyView(WorkingTimeJobMixin, RetrieveUpdateDestroyAPIView):
     """Generic API for position PUT, GET, DELTE methods."""
 
     queryset = Position.objects.all()
     serializer_class = PositionSerializer
     permission_classes = (IsAuthenticated, IsPositionOwner)
 
+    def perform_update(self, serializer):
+        """Start the job if working time of the position was reduced."""
+        working_time = serializer.instance.working_time
+        position = serializer.save()
+        self.start_working_time_job(
+            position.business, working_time, position.working_time, position,
+        )
+
 
 class RemoveSpecialistFromPosition(DestroyAPIView):
     """Generic API for position DELETE specialist methods."""
@@ -218,7 +279,7 @@ class RemoveSpecialistFromPosition(DestroyAPIView):
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class BusinessesListCreateAPIView(ListCreateAPIView):
+class BusinessesListCreateAPIView(EagerLoadingViewMixin, ListCreateAPIView):
     """List View for all businesses of current user & new business creation."""
 
     permission_classes = (IsAdminOrThisBusinessOwner & IsOwner,)
@@ -235,7 +296,7 @@ class BusinessesListCreateAPIView(ListCreateAPIView):
 
     def get_queryset(self):
         """Filter businesses of current user(owner)."""
-        owner = get_object_or_404(CustomUser, id=self.request.user.id)
+        owner = self.request.user
 
         logger.info(f"Got businesses from owner {owner}")
 
@@ -254,7 +315,7 @@ class BusinessesListCreateAPIView(ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class ActiveBusinessesListAPIView(ListAPIView):
+class ActiveBusinessesListAPIView(EagerLoadingViewMixin, ListAPIView):
     """List all active businesses for users."""
 
     queryset = Business.objects.filter(is_active=True)
@@ -265,7 +326,7 @@ class ActiveBusinessesListAPIView(ListAPIView):
     ordering_fields = ["name", "business_type", "location__address", "working_time"]
 
 
-class BusinessDetailRUDView(RetrieveUpdateDestroyAPIView):
+class BusinessDetailRUDView(WorkingTimeJobMixin, RetrieveUpdateDestroyAPIView):
     """RUD View for access business detail information or/and edit it.
 
     RUD - Retrieve, Update, Destroy.
@@ -340,10 +401,29 @@ class BusinessDetailRUDView(RetrieveUpdateDestroyAPIView):
 
         return Response(status=status.HTTP_401_UNAUTHORIZED)
 
+    def validate_working_time(self, data: dict) -> dict:
+        """Validate working time of the request data before the business is updated.
+
+        Raises ValidationError if working hours are invalid.
+
+        Args:
+            data (dict): request data with working hours of week days
+
+        Returns:
+            dict: working time of the days present in the data
+
+        """
+        return get_working_time_from_dict(data)
+
     def put(self, request, *args, **kwargs):
-        """Sends message to customer and specialist if working time was reduced."""
+        """Update business and its positions with validated working time.
+
+        If working time was reduced, WorkingTimeJob is queued to cancel orders
+        out of the new working time and to notify their customers and
+        specialists. Progress of the job is added to the response.
+        """
         business = self.get_object()
-        request_working_time = get_working_time_from_dict(request.data)
+        self.validate_working_time(request.data)
 
         try:
             is_owner = self.request.user.is_owner
@@ -365,34 +445,17 @@ class BusinessDetailRUDView(RetrieveUpdateDestroyAPIView):
                 business.working_time,
             )
 
-        if not is_working_time_reduced(
-            business.working_time,
-            request_working_time,
-        ):
-            return super().put(request, *args, **kwargs)
-
-        orders = Order.objects.filter(service__position__business=business)
-        for order in orders:
-            if is_order_fit_working_time(order, request_working_time):
-                continue
-            specialist = order.specialist.email
-            customer = order.customer.email
-
-            order.status = Order.StatusChoices.CANCELLED
-            order.save()
-            send_mail(
-                f"Order #{order.id} has been cancelled",
-                f"Order #{order.id} hass been cancelled due to reduced working time",
-                EMAIL_HOST_USER,
-                [customer, specialist],
-            )
-
         return super().put(request, *args, **kwargs)
 
     def patch(self, request, *args, **kwargs):
-        """Sends message to customer and specialist if working time was reduced."""
+        """Partially update business and its positions if working time is given.
+
+        If working time was reduced, WorkingTimeJob is queued to cancel orders
+        out of the new working time and to notify their customers and
+        specialists. Progress of the job is added to the response.
+        """
         business = self.get_object()
-        request_working_time = get_working_time_from_dict(request.data)
+        request_working_time = self.validate_working_time(request.data)
 
         try:
             is_owner = self.request.user.is_owner
@@ -415,37 +478,27 @@ class BusinessDetailRUDView(RetrieveUpdateDestroyAPIView):
                     business.working_time,
                 )
 
-        if not is_working_time_reduced(
-            business.working_time,
-            request_working_time,
-        ):
-            return super().patch(request, *args, **kwargs)
-
-        valid_order_statuses = [
-            Order.StatusChoices.ACTIVE,
-            Order.StatusChoices.APPROVED,
-        ]
-        orders = Order.objects.filter(
-            service__position__business=business,
-            status__in=valid_order_statuses,
-        )
+        return super().patch(request, *args, **kwargs)
 
-        for order in orders:
-            if is_order_fit_working_time(order, request_working_time):
-                continue
+    def perform_update(self, serializer):
+        """Start the job if working time of the business was reduced."""
+        working_time = serializer.instance.working_time
+        business = serializer.save()
+        self.start_working_time_job(business, working_time, business.working_time)
 
-            order.status = Order.StatusChoices.CANCELLED
-            order.save()
 
-            specialist = order.specialist.email
-            customer = order.customer.email
-            send_mail(
-                f"Order #{order.id} has been cancelled",
-                f"Order #{order.id} hass been cancelled due to reduced working time",
-                EMAIL_HOST_USER,
-                [customer, specialist],
-            )
-        return super().patch(request, *args, **kwargs)
+class WorkingTimeJobView(RetrieveAPIView):
+    """View for progress of the job which applies reduced working time."""
+
+    permission_classes = (IsAdminOrThisBusinessOwner,)
+    queryset = WorkingTimeJob.objects.select_related("business__owner")
+    serializer_class = WorkingTimeJobSerializer
+
+    def get_object(self):
+        """Return the job if current user may view its business."""
+        job = get_object_or_404(self.get_queryset(), pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, job.business)
+        return job
 
 
 class AllServicesListCreateView(ListCreateAPIView):
@@ -455,6 +508,7 @@ class AllServicesListCreateView(ListCreateAPIView):
 
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    pagination_class = KeysetPagination
 
     filter_backends = (DjangoFilterBackend, SearchFilter, OrderingFilter)
     filterset_class = ServiceFilter
@@ -529,30 +583,66 @@ class UserViewSet(DjoserUserViewSet):
         return super().me(request, *args, **kwargs)
 
 
-class BusinessesListAPIView(ListAPIView):
-    """List View for all nearest businesses next to current user or marker."""
+class BusinessesListAPIView(EagerLoadingViewMixin, ListAPIView):
+    """List View for all nearest businesses next to current user or marker.
+
+    Businesses are ordered by distance. Search radius in kilometres is taken
+    from the radius query parameter or from the legacy delta in degrees.
+    """
 
     permission_classes = (AllowAny,)
     serializer_class = NearestBusinessesSerializer
 
+    def get_radius(self) -> float:
+        """Return search radius in kilometres."""
+        if "radius" not in self.request.query_params:
+            if "delta" in self.kwargs:
+                return float(self.kwargs["delta"]) * KM_PER_DEGREE
+            return settings.NEAREST_BUSINESSES_RADIUS
+
+        try:
+            radius = float(self.request.query_params["radius"])
+        except ValueError:
+            radius = 0
+
+        if not 0 < radius <= math.pi * EARTH_RADIUS_KM:
+            raise ValidationError({"radius": "Radius should be a positive amount of kilometres"})
+        return radius
+
     def get_queryset(self):
-        """Filter businesses for current specialist.
+        """Filter active businesses within the radius ordered by distance.
 
         Request Args:
             target_latitude (float): user or target global latitude
             target_longitude (float): user or target global longitude
-            delta (float): indent in coordinates to search
+            radius (float): search radius in kilometres
         """
         target_latitude = float(self.kwargs["lat"])
         target_longitude = float(self.kwargs["lon"])
-        delta = float(self.kwargs["delta"])
-
-        queryset = Business.objects.filter(
-            is_active=True,
-            location__latitude__gt=target_latitude - delta,
-            location__latitude__lt=target_latitude + delta,
-            location__longitude__gt=target_longitude - delta,
-            location__longitude__lt=target_longitude + delta,
+        if not (-90 <= target_latitude <= 90 and -180 <= target_longitude <= 180):
+            raise ValidationError({"coordinates": "Coordinates are out of range"})
+        radius = self.get_radius()
+
+        queryset = Business.objects.filter(is_active=True)
+
+        if settings.NEAREST_BUSINESSES_TREE:
+            tree = LocationTreeCache.get_tree(
+                lambda: queryset.filter(
+                    location__latitude__isnull=False, location__longitude__isnull=False,
+                ).values_list(
+                    "location_id", "location__latitude", "location__longitude",
+                ),
+            )
+            location_ids = [
+                location_id
+                for location_id, _ in tree.nearest(target_latitude, target_longitude, radius)
+            ]
+            return queryset.filter(location_id__in=location_ids).annotate(
+                distance=get_distance_expression(
+                    target_latitude, target_longitude, prefix="location__",
+                ),
+            ).order_by("distance", "pk")
+
+        return filter_nearest(
+            queryset, target_latitude, target_longitude, radius, prefix="location__",
         )
-
-        return queryset
@@ -0,0 +1,107 @@
+"""This module finds orders which don't fit working time.
+
+Working time like {"Mon": [["09:00", "13:00"], ["14:00", "18:00"]], "Sun": []}
+is translated into a database filter on the local week day and time of
+orders in TIME_ZONE, so orders which don't fit any of the new working
+intervals are found with one query. Days missing
+in working time are not changed and their orders always fit.
+
+SQLite has no time zones, Django converts every row there in Python
+functions, so on SQLite start and end times of the orders are loaded with
+one query and checked against precomputed working hours in one pass.
+"""
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from beauty.availability import WEEK_DAYS, IntervalSet, to_minutes, to_time
+
+
+def get_working_hours(working_time: dict) -> dict:
+    """Return working hours by ISO week day.
+
+    Args:
+        working_time (dict): working time of the changed days
+
+    Returns:
+        dict: IntervalSet of working minutes, empty for days off, by ISO week day
+    """
+    return {
+        WEEK_DAYS.index(day) + 1: IntervalSet.from_working_day(hours)
+        for day, hours in working_time.items()
+    }
+
+
+def get_outside_working_time_filter(working_time: dict) -> Q:
+    """Return filter of orders which are not inside any working interval.
+
+    Orders which end on the next local day never fit. Returns None if no
+    days are changed.
+    """
+    outside = None
+    for week_day, hours in get_working_hours(working_time).items():
+        day_filter = Q(start_time__iso_week_day=week_day)
+        if hours:
+            inside_hours = Q()
+            for start, end in hours:
+                inside_hours |= Q(start_time__time__gte=to_time(start),
+                                  end_time__time__lte=to_time(end))
+            day_filter &= ~inside_hours | Q(end_time__date__gt=TruncDate("start_time"))
+        outside = day_filter if outside is None else outside | day_filter
+    return outside
+
+
+def get_outside_working_time_ids(rows, working_time: dict) -> list:
+    """Return ids of orders which don't fit working time.
+
+    Args:
+        rows (iterable): (id, start time, end time) of the orders
+        working_time (dict): working time of the changed days
+
+    Returns:
+        list: ids of the orders outside working time
+    """
+    working_hours = get_working_hours(working_time)
+    current_timezone = timezone.get_current_timezone()
+
+    ids = []
+    for order_id, start_time, end_time in rows:
+        start_time = start_time.astimezone(current_timezone)
+        week_day = start_time.isoweekday()
+        if week_day not in working_hours:
+            continue
+
+        hours = working_hours[week_day]
+        end_time = end_time.astimezone(current_timezone)
+        if end_time.date() != start_time.date():
+            ids.append(order_id)
+        elif not hours.covers(to_minutes(start_time), to_minutes(end_time)):
+            ids.append(order_id)
+    return ids
+
+
+def filter_outside_working_time(queryset, working_time: dict, in_memory=None):
+    """Return orders of the queryset which don't fit working time.
+
+    Args:
+        queryset (QuerySet): orders to check
+        working_time (dict): working time of the changed days
+        in_memory (bool): check orders in memory, by default on SQLite only
+
+    Returns:
+        QuerySet: orders outside working time
+    """
+    outside = get_outside_working_time_filter(working_time)
+    if outside is None:
+        return queryset.none()
+
+    if in_memory is None:
+        in_memory = connections[queryset.db].vendor == "sqlite"
+
+    if not in_memory:
+        return queryset.filter(outside)
+
+    rows = queryset.values_list("id", "start_time", "end_time")
+    return queryset.filter(pk__in=get_outside_working_time_ids(rows, working_time))
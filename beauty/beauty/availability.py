@@ -0,0 +1,317 @@
+"""This module provides the engine for calculating free time of specialists.
+
+A working day is represented by a set of working intervals and a list of
+busy intervals in minutes since midnight. Free intervals are the difference
+of both sets calculated with one sweep, so touching and overlapping orders
+are merged and orders outside of the working intervals are clipped.
+"""
+
+import calendar
+from bisect import bisect_right
+from datetime import time
+from heapq import merge
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union
+
+
+MINUTES_IN_DAY = 24 * 60
+SLOT_MINUTES = 15
+WEEK_DAYS = tuple(day.capitalize() for day in calendar.HTMLCalendar.cssclasses)
+
+Interval = Tuple[int, int]
+
+
+def to_minutes(value: Union[time, str, int]) -> int:
+    """Return amount of minutes since midnight for time or "HH:MM" string."""
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, str):
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes: int) -> time:
+    """Cast amount of minutes since midnight to time."""
+    minutes %= MINUTES_IN_DAY
+    return time(hour=minutes // 60, minute=minutes % 60)
+
+
+def split_working_day(working_day: Sequence) -> list:
+    """Return list of [start, end] intervals of the working day.
+
+    Args:
+        working_day (list): empty list for a day off, ["09:00", "18:00"] for
+            one interval or list of intervals like [["09:00", "13:00"],
+            ["14:00", "18:00"]]
+    """
+    if not working_day:
+        return []
+    if isinstance(working_day[0], (list, tuple)):
+        return list(working_day)
+    return [working_day]
+
+
+def _coalesce(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping and touching intervals sorted by start."""
+    coalesced = []
+    for start, end in intervals:
+        if start >= end:
+            continue
+        if coalesced and start <= coalesced[-1][1]:
+            if end > coalesced[-1][1]:
+                coalesced[-1] = (coalesced[-1][0], end)
+        else:
+            coalesced.append((start, end))
+    return coalesced
+
+
+class IntervalSet:
+    """Set of minutes stored as sorted disjoint (start, end) intervals.
+
+    Overlapping and touching intervals are merged and empty ones are dropped
+    on creation. Union, intersection, difference and containment of two sets
+    are calculated with one sweep over both of them.
+
+    Attributes:
+        intervals (list): sorted disjoint (start, end) intervals
+    """
+
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals: Iterable[Interval] = ()) -> None:
+        """Initialize IntervalSet instance with (start, end) intervals in any order."""
+        self.intervals = _coalesce(sorted(intervals))
+
+    @classmethod
+    def _from_disjoint(cls, intervals: List[Interval]) -> "IntervalSet":
+        """Return set of already sorted disjoint intervals without sorting them."""
+        interval_set = cls.__new__(cls)
+        interval_set.intervals = intervals
+        return interval_set
+
+    @classmethod
+    def from_working_day(cls, working_day: Sequence) -> "IntervalSet":
+        """Return set of the working day in any of its JSON formats.
+
+        Interval which ends before it starts (e.g. ["22:00", "02:00"]) is
+        treated as a night shift and ends on the next day.
+        """
+        intervals = []
+        for start, end in split_working_day(working_day):
+            start, end = to_minutes(start), to_minutes(end)
+            intervals.append((start, end + MINUTES_IN_DAY if end < start else end))
+        return cls(intervals)
+
+    def to_working_day(self) -> list:
+        """Return JSON of the working day, a single interval is not nested."""
+        working_day = [
+            [to_time(start).strftime("%H:%M"), to_time(end).strftime("%H:%M")]
+            for start, end in self.intervals
+        ]
+        return working_day[0] if len(working_day) == 1 else working_day
+
+    @property
+    def start(self) -> int:
+        """int: Start of the first interval, 0 for an empty set."""
+        return self.intervals[0][0] if self.intervals else 0
+
+    @property
+    def end(self) -> int:
+        """int: End of the last interval, 0 for an empty set."""
+        return self.intervals[-1][1] if self.intervals else 0
+
+    def __bool__(self) -> bool:
+        """Return True if the set is not empty."""
+        return bool(self.intervals)
+
+    def __iter__(self) -> Iterator[Interval]:
+        """Iterate over sorted (start, end) intervals."""
+        return iter(self.intervals)
+
+    def __len__(self) -> int:
+        """Return amount of disjoint intervals."""
+        return len(self.intervals)
+
+    def __eq__(self, other) -> bool:
+        """Return True if both sets contain the same minutes."""
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.intervals == other.intervals
+
+    def __repr__(self) -> str:
+        """Return representation with the intervals."""
+        return f"IntervalSet({self.intervals})"
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        """Return set of minutes which are in any of both sets."""
+        return self._from_disjoint(_coalesce(merge(self.intervals, other.intervals)))
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        """Return set of minutes which are in both sets."""
+        intersection = []
+        first, second = self.intervals, other.intervals
+        i = j = 0
+        while i < len(first) and j < len(second):
+            start = max(first[i][0], second[j][0])
+            end = min(first[i][1], second[j][1])
+            if start < end:
+                intersection.append((start, end))
+            if first[i][1] < second[j][1]:
+                i += 1
+            else:
+                j += 1
+        return self._from_disjoint(intersection)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        """Return set of minutes which are in this set but not in the other one."""
+        difference = []
+        removed = other.intervals
+        j = 0
+        for start, end in self.intervals:
+            while j < len(removed) and removed[j][1] <= start:
+                j += 1
+            # The last removed interval may cover the start of the next one
+            k = j
+            while k < len(removed) and removed[k][0] < end:
+                if removed[k][0] > start:
+                    difference.append((start, removed[k][0]))
+                start = max(start, removed[k][1])
+                k += 1
+            if start < end:
+                difference.append((start, end))
+            j = max(j, k - 1)
+        return self._from_disjoint(difference)
+
+    def issuperset(self, other: "IntervalSet") -> bool:
+        """Return True if every minute of the other set is in this set."""
+        return not other.difference(self)
+
+    def covers(self, start: int, end: int) -> bool:
+        """Return True if whole interval between start and end is inside one interval."""
+        index = bisect_right(self.intervals, (start, float("inf"))) - 1
+        return index >= 0 and end <= self.intervals[index][1]
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __ge__ = issuperset
+
+
+def compile_working_time(working_time: dict) -> Tuple[IntervalSet, ...]:
+    """Return working intervals in minutes of every week day starting from Monday.
+
+    Args:
+        working_time (dict): working time like {"Mon": ["09:00", "18:00"]}
+
+    Returns:
+        tuple: sets of 7 days, empty for days off and missing days
+    """
+    return tuple(
+        IntervalSet.from_working_day(working_time.get(day)) for day in WEEK_DAYS
+    )
+
+
+class DaySchedule:
+    """Working day of a specialist with booked orders.
+
+    Working interval which ends before it starts (e.g. ["22:00", "02:00"]) is
+    treated as a night shift, its end and booked times after midnight are
+    shifted by one day.
+
+    Attributes:
+        working (IntervalSet): working intervals in minutes
+        start (int): start of the working day in minutes
+        end (int): end of the working day in minutes
+    """
+
+    def __init__(self, working_day: Union[IntervalSet, Sequence, None]) -> None:
+        """Initialize DaySchedule instance with working intervals of the day.
+
+        Args:
+            working_day (IntervalSet or list): working intervals, working day
+                JSON with "HH:MM" or minutes, empty list or None for days off
+        """
+        if not isinstance(working_day, IntervalSet):
+            working_day = IntervalSet.from_working_day(working_day)
+        self.working = working_day
+        self.start = working_day.start
+        self.end = working_day.end
+
+        self._busy = []
+        self._free = None
+
+    def __bool__(self) -> bool:
+        """Return True if it is a working day."""
+        return bool(self.working)
+
+    def normalize(self, value: Union[time, str]) -> int:
+        """Return minutes of the given time, shifted for night shifts."""
+        minutes = to_minutes(value)
+        if self.end > MINUTES_IN_DAY and minutes < self.start:
+            minutes += MINUTES_IN_DAY
+        return minutes
+
+    def is_working_time(self, moment: Union[time, str]) -> bool:
+        """Return True if given moment is inside of the working intervals."""
+        minutes = self.normalize(moment)
+        return self.working.covers(minutes, minutes)
+
+    def book(self, start: Union[time, str], end: Union[time, str]) -> None:
+        """Mark time between start and end as busy."""
+        start, end = self.normalize(start), self.normalize(end)
+        if end < start:
+            end += MINUTES_IN_DAY
+
+        self._busy.append((start, end))
+        self._free = None
+
+    def book_many(self, intervals: Iterable[Tuple[time, time]]) -> None:
+        """Mark every (start, end) interval as busy."""
+        for start, end in intervals:
+            self.book(start, end)
+
+    @property
+    def free(self) -> IntervalSet:
+        """IntervalSet: Working intervals without booked ones."""
+        if self._free is None:
+            self._free = self.working.difference(IntervalSet(self._busy))
+        return self._free
+
+    @property
+    def free_intervals(self) -> List[Interval]:
+        """list: Sorted free (start, end) intervals in minutes."""
+        return self.free.intervals
+
+    def is_free(self, start: Union[time, str], end: Union[time, str]) -> bool:
+        """Return True if whole interval between start and end is free."""
+        start, end = self.normalize(start), self.normalize(end)
+        if end < start:
+            end += MINUTES_IN_DAY
+
+        return self.free.covers(start, end)
+
+    def free_slots(self, duration: int, step: int = SLOT_MINUTES) -> List[List[int]]:
+        """Return start minutes of orders with given duration."""
+        return free_slots(self.free_intervals, duration, step)
+
+
+def free_slots(free_intervals: Sequence[Interval], duration: int,
+               step: int = SLOT_MINUTES) -> List[List[int]]:
+    """Return start minutes of orders with given duration.
+
+    Args:
+        free_intervals (list): sorted free (start, end) intervals in minutes
+        duration (int): order duration in minutes
+        step (int): minutes between two nearest starts
+
+    Returns:
+        list: list of starts for every free interval, which is long
+            enough for the order
+    """
+    return [
+        list(range(free_start, free_end - duration + 1, step))
+        for free_start, free_end in free_intervals
+        if free_end - free_start >= duration
+    ]
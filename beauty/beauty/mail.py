@@ -0,0 +1,224 @@
+"""This module provides queued delivery of emails.
+
+QueuedEmailBackend saves messages to the OutgoingEmail table instead of
+sending them, so request handlers never wait for SMTP. The Celery task
+api.tasks.send_queued_emails delivers queued messages in batches over one
+connection of the worker process, which is reused between batches, and
+records delivery status of every message.
+"""
+
+import base64
+import logging
+import smtplib
+from datetime import timedelta
+from email.mime.base import MIMEBase
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import OutgoingEmail
+
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_SCHEDULED_KEY = "mail:delivery-scheduled"
+
+
+def serialize_message(message) -> dict:
+    """Return JSON serializable data of the email message."""
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            attachment = (
+                attachment.get_filename(),
+                attachment.get_payload(decode=True),
+                attachment.get_content_type(),
+            )
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append([filename, base64.b64encode(content).decode(), mimetype])
+
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": list(message.to),
+        "cc": list(message.cc),
+        "bcc": list(message.bcc),
+        "reply_to": list(message.reply_to),
+        "headers": message.extra_headers,
+        "content_subtype": message.content_subtype,
+        "alternatives": [list(alternative) for alternative in
+                         getattr(message, "alternatives", [])],
+        "attachments": attachments,
+    }
+
+
+def deserialize_message(data: dict) -> EmailMultiAlternatives:
+    """Return the email message made from serialized data."""
+    message = EmailMultiAlternatives(
+        subject=data["subject"],
+        body=data["body"],
+        from_email=data["from_email"],
+        to=data["to"],
+        cc=data["cc"],
+        bcc=data["bcc"],
+        reply_to=data["reply_to"],
+        headers=data["headers"],
+        alternatives=[tuple(alternative) for alternative in data["alternatives"]],
+    )
+    message.content_subtype = data["content_subtype"]
+    for filename, content, mimetype in data["attachments"]:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def schedule_delivery() -> None:
+    """Queue the delivery task unless it is already queued.
+
+    Messages stay in the table if the broker is unavailable and are
+    delivered by the periodic task.
+    """
+    if not cache.add(DELIVERY_SCHEDULED_KEY, True, timeout=settings.MAIL_SCHEDULE_TIMEOUT):
+        return
+
+    from api.tasks import send_queued_emails
+
+    try:
+        send_queued_emails.delay()
+    except Exception as error:
+        cache.delete(DELIVERY_SCHEDULED_KEY)
+        logger.warning(f"Email delivery was not scheduled: {error}")
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Email backend which queues messages for delivery by a Celery task."""
+
+    def send_messages(self, email_messages) -> int:
+        """Save messages to the queue and schedule their delivery after commit.
+
+        Returns:
+            int: amount of queued messages
+        """
+        emails = [
+            OutgoingEmail(
+                message=serialize_message(message),
+                recipients=", ".join(message.recipients())[:255],
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        if not emails:
+            return 0
+
+        OutgoingEmail.objects.bulk_create(emails)
+        transaction.on_commit(schedule_delivery)
+        logger.info(f"{len(emails)} emails were queued")
+        return len(emails)
+
+
+class DeliveryConnection:
+    """Connection of the worker process to the delivery backend.
+
+    The connection stays open between messages and batches and is reopened
+    when it gets older than MAIL_CONNECTION_MAX_AGE seconds or the server
+    closes it.
+    """
+
+    _connection = None
+    _opened_at = 0.0
+    _lock = Lock()
+
+    @classmethod
+    def get(cls):
+        """Return open connection, opening a new one when needed."""
+        if cls._connection and monotonic() - cls._opened_at > settings.MAIL_CONNECTION_MAX_AGE:
+            cls.close()
+
+        if cls._connection is None:
+            connection = get_connection(settings.MAIL_DELIVERY_BACKEND, fail_silently=False)
+            connection.open()
+            cls._connection, cls._opened_at = connection, monotonic()
+        return cls._connection
+
+    @classmethod
+    def close(cls) -> None:
+        """Close the connection, ignoring errors of already broken ones."""
+        connection, cls._connection = cls._connection, None
+        if connection:
+            try:
+                connection.close()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    @classmethod
+    def send(cls, message) -> None:
+        """Send the message, reconnecting once if the server closed the connection."""
+        with cls._lock:
+            try:
+                cls.get().send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                cls.close()
+                cls.get().send_messages([message])
+
+
+def deliver_queued_emails(batch_size: int) -> int:
+    """Send a batch of queued emails and record their delivery status.
+
+    Emails are claimed before sending, so concurrent workers never send
+    the same email. Failed emails are retried after MAIL_RETRY_DELAY
+    seconds until they reach MAIL_MAX_ATTEMPTS.
+
+    Returns:
+        int: amount of emails taken from the queue
+    """
+    now = timezone.now()
+    OutgoingEmail.objects.filter(
+        status=OutgoingEmail.StatusChoices.SENDING,
+        updated_at__lt=now - timedelta(seconds=settings.MAIL_SENDING_TIMEOUT),
+    ).update(status=OutgoingEmail.StatusChoices.QUEUED, updated_at=now)
+
+    retry_time = now - timedelta(seconds=settings.MAIL_RETRY_DELAY)
+
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                Q(attempts=0) | Q(updated_at__lte=retry_time),
+                status=OutgoingEmail.StatusChoices.QUEUED,
+            ).order_by("id")[:batch_size],
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            status=OutgoingEmail.StatusChoices.SENDING, updated_at=now,
+        )
+
+    for email in emails:
+        email.attempts += 1
+        email.updated_at = timezone.now()
+        try:
+            DeliveryConnection.send(deserialize_message(email.message))
+        except (smtplib.SMTPException, OSError) as error:
+            DeliveryConnection.close()
+            email.error = str(error)
+            email.status = (
+                OutgoingEmail.StatusChoices.FAILED
+                if email.attempts >= settings.MAIL_MAX_ATTEMPTS
+                else OutgoingEmail.StatusChoices.QUEUED
+            )
+            logger.warning(f"Email id={email.id} to {email.recipients} failed: {error}")
+        else:
+            email.error = ""
+            email.status = OutgoingEmail.StatusChoices.SENT
+            email.sent_at = email.updated_at
+
+    OutgoingEmail.objects.bulk_update(
+        emails, ["status", "attempts", "error", "sent_at", "updated_at"],
+    )
+    return len(emails)
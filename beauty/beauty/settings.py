@@ -10,6 +10,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 from decouple import config, Csv
+from celery.schedules import crontab
 
 import sys
 import logging
@@ -98,7 +99,13 @@ TEMPLATES = [
     },
 ]
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Emails are sent over SMTP. Set EMAIL_BACKEND=beauty.mail.QueuedEmailBackend
+# to queue them and deliver them with MAIL_DELIVERY_BACKEND by the
+# send_queued_emails Celery task, a worker must consume the mail queue then.
+EMAIL_BACKEND = config("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
+MAIL_DELIVERY_BACKEND = config(
+    "MAIL_DELIVERY_BACKEND", default="django.core.mail.backends.smtp.EmailBackend",
+)
 EMAIL_USE_TLS = True
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
@@ -179,6 +186,21 @@ DATABASES = {
     },
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Local-memory cache is used unless CACHE_LOCATION (e.g. redis://redis:6379/1) is set.
+
+CACHE_LOCATION = config("CACHE_LOCATION", default="")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_LOCATION,
+    } if CACHE_LOCATION else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -316,6 +338,8 @@ LOGGING = {
             "level": "CRITICAL",
             "filters": ["require_debug_false"],
             "class": "django.utils.log.AdminEmailHandler",
+            # Errors are mailed directly, the queue may be what failed.
+            "email_backend": MAIL_DELIVERY_BACKEND,
         },
     },
     "loggers": {
@@ -341,3 +365,74 @@ CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERYBEAT_SCHEDULE = {
+    "warm-availability-cache": {
+        "task": "api.tasks.warm_availability_cache",
+        "schedule": crontab(minute=0),
+    },
+    "geocode-pending-locations": {
+        "task": "api.tasks.geocode_locations",
+        "schedule": crontab(minute="*/15"),
+    },
+    "send-queued-emails": {
+        "task": "api.tasks.send_queued_emails",
+        "schedule": crontab(),
+    },
+}
+CELERY_ROUTES = {
+    "api.tasks.send_queued_emails": {"queue": "mail"},
+}
+
+# Amount of days, starting from today, for which free time of specialists
+# is calculated in advance by the warm_availability_cache task.
+AVAILABILITY_CACHE_DAYS = config("AVAILABILITY_CACHE_DAYS", default=7, cast=int)
+
+# Radius in kilometres of the nearest businesses search if it isn't requested.
+NEAREST_BUSINESSES_RADIUS = config("NEAREST_BUSINESSES_RADIUS", default=10, cast=float)
+
+# Search nearest businesses in the in-process tree of locations instead of
+# the database. The tree is kept in memory of every process, so it suits
+# read-heavy nodes.
+NEAREST_BUSINESSES_TREE = config("NEAREST_BUSINESSES_TREE", default=False, cast=bool)
+
+# Geocoder backend used to translate addresses into coordinates and back.
+# beauty.utils.GazetteerGeocoder works offline with the GEOCODER_GAZETTEER
+# JSON file of known places.
+GEOCODER_BACKEND = config("GEOCODER_BACKEND", default="beauty.utils.NominatimGeocoder")
+GEOCODER_GAZETTEER = config("GEOCODER_GAZETTEER", default="")
+GEOCODER_TIMEOUT = config("GEOCODER_TIMEOUT", default=3, cast=float)
+
+# Minimal delay in seconds between requests to Nominatim, and amount of
+# pending locations geocoded by one geocode_locations task.
+GEOCODER_MIN_DELAY = config("GEOCODER_MIN_DELAY", default=1, cast=float)
+GEOCODE_BATCH_SIZE = config("GEOCODE_BATCH_SIZE", default=50, cast=int)
+
+# Days for which found and not found geocoding results are cached, and
+# amount of results kept in the memory of every process.
+GEOCODE_CACHE_DAYS = config("GEOCODE_CACHE_DAYS", default=90, cast=int)
+GEOCODE_NEGATIVE_CACHE_DAYS = config("GEOCODE_NEGATIVE_CACHE_DAYS", default=1, cast=int)
+GEOCODE_MEMORY_CACHE_SIZE = config("GEOCODE_MEMORY_CACHE_SIZE", default=1024, cast=int)
+
+# Amount of emails sent by one send_queued_emails task, maximal age in
+# seconds of the pooled delivery connection, and retries of failed emails.
+MAIL_BATCH_SIZE = config("MAIL_BATCH_SIZE", default=100, cast=int)
+MAIL_CONNECTION_MAX_AGE = config("MAIL_CONNECTION_MAX_AGE", default=300, cast=int)
+MAIL_MAX_ATTEMPTS = config("MAIL_MAX_ATTEMPTS", default=5, cast=int)
+MAIL_RETRY_DELAY = config("MAIL_RETRY_DELAY", default=60, cast=int)
+# Seconds after which emails left sending by a dead worker are queued
+# again, and for which a queued delivery task is not queued once more.
+MAIL_SENDING_TIMEOUT = config("MAIL_SENDING_TIMEOUT", default=600, cast=int)
+MAIL_SCHEDULE_TIMEOUT = config("MAIL_SCHEDULE_TIMEOUT", default=60, cast=int)
+
+# Amount of orders checked and cancelled at once by the job which applies
+# reduced working time of a business.
+WORKING_TIME_JOB_BATCH_SIZE = config("WORKING_TIME_JOB_BATCH_SIZE", default=500, cast=int)
+
+# Path of the JSON report of queries and wall time of API endpoints, written
+# by the api.tests.test_query_budget harness. The report is not written if
+# the path is not set.
+QUERY_BUDGET_REPORT = config("QUERY_BUDGET_REPORT", default=None)
+
+# Maximal wall time of a request in seconds checked by the harness. Wall
+# time depends on the machine, so it is only reported when 0.
+QUERY_BUDGET_TIME_LIMIT = config("QUERY_BUDGET_TIME_LIMIT", default=0, cast=float)
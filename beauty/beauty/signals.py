@@ -2,13 +2,16 @@
 
 import logging
 
-from django.db.models.signals import post_save
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import Signal, receiver
 from rest_framework.reverse import reverse
 
-from api.models import (Order, Invitation)
-from beauty.tokens import OrderApprovingTokenGenerator, SpecialistInviteTokenGenerator
-from beauty.utils import StatusOrderEmail
+from api.geo import LocationTreeCache
+from api.models import (Business, CustomUser, Location, Order, OrderRollup, Position,
+                        Review, Service)
+from beauty.utils import AvailabilityCache, StatusOrderEmail
 
 
 logger = logging.getLogger(__name__)
@@ -16,20 +19,94 @@ logger = logging.getLogger(__name__)
 order_status_changed = Signal()
 
 
-@receiver(post_save, sender=Order, dispatch_uid="create_token_for_order")
-def create_token_for_order(sender, instance, created, **kwargs):
-    """Create order token."""
-    if created:
-        instance.token = OrderApprovingTokenGenerator().make_token(instance)
-        instance.save()
+@receiver(m2m_changed, sender=CustomUser.groups.through, dispatch_uid="reset_user_roles")
+def reset_user_roles(sender, instance, action, reverse, **kwargs):
+    """Forget loaded roles of the user after its groups are changed.
+
+    Groups changed from the group side (group.user_set) can't reset roles
+    of already loaded users, so such users should be loaded again.
+    """
+    if action.startswith("post_") and not reverse:
+        instance.reset_roles()
+
+
+@receiver(post_delete, sender=Order, dispatch_uid="remove_order_from_rollup")
+def remove_order_from_rollup(sender, instance, **kwargs):
+    """Subtract deleted order from the daily order rollup."""
+    rollup_fields = getattr(instance, "_rollup_fields", None) or instance.get_rollup_fields()
+    try:
+        rollup_key = instance.get_rollup_key(rollup_fields)
+    except ObjectDoesNotExist:
+        logger.info(f"Rollup of {instance} was deleted with its service")
+        return
+
+    OrderRollup.objects.move(rollup_key, None, instance.get_rollup_price(rollup_fields), None)
+    instance.invalidate_availability(rollup_fields)
+
+
+def is_working_time_saved(update_fields):
+    """Return True if working time could be changed by the save."""
+    return update_fields is None or "working_time" in update_fields
+
+
+@receiver(post_save, sender=Position, dispatch_uid="invalidate_position_availability")
+def invalidate_position_availability(sender, instance, created, update_fields, **kwargs):
+    """Make cached free time of the position stale after working time change."""
+    if not created and is_working_time_saved(update_fields):
+        transaction.on_commit(lambda: AvailabilityCache.invalidate_position(instance.id))
+
+
+@receiver(post_save, sender=Service, dispatch_uid="sync_order_business_on_service_save")
+def sync_service_order_business(sender, instance, created, **kwargs):
+    """Keep business of the service orders after the service was moved."""
+    if not created and instance.position_id != getattr(instance, "_loaded_position_id", None):
+        Order.objects.sync_business(Service.objects.filter(pk=instance.pk))
+    instance._loaded_position_id = instance.position_id
+
+
+@receiver(post_save, sender=Position, dispatch_uid="sync_order_business_on_position_save")
+def sync_position_order_business(sender, instance, created, **kwargs):
+    """Keep business of the position orders after the position was moved."""
+    if not created and instance.business_id != getattr(instance, "_loaded_business_id", None):
+        Order.objects.sync_business(Service.objects.filter(position=instance))
+    instance._loaded_business_id = instance.business_id
+
+
+@receiver(post_delete, sender=Review, dispatch_uid="remove_review_from_rating")
+def remove_review_from_rating(sender, instance, **kwargs):
+    """Subtract deleted review from the rating aggregate of its receiver."""
+    fields = getattr(instance, "_rating_fields", None) or instance.get_rating_fields()
+    CustomUser.objects.move_rating(fields, None)
+
+
+@receiver(post_save, sender=Business, dispatch_uid="invalidate_business_availability")
+def invalidate_business_availability(sender, instance, created, update_fields, **kwargs):
+    """Make cached free time of all business positions stale."""
+    if created or not is_working_time_saved(update_fields):
+        return
+
+    position_ids = list(instance.position_set.values_list("id", flat=True))
+
+    def invalidate():
+        for position_id in position_ids:
+            AvailabilityCache.invalidate_position(position_id)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Location, dispatch_uid="invalidate_location_tree_on_location_save")
+@receiver(post_delete, sender=Location, dispatch_uid="invalidate_location_tree_on_location_delete")
+@receiver(post_delete, sender=Business, dispatch_uid="invalidate_location_tree_on_business_delete")
+def invalidate_location_tree(sender, **kwargs):
+    """Make in-process trees of business locations stale."""
+    transaction.on_commit(LocationTreeCache.invalidate)
 
 
-@receiver(post_save, sender=Invitation, dispatch_uid="")
-def create_token_for_invite(sender, instance, created, **kwargs):
-    """Signal that creates token for an Invitation."""
-    if created:
-        instance.token = SpecialistInviteTokenGenerator().make_token(instance)
-        instance.save()
+@receiver(post_save, sender=Business, dispatch_uid="invalidate_location_tree_on_business_save")
+def invalidate_business_location_tree(sender, update_fields, **kwargs):
+    """Make trees of business locations stale after activity or location change."""
+    if update_fields is None or {"is_active", "location"} & set(update_fields):
+        transaction.on_commit(LocationTreeCache.invalidate)
 
 
 @receiver(order_status_changed)
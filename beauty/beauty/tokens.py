@@ -1,12 +1,23 @@
 """Module for all custom project tokens."""
 
+from datetime import timezone as dt_timezone
+
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.utils import timezone
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
+def get_moment_value(moment) -> str:
+    """Return time of the moment in microseconds as a string for hashing."""
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+
+    return moment.astimezone(dt_timezone.utc).strftime("%Y%m%d%H%M%S%f")
+
+
 class OrderApprovingTokenGenerator(PasswordResetTokenGenerator):
     """Order Approving TokenGenerator.
 
@@ -17,9 +28,11 @@ class OrderApprovingTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, order: object, timestamp: int) -> str:
         """Make a hash value.
 
-        Hash the order's primary key, status, and some order
-        state(update_at) that's sure to change after a status reset
-        to produce a token that is invalidated when it's used.
+        Hash the order's creation time, specialist, customer, start time
+        and status. Creation time is set before the order is saved and is
+        unique per order, so the token can be created before inserting it,
+        doesn't fit another order booked at the same time and is
+        invalidated when the order status is changed.
 
         Running this data through salted_hmac() prevents password cracking
         attempts using the reset token, provided the secret isn't compromised.
@@ -29,20 +42,22 @@ class OrderApprovingTokenGenerator(PasswordResetTokenGenerator):
             timestamp (int): token creation timestamp
         Returns (str): hash value
         """
-        update_at_timestamp = order.update_at.replace(
-            microsecond=0, tzinfo=None).timestamp()
-
         logger.info(f"Token for {order} was created")
 
-        return f"{order.pk}{order.status}{update_at_timestamp}{timestamp}"
+        return (f"{get_moment_value(order.created_at)}{order.specialist_id}{order.customer_id}"
+                f"{get_moment_value(order.start_time)}{order.status}{timestamp}")
 
 
 class SpecialistInviteTokenGenerator(PasswordResetTokenGenerator):
     """This is a token for approving Position."""
 
     def _make_hash_value(self, invitation: object, timestamp: int) -> str:
-        """This method sets values for hashing."""
-        created_at_timestamp = invitation.created_at.replace(
-            microsecond=0, tzinfo=None).timestamp()
+        """This method sets values for hashing.
 
-        return f"{invitation.email}{created_at_timestamp}{timestamp}"
+        Creation time is set before the invitation is saved and differs when
+        the email is invited to the position again, so the token can be
+        created before inserting it and a link of a declined invitation
+        doesn't fit a new one.
+        """
+        return (f"{get_moment_value(invitation.created_at)}{invitation.email}"
+                f"{invitation.position_id}{timestamp}")
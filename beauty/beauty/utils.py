@@ -1,20 +1,36 @@
 """This module provides you with all needed utility functions."""
 
+import hashlib
+import json
+import logging
 import os
+import re
+from collections import OrderedDict
 from datetime import timedelta, datetime, time
-from typing import Tuple, Sequence
-from functools import partial
+from threading import Lock
+from time import monotonic, sleep
+from typing import Optional, Tuple, Sequence
+from functools import lru_cache
+from geopy.exc import GeopyError
 from geopy.geocoders import Nominatim
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
 from django.forms import ValidationError
 import pytz
 from rest_framework.reverse import reverse
 from templated_mail.mail import BaseEmailMessage
 from faker import Faker
 from django.utils import timezone
+from django.utils.module_loading import import_string
+from beauty.availability import (WEEK_DAYS, IntervalSet, split_working_day, to_minutes,
+                                 to_time)
 from random import choice, randint
 import calendar
 
 
+logger = logging.getLogger(__name__)
+
 faker = Faker()
 
 
@@ -159,9 +175,18 @@ def time_to_string(time):
     return time.strftime("%H:%M")
 
 
+TIME_STRING_RE = re.compile(r"([0-9]{2}):([0-9]{2})")
+
+
 def string_to_time(string):
-    """Cast string HH:MM to time."""
-    return datetime.strptime(string, "%H:%M").time()
+    """Cast string HH:MM to time.
+
+    Raises ValueError for strings in other format.
+    """
+    match = TIME_STRING_RE.fullmatch(string)
+    if match is None:
+        raise ValueError(f"Time {string!r} does not match the format HH:MM.")
+    return time(int(match[1]), int(match[2]))
 
 
 class PositionAcceptEmail(BaseEmailMessage):
@@ -279,94 +304,67 @@ class RoundedTime:
         return timedelta(minutes=choice(cls.minutes))
 
 
-def string_interval_to_time_interval(str_interval: list):
-    """Returns list of time objects."""
-    return (string_to_time(str_interval[0]),
-            string_to_time(str_interval[1]))
-
-
-def is_inside_interval(main_interval: tuple, inner_interval: tuple):
-    """Return True if inner interval is inside main_interval."""
-    return (
-        inner_interval[0] >= main_interval[0]
-    ) and (
-        inner_interval[1] <= main_interval[1]
-    )
-
-
 def is_working_time_reduced(working_time, new_working_time):
-    """Returns true, if any day hours was reduced."""
+    """Returns true, if any working minute of the changed days was removed."""
     changed_days = set(working_time).intersection(new_working_time)
     for day in changed_days:
-
         if working_time[day] == new_working_time[day]:
             continue
-        if len(working_time[day]) < len(new_working_time[day]):
-            continue
-        if len(working_time[day]) > len(new_working_time[day]):
-            return True
-
-        new_interval = string_interval_to_time_interval(
-            new_working_time[day],
-        )
 
-        old_interval = string_interval_to_time_interval(
-            working_time[day],
-        )
-        if is_inside_interval(old_interval, new_interval):
+        old_intervals = IntervalSet.from_working_day(working_time[day])
+        new_intervals = IntervalSet.from_working_day(new_working_time[day])
+        if not new_intervals.issuperset(old_intervals):
             return True
     return False
 
 
 def is_order_fit_working_time(order, working_time: dict):
-    """Returns True if order fit working_time."""
-    week_days = [day.capitalize()
-                 for day in calendar.HTMLCalendar.cssclasses]
+    """Returns True if order fit working_time.
 
-    order_day = timezone.localtime(order.start_time).weekday()
-    # If day became weekend
-    if working_time[week_days[order_day]] == []:
-        return False
+    Orders of the days missing in working_time fit it.
+    """
+    start_time = timezone.localtime(order.start_time)
+    end_time = timezone.localtime(order.end_time)
 
-    order_interval = [
-        timezone.localtime(order.start_time).time(),
-        timezone.localtime(order.end_time).time(),
-    ]
+    working_hours = working_time.get(WEEK_DAYS[start_time.weekday()])
     # If working day not changed (missing field in patch)
-    try:
-        working_interval = string_interval_to_time_interval(
-            working_time[week_days[order_day]],
-        )
-    except KeyError:
+    if working_hours is None:
         return True
-    return is_inside_interval(working_interval, order_interval)
+    # If order ends on the next day
+    if end_time.date() != start_time.date():
+        return False
+
+    return IntervalSet.from_working_day(working_hours).covers(
+        to_minutes(start_time), to_minutes(end_time),
+    )
 
 
 def get_working_time_from_dict(data) -> dict:
-    """Raises errors if validation fails, returns working_time."""
-    week_days = [day.capitalize() for day in calendar.HTMLCalendar.cssclasses]
-    days_in_data = set(week_days).intersection(set(data.keys()))
-    working_time = {day: [] for day in days_in_data}
+    """Raises errors if validation fails, returns working_time.
 
-    for day in days_in_data:
+    Every day is an empty list for a day off, ["HH:MM", "HH:MM"] for one
+    working interval or a list of non-overlapping intervals, e.g. to have
+    a lunch break. Touching intervals are merged.
+    """
+    days_in_data = set(WEEK_DAYS).intersection(set(data.keys()))
+    working_time = {}
 
-        amount_of_data = len(data[day])
-        if amount_of_data not in [0, 2]:
-            raise ValidationError(
-                {day: "Must contain 2 elements or 0."},
-            )
+    for day in days_in_data:
+        intervals = []
+        for interval in split_working_day(data[day]):
 
-        if amount_of_data == 2:
+            if not isinstance(interval, (list, tuple)) or len(interval) != 2:
+                raise ValidationError(
+                    {day: "Must contain 2 elements or 0."},
+                )
 
             try:
-                opening_time = string_to_time(data[day][0])
-                closing_time = string_to_time(data[day][1])
-                working_time[day].append(time_to_string(opening_time))
-                working_time[day].append(time_to_string(closing_time))
-            except ValueError:
+                opening_time = string_to_time(interval[0])
+                closing_time = string_to_time(interval[1])
+            except (AttributeError, ValueError):
                 raise ValidationError(
                     {day: "Day schedule does not match the template\
-                            ['HH:MM', 'HH:MM']."},
+                            ['HH:MM', 'HH:MM'] or list of such intervals."},
                 )
 
             if opening_time > closing_time:
@@ -376,26 +374,33 @@ def get_working_time_from_dict(data) -> dict:
                         "working hours must begin before they end."},
                 )
 
-            if opening_time == closing_time:
-                working_time[day] = []
+            intervals.append((to_minutes(opening_time), to_minutes(closing_time)))
+
+        intervals.sort()
+        for previous, following in zip(intervals, intervals[1:]):
+            if following[0] < previous[1]:
+                raise ValidationError(
+                    {day: "Working intervals must not overlap."},
+                )
+
+        working_time[day] = IntervalSet(intervals).to_working_day()
 
     return working_time
 
 
 def update_position_time_by_business(position_time, business_time):
-    """Updates position working time based on business working_time."""
+    """Updates position working time based on business working_time.
+
+    Position keeps only its working intervals inside the business ones, a
+    position which doesn't work on a day gets the business working time.
+    """
     for day, value in position_time.items():
-        if business_time[day] == []:
-            position_time[day] = []
-            continue
-        if value == []:
-            position_time[day] = business_time[day]
-            continue
+        business_intervals = IntervalSet.from_working_day(business_time[day])
+        position_intervals = IntervalSet.from_working_day(value)
+        if not position_intervals:
+            position_intervals = business_intervals
 
-        if string_to_time(business_time[day][0]) > string_to_time(value[0]):
-            position_time[day][0] = business_time[day][0]
-        if string_to_time(business_time[day][1]) < string_to_time(value[1]):
-            position_time[day][1] = business_time[day][1]
+        position_time[day] = position_intervals.intersection(business_intervals).to_working_day()
 
     return position_time
 
@@ -406,26 +411,23 @@ def get_order_expiration_time(order, date_time, time_delta_hours=3):
     Args:
         order: Order instance
         date_time: datetime data
-        time_delta_hours: time delta hours from creating an order or starting a working day
+        time_delta_hours: time delta hours from creating an order or starting a working
+            interval
 
     Returns: date time expired order
 
     """
-    from api.views.schedule import get_working_day
-
-    working_day = get_working_day(order.service.position, date_time)
+    working_day = order.service.position.get_working_day(date_time)
     eta = date_time + timedelta(hours=time_delta_hours)
     last_week_day = (order.created_at + timedelta(days=7)).date()
     if last_week_day == date_time.date():
         return None
-    if working_day:
-        start_working_datetime, end_working_datetime = [datetime.strptime(t, "%H:%M")
-                                                        for t in working_day]
-        if start_working_datetime.time() < eta.time() < end_working_datetime.time():
+    for start_minutes, end_minutes in working_day:
+        if to_time(start_minutes) < eta.time() < to_time(end_minutes):
             return eta
-        elif start_working_datetime.time() > eta.time():
+        elif to_time(start_minutes) > eta.time():
             naive_datetime = timezone.datetime.combine(
-                eta.date(), (start_working_datetime + timedelta(hours=time_delta_hours)).time())
+                eta.date(), to_time(start_minutes + time_delta_hours * 60))
             return timezone.make_aware(naive_datetime)
 
     next_day = (date_time + timedelta(days=1)).replace(hour=0, minute=0, second=0)
@@ -464,17 +466,372 @@ class Chart:
         self.data = data
 
 
+class VersionedCache:
+    """Base class for caches invalidated by version counters.
+
+    Version counter is a part of keys of cached values. Bumping the counter
+    makes old values unreachable without searching for their keys, so it
+    works with any cache backend. Missing counter starts from the current
+    timestamp, so values cached before the counter was evicted are never
+    reused.
+    """
+
+    version_prefix = "version"
+
+    @classmethod
+    def make_version_key(cls, *args) -> str:
+        """Return key of the version counter for given arguments."""
+        return ":".join(str(arg) for arg in (cls.version_prefix, *args))
+
+    @classmethod
+    def get_versions(cls, versions_args: Sequence[tuple]) -> dict:
+        """Return versions for every tuple of counter arguments."""
+        version_keys = {args: cls.make_version_key(*args) for args in versions_args}
+        versions = cache.get_many(version_keys.values())
+
+        missing_keys = set(version_keys.values()) - versions.keys()
+        if missing_keys:
+            new_version = int(datetime.now().timestamp() * 1000)
+            for version_key in missing_keys:
+                cache.add(version_key, new_version, timeout=None)
+            versions.update(cache.get_many(missing_keys))
+
+        return {args: versions.get(key, 0) for args, key in version_keys.items()}
+
+    @classmethod
+    def get_version(cls, *args) -> int:
+        """Return current version for given counter arguments."""
+        return cls.get_versions([args])[args]
+
+    @classmethod
+    def bump_version(cls, *args) -> None:
+        """Make values cached with the current version stale."""
+        try:
+            cache.incr(cls.make_version_key(*args))
+        except ValueError:
+            # Missing counter gets a new version on the next read.
+            pass
+
+
+class StatisticCache(VersionedCache):
+    """Class for caching business statistic responses.
+
+    Every business has a version counter which is bumped when its orders
+    are changed.
+    """
+
+    timeout = 15 * 60
+    version_prefix = "statistic:version"
+    response_key = "statistic:{business_id}:{version}:{time_interval}:{day}"
+
+    @classmethod
+    def make_key(cls, business_id: int, time_interval: str) -> str:
+        """Return cache key of the statistic for the given time interval.
+
+        Key includes current date, because statistic time intervals are
+        counted from today.
+        """
+        return cls.response_key.format(
+            business_id=business_id,
+            version=cls.get_version(business_id),
+            time_interval=time_interval,
+            day=timezone.localdate(),
+        )
+
+    @classmethod
+    def load(cls, business_id: int, time_interval: str):
+        """Return cached statistic or None."""
+        return cache.get(cls.make_key(business_id, time_interval))
+
+    @classmethod
+    def store(cls, business_id: int, time_interval: str, statistic: dict) -> None:
+        """Save statistic to the cache."""
+        cache.set(cls.make_key(business_id, time_interval), statistic, cls.timeout)
+
+
+class AvailabilityCache(VersionedCache):
+    """Class for caching free time intervals of specialists.
+
+    Free intervals are cached per specialist, position and day. Every day
+    of a specialist has a version counter which is bumped when an order of
+    the specialist on the day is changed in any position, and every
+    position has one for working time changes. Keys are
+    made before orders are fetched, so intervals calculated concurrently
+    with an order change are saved with a stale version and never read.
+    """
+
+    timeout = 24 * 60 * 60
+    version_prefix = "availability:version"
+    intervals_key = "availability:{specialist_id}:{position_id}:{day}:{version}:{day_version}"
+    stats_keys = {"hits": "availability:stats:hits", "misses": "availability:stats:misses"}
+
+    @classmethod
+    def make_keys(cls, position_id: int, specialists_days: Sequence[tuple]) -> dict:
+        """Return cache keys for every (specialist id, day) of the position."""
+        version = cls.get_version(position_id)
+        day_versions = cls.get_versions(specialists_days)
+
+        return {
+            (specialist_id, day): cls.intervals_key.format(
+                specialist_id=specialist_id,
+                position_id=position_id,
+                day=day,
+                version=version,
+                day_version=day_versions[(specialist_id, day)],
+            )
+            for specialist_id, day in specialists_days
+        }
+
+    @classmethod
+    def load_many(cls, keys: dict) -> dict:
+        """Return cached free intervals for keys made with make_keys."""
+        cached = cache.get_many(keys.values())
+        free_intervals = {
+            specialist_day: cached[key]
+            for specialist_day, key in keys.items()
+            if key in cached
+        }
+
+        cls.count_stats(hits=len(free_intervals), misses=len(keys) - len(free_intervals))
+        return free_intervals
+
+    @classmethod
+    def store_many(cls, keys: dict, free_intervals: dict) -> None:
+        """Save free intervals with keys made with make_keys."""
+        cache.set_many(
+            {keys[specialist_day]: value for specialist_day, value in free_intervals.items()},
+            cls.timeout,
+        )
+
+    @classmethod
+    def invalidate(cls, specialist_id: int, day) -> None:
+        """Make cached free intervals of the specialist day stale in all positions."""
+        cls.bump_version(specialist_id, day)
+
+    @classmethod
+    def invalidate_position(cls, position_id: int) -> None:
+        """Make cached free intervals of all position days stale."""
+        cls.bump_version(position_id)
+
+    @classmethod
+    def count_stats(cls, **amounts) -> None:
+        """Add amounts of hits and misses to the stats counters."""
+        for name, amount in amounts.items():
+            if amount:
+                cache.add(cls.stats_keys[name], 0, timeout=None)
+                try:
+                    cache.incr(cls.stats_keys[name], amount)
+                except ValueError:
+                    cache.set(cls.stats_keys[name], amount, timeout=None)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        """Return amounts of hits and misses and hit rate."""
+        counters = cache.get_many(cls.stats_keys.values())
+        stats = {name: counters.get(key, 0) for name, key in cls.stats_keys.items()}
+        total = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / total, 4) if total else 0
+        return stats
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        """Reset stats counters."""
+        cache.delete_many(cls.stats_keys.values())
+
+
+def normalize_address(address: str) -> str:
+    """Return address in lower case with single spaces and commas."""
+    parts = (" ".join(part.split()) for part in str(address).casefold().split(","))
+    return ", ".join(part for part in parts if part)
+
+
+class GeocoderError(Exception):
+    """Geocoder backend failed to answer, the result is unknown."""
+
+
+class NominatimGeocoder:
+    """Geocoder backend which requests OpenStreetMap Nominatim service.
+
+    Requests of the process are sent not more often than once in
+    GEOCODER_MIN_DELAY seconds, as the service usage policy requires.
+    """
+
+    _last_request = 0.0
+    _lock = Lock()
+
+    def __init__(self):
+        """Create Nominatim client with the configured timeout."""
+        self.geolocator = Nominatim(user_agent="BeautyProject", timeout=settings.GEOCODER_TIMEOUT)
+
+    @classmethod
+    def throttle(cls) -> None:
+        """Wait until the next request is allowed."""
+        with cls._lock:
+            delay = cls._last_request + settings.GEOCODER_MIN_DELAY - monotonic()
+            if delay > 0:
+                sleep(delay)
+            cls._last_request = monotonic()
+
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Return coordinates of the address or None if it can not be found."""
+        self.throttle()
+        try:
+            location = self.geolocator.geocode(address)
+        except GeopyError as error:
+            raise GeocoderError(error) from error
+
+        if location:
+            return float(location.latitude), float(location.longitude)
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        """Return address nearest to coordinates or None if it can not be found."""
+        self.throttle()
+        try:
+            location = self.geolocator.reverse(f"{latitude}, {longitude}", language="en")
+        except GeopyError as error:
+            raise GeocoderError(error) from error
+
+        if location:
+            return location.address
+
+
+class GazetteerGeocoder:
+    """Offline geocoder backend which looks up addresses in a local gazetteer.
+
+    Gazetteer is a JSON file (GEOCODER_GAZETTEER setting) with a list of
+    objects with address, latitude and longitude. It is used in tests and
+    on nodes without access to the geocoding service.
+    """
+
+    # Maximal distance in degrees from coordinates to the reversed address.
+    reverse_delta = 0.01
+
+    def __init__(self, places: Optional[Sequence[dict]] = None):
+        """Load places from the gazetteer file if they aren't given."""
+        if places is None:
+            places = []
+            if settings.GEOCODER_GAZETTEER:
+                with open(settings.GEOCODER_GAZETTEER, encoding="utf-8") as gazetteer:
+                    places = json.load(gazetteer)
+
+        self.places = {
+            normalize_address(place["address"]): (
+                place["address"], float(place["latitude"]), float(place["longitude"]),
+            )
+            for place in places
+        }
+
+    def geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Return coordinates of the known address."""
+        place = self.places.get(normalize_address(address))
+        if place:
+            return place[1], place[2]
+
+    def reverse(self, latitude: float, longitude: float) -> Optional[str]:
+        """Return the known address nearest to coordinates."""
+        latitude, longitude = float(latitude), float(longitude)
+        nearest = min(
+            self.places.values(),
+            key=lambda place: max(abs(place[1] - latitude), abs(place[2] - longitude)),
+            default=None,
+        )
+        if nearest and max(abs(nearest[1] - latitude),
+                           abs(nearest[2] - longitude)) <= self.reverse_delta:
+            return nearest[0]
+
+
+@lru_cache(maxsize=None)
+def get_geocoder(backend: str):
+    """Return geocoder backend instance for its import path."""
+    return import_string(backend)()
+
+
 class Geolocator:
-    """Class for address-coordinates translation."""
+    """Class for address-coordinates translation.
+
+    Results of the geocoder backend are cached in the database and in the
+    process memory, keyed by normalised address or rounded coordinates, so
+    known addresses never wait for the geocoding service. Not found results
+    are cached for a shorter time, failed requests are not cached.
+    """
+
+    coordinates_precision = 4
+    max_key_length = 255
+    _memory = OrderedDict()
+    _lock = Lock()
+
+    @classmethod
+    def get_backend(cls):
+        """Return configured geocoder backend."""
+        return get_geocoder(settings.GEOCODER_BACKEND)
+
+    @classmethod
+    def make_key(cls, kind: str, value: str) -> str:
+        """Return cache key, hashing values which don't fit the database key."""
+        key = f"{kind}:{value}"
+        if len(key) > cls.max_key_length:
+            key = f"{kind}-sha256:{hashlib.sha256(value.encode()).hexdigest()}"
+        return key
+
+    @classmethod
+    def get_cached(cls, key: str, fetch, fail_silently: bool = True):
+        """Return cached result of the key or fetch and cache a new one.
+
+        Args:
+            key: cache key
+            fetch: function which requests the geocoder backend
+            fail_silently: return None instead of raising GeocoderError
 
-    geolocator = Nominatim(user_agent="BeautyProject")
+        Returns:
+            result of fetch, maybe cached
+        """
+        now = timezone.now()
+        with cls._lock:
+            if key in cls._memory and cls._memory[key][0] > now:
+                cls._memory.move_to_end(key)
+                return cls._memory[key][1]
+
+        cached_results = apps.get_model("api", "GeocodeCache").objects
+        row = cached_results.filter(key=key, expires_at__gt=now).first()
+        if row:
+            result, expires_at = row.result, row.expires_at
+        else:
+            try:
+                result = fetch()
+            except GeocoderError as error:
+                logger.warning(f"Geocoding of {key} failed: {error}")
+                if not fail_silently:
+                    raise
+                return None
+
+            days = settings.GEOCODE_CACHE_DAYS if result else settings.GEOCODE_NEGATIVE_CACHE_DAYS
+            expires_at = now + timedelta(days=days)
+            cached_results.update_or_create(
+                key=key, defaults={"result": result, "expires_at": expires_at},
+            )
+
+        with cls._lock:
+            cls._memory[key] = (expires_at, result)
+            cls._memory.move_to_end(key)
+            while len(cls._memory) > settings.GEOCODE_MEMORY_CACHE_SIZE:
+                cls._memory.popitem(last=False)
+
+        return result
 
     @classmethod
-    def get_coordinates_by_address(cls, address: str) -> Tuple[str]:
+    def clear_memory(cls) -> None:
+        """Forget results cached in the process memory."""
+        with cls._lock:
+            cls._memory.clear()
+
+    @classmethod
+    def get_coordinates_by_address(cls, address: str,
+                                   fail_silently: bool = True) -> Optional[Tuple[float, float]]:
         """Translate address into coordinates.
 
         Args:
             address: Location address
+            fail_silently: return None instead of raising GeocoderError
 
         Returns:
             latitude: geographical latitude
@@ -482,13 +839,16 @@ class Geolocator:
             or
             None (if address can not be found)
         """
-        location = cls.geolocator.geocode(address)
+        key = cls.make_key("address", normalize_address(address))
+        coordinates = cls.get_cached(
+            key, lambda: cls.get_backend().geocode(address), fail_silently,
+        )
 
-        if location:
-            return float(location.latitude), float(location.longitude)
+        if coordinates:
+            return tuple(coordinates)
 
     @classmethod
-    def get_address_by_coordinates(cls, latitude: float, longitude: float) -> str:
+    def get_address_by_coordinates(cls, latitude: float, longitude: float) -> Optional[str]:
         """Translate coordinates into address.
 
         Args:
@@ -500,11 +860,11 @@ class Geolocator:
             or
             None (if address can not be found)
         """
-        coordinates = partial(cls.geolocator.reverse, language="en")
-        location = coordinates(f"{str(latitude)}, {str(longitude)}")
+        latitude = round(float(latitude), cls.coordinates_precision)
+        longitude = round(float(longitude), cls.coordinates_precision)
+        key = cls.make_key("coordinates", f"{latitude},{longitude}")
 
-        if location:
-            return location.address
+        return cls.get_cached(key, lambda: cls.get_backend().reverse(latitude, longitude))
 
 
 class RemindAboutOrderEmail(BaseEmailMessage):